@@ -0,0 +1,98 @@
+from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.http import require_GET
+
+from .conditional import conditional
+from .models import Course, File, Instructor, Link, Note, Reminder
+from .pagination import get_ordering, paginate
+from .serializers import columns, parse_fields, serialize_row
+
+
+def list_response(request, queryset):
+    """
+    Return a page of ``queryset`` as JSON, read with values() so no model
+    instances are built. The ``fields`` parameter selects the fields and
+    ``cursor`` the page.
+    """
+    model = queryset.model
+    try:
+        fields = parse_fields(model, request.GET.get("fields"))
+    except ValueError as error:
+        return JsonResponse({"fields": [str(error)]}, status=400)
+
+    # The ordering columns are needed to build the next cursor
+    ordering = [field.lstrip("-") for field in get_ordering(queryset)]
+    rows = queryset.values(*dict.fromkeys(columns(model, fields) + ordering))
+    page = paginate(rows, request.GET.get("cursor"))
+
+    return JsonResponse(
+        {
+            "results": [serialize_row(model, row, fields) for row in page],
+            "next": page.next_token,
+        }
+    )
+
+
+@require_GET
+@login_required(login_url="login")
+@conditional("courses")
+def courses(request):
+    """
+    List the courses of the user
+    """
+    return list_response(request, Course.objects.filter(user=request.user))
+
+
+@require_GET
+@login_required(login_url="login")
+@conditional("reminders")
+def reminders(request):
+    """
+    List the reminders of the user
+    """
+    return list_response(request, Reminder.objects.filter(user=request.user))
+
+
+@require_GET
+@login_required(login_url="login")
+@conditional("course")
+def notes(request, course_id):
+    """
+    List the notes of a course
+    """
+    course = get_object_or_404(Course.objects.only("id"), id=course_id, user=request.user)
+    return list_response(request, Note.objects.filter(course=course))
+
+
+@require_GET
+@login_required(login_url="login")
+@conditional("course")
+def files(request, course_id):
+    """
+    List the files of a course
+    """
+    course = get_object_or_404(Course.objects.only("id"), id=course_id, user=request.user)
+    return list_response(request, File.objects.filter(course=course))
+
+
+@require_GET
+@login_required(login_url="login")
+@conditional("course")
+def instructors(request, course_id):
+    """
+    List the instructors of a course
+    """
+    course = get_object_or_404(Course.objects.only("id"), id=course_id, user=request.user)
+    return list_response(request, Instructor.objects.filter(course=course))
+
+
+@require_GET
+@login_required(login_url="login")
+@conditional("course")
+def links(request, course_id):
+    """
+    List the links of a course
+    """
+    course = get_object_or_404(Course.objects.only("id"), id=course_id, user=request.user)
+    return list_response(request, Link.objects.filter(course=course))
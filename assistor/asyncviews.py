@@ -0,0 +1,319 @@
+import asyncio
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.views import redirect_to_login
+from django.db import close_old_connections
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404, render, resolve_url
+
+from . import caching
+from .conditional import conditional
+from .models import Course, File, Instructor, Link, Note, Reminder
+from .pagination import paginate
+from .forms import (
+    CourseForm,
+    FileForm,
+    NoteForm,
+    LinkForm,
+    InstructorForm,
+    ReminderForm,
+    empty_form,
+)
+
+
+def is_authenticated(request):
+    # Loads the lazy request.user from the session
+    return request.user.is_authenticated
+
+
+def async_login_required(function=None, login_url=None):
+    """
+    Async version of ``login_required``. The user is loaded in a thread,
+    the ORM cannot be used from the event loop.
+    """
+
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if await sync_to_async(is_authenticated)(request):
+                return await view(request, *args, **kwargs)
+            return redirect_to_login(
+                request.get_full_path(), resolve_url(login_url or settings.LOGIN_URL)
+            )
+
+        return wrapper
+
+    if function:
+        return decorator(function)
+    return decorator
+
+
+def in_worker(function):
+    """
+    Run ``function`` in a worker thread of its own, closing the connection
+    of the thread once it is older than ``CONN_MAX_AGE``, as a request does.
+    """
+
+    def run():
+        close_old_connections()
+        try:
+            return function()
+        finally:
+            close_old_connections()
+
+    return sync_to_async(run, thread_sensitive=False)()
+
+
+async def gather(*functions):
+    """
+    Call the independent ``functions`` reading the database concurrently,
+    each in a thread with its own connection, and return their results.
+
+    With ``ASSISTOR_CONCURRENT_QUERIES`` off they are called one after
+    another in the thread of the request, which sees its uncommitted
+    transaction, as tests need.
+    """
+    if getattr(settings, "ASSISTOR_CONCURRENT_QUERIES", True):
+        return await asyncio.gather(*[in_worker(function) for function in functions])
+    return await sync_to_async(lambda: [function() for function in functions])()
+
+
+async def query(function):
+    """Call ``function`` reading the database, as ``gather`` does"""
+    (result,) = await gather(function)
+    return result
+
+
+def read_page(queryset, cursor):
+    """Return the page of ``queryset`` after ``cursor``, its rows read"""
+    page = paginate(queryset, cursor)
+    len(page)
+    return page
+
+
+async def render_page(request, template_name, context):
+    return await sync_to_async(render)(request, template_name, context)
+
+
+@async_login_required(login_url="login")
+@conditional("courses", "reminders")
+async def index(request):
+    """
+    Async version of ``views.index``. The versions of the cached lists
+    are read first, then the lists whose fragment is not cached are read
+    concurrently.
+    """
+    user = request.user
+
+    def versions():
+        courses_version = caching.courses_version(user.id)
+        reminders_version = caching.reminders_version(user.id)
+        cached = caching.cached_fragments(
+            ("index_courses", [user.id, courses_version]),
+            ("index_reminders", [user.id, reminders_version]),
+        )
+        return courses_version, reminders_version, cached
+
+    courses_version, reminders_version, cached = await query(versions)
+    courses = Course.objects.filter(user=user)[:4]
+    reminders = Reminder.objects.filter(user=user)[:4]
+    loaders = {
+        name: (lambda queryset=queryset: list(queryset))
+        for name, queryset in [("index_courses", courses), ("index_reminders", reminders)]
+        if name not in cached
+    }
+    loaded = dict(zip(loaders, await gather(*loaders.values())))
+
+    return await render_page(
+        request,
+        "assistor/index.html",
+        {
+            "courses": loaded.get("index_courses", courses),
+            "reminders": loaded.get("index_reminders", reminders),
+            "course_form": empty_form(CourseForm),
+            "reminder_form": empty_form(ReminderForm),
+            "cache_timeout": caching.TIMEOUT,
+            "courses_version": courses_version,
+            "reminders_version": reminders_version,
+        },
+    )
+
+
+@async_login_required(login_url="login")
+@conditional("courses")
+async def courses(request):
+    """
+    Async version of ``views.courses``. The page is only read when its
+    fragment is not cached.
+    """
+    user = request.user
+    cursor = request.GET.get("cursor")
+    page = paginate(Course.objects.filter(user=user), cursor)
+
+    # JSON variant of the page
+    if request.GET.get("format") == "json":
+        await query(lambda: len(page))
+        return JsonResponse(page.serialize())
+
+    def version():
+        courses_version = caching.courses_version(user.id)
+        cached = caching.cached_fragments(
+            ("courses", [user.id, courses_version, cursor or ""])
+        )
+        if not cached:
+            len(page)
+        return courses_version
+
+    return await render_page(
+        request,
+        "assistor/courses.html",
+        {
+            "courses": page,
+            "page": page,
+            "course_form": empty_form(CourseForm),
+            "cache_timeout": caching.TIMEOUT,
+            "courses_version": await query(version),
+        },
+    )
+
+
+@async_login_required(login_url="login")
+@conditional("course")
+async def course(request, course_id):
+    """
+    Async version of ``views.course``. The course with its counts, its
+    latest notes and files, its instructors and its links are read
+    concurrently. The children are filtered on the owner of the course
+    so none is read from a course of another user.
+    """
+    user = request.user
+    children = {"course_id": course_id, "course__user": user}
+    course, notes, files, instructors, links = await gather(
+        lambda: get_object_or_404(Course, id=course_id, user=user),
+        lambda: list(Note.objects.filter(**children)[:4]),
+        lambda: list(File.objects.filter(**children)[:4]),
+        lambda: list(Instructor.objects.filter(**children)),
+        lambda: list(Link.objects.filter(**children)),
+    )
+
+    # Show the course
+    return await render_page(
+        request,
+        "assistor/course.html",
+        {
+            "course": course,
+            "notes": notes,
+            "files": files,
+            "instructors": instructors,
+            "links": links,
+            "course_form": CourseForm(instance=course),
+            "note_form": empty_form(NoteForm),
+            "file_form": empty_form(FileForm),
+            "instructor_form": empty_form(InstructorForm),
+            "link_form": empty_form(LinkForm),
+        },
+    )
+
+
+async def course_page(request, course_id, model):
+    """Read the course and a page of its ``model`` rows concurrently"""
+    user = request.user
+    return await gather(
+        lambda: get_object_or_404(Course, id=course_id, user=user),
+        lambda: read_page(
+            model.objects.filter(course_id=course_id, course__user=user),
+            request.GET.get("cursor"),
+        ),
+    )
+
+
+@async_login_required(login_url="login")
+@conditional("course")
+async def notes(request, course_id):
+    """
+    Async version of ``views.notes``, reading the course and the page of
+    notes concurrently.
+    """
+    course, page = await course_page(request, course_id, Note)
+
+    # JSON variant of the page
+    if request.GET.get("format") == "json":
+        return JsonResponse(page.serialize())
+
+    return await render_page(
+        request,
+        "assistor/notes.html",
+        {
+            "course": course,
+            "notes": page,
+            "page": page,
+            "course_form": CourseForm(instance=course),
+            "note_form": empty_form(NoteForm),
+        },
+    )
+
+
+@async_login_required(login_url="login")
+@conditional("course")
+async def files(request, course_id):
+    """
+    Async version of ``views.files``, reading the course and the page of
+    files concurrently.
+    """
+    course, page = await course_page(request, course_id, File)
+
+    # JSON variant of the page
+    if request.GET.get("format") == "json":
+        return JsonResponse(page.serialize())
+
+    return await render_page(
+        request,
+        "assistor/files.html",
+        {
+            "course": course,
+            "files": page,
+            "page": page,
+            "course_form": CourseForm(instance=course),
+            "file_form": empty_form(FileForm),
+        },
+    )
+
+
+@async_login_required(login_url="login")
+@conditional("reminders")
+async def reminders(request):
+    """
+    Async version of ``views.reminders``. The page is only read when its
+    fragment is not cached.
+    """
+    user = request.user
+    cursor = request.GET.get("cursor")
+    page = paginate(Reminder.objects.filter(user=user), cursor)
+
+    # JSON variant of the page
+    if request.GET.get("format") == "json":
+        await query(lambda: len(page))
+        return JsonResponse(page.serialize())
+
+    def version():
+        reminders_version = caching.reminders_version(user.id)
+        cached = caching.cached_fragments(
+            ("reminders", [user.id, reminders_version, cursor or ""])
+        )
+        if not cached:
+            len(page)
+        return reminders_version
+
+    return await render_page(
+        request,
+        "assistor/reminders.html",
+        {
+            "reminders": page,
+            "page": page,
+            "reminder_form": empty_form(ReminderForm),
+            "cache_timeout": caching.TIMEOUT,
+            "reminders_version": await query(version),
+        },
+    )
@@ -0,0 +1,208 @@
+from django.db import connection, transaction
+from django.forms.models import model_to_dict
+from django.utils import timezone
+
+from . import caching, events, search
+from .forms import NoteForm, ReminderForm
+from .models import Course, Note, Reminder
+
+# Operations accepted in one request
+MAX_OPERATIONS = 1000
+
+OPERATIONS = ["create", "update", "delete"]
+
+
+class BatchError(Exception):
+    pass
+
+
+def index(model, instances):
+    """Index rows saved without signals, when their model is searchable"""
+    if instances and model in search.BY_MODEL:
+        search.get_backend().index_queryset(
+            model.objects.filter(id__in=[instance.id for instance in instances])
+        )
+
+
+def is_id(value):
+    # JSON true and false are ints to Python
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def create_all(model, instances):
+    """
+    Insert ``instances`` with bulk_create when the database returns the
+    new ids. Other databases get one INSERT per instance, in the current
+    transaction, since callers need the ids.
+    """
+    if not instances:
+        return
+    if connection.features.can_return_rows_from_bulk_insert:
+        model.objects.bulk_create(instances)
+        index(model, instances)
+    else:
+        for instance in instances:
+            instance.save()
+
+
+class Batch:
+    """
+    Create, update and delete many rows of ``queryset`` in one request.
+
+    Every operation is validated with ``form_class`` first, then all the
+    valid ones are applied in one transaction with bulk_create,
+    bulk_update and a single delete. An update only needs the fields it
+    changes. The result of every operation is returned in order.
+    """
+
+    model = None
+    form_class = None
+
+    def __init__(self, queryset):
+        self.queryset = queryset
+        self.fields = list(self.form_class._meta.fields)
+
+    def new_instance(self):
+        raise NotImplementedError
+
+    def prepare_update(self, instance, form):
+        """Return the fields to save besides the ones of the form"""
+        # bulk_update skips auto_now, which the views' save() sets
+        instance.creation_time = timezone.now()
+        return ["creation_time"]
+
+    def after_apply(self, created, updated):
+        pass
+
+    def run(self, operations):
+        if not isinstance(operations, list):
+            raise BatchError("Send a list of operations.")
+        if len(operations) > MAX_OPERATIONS:
+            raise BatchError(f"Send at most {MAX_OPERATIONS} operations at a time.")
+
+        ids = [
+            operation.get("id")
+            for operation in operations
+            if isinstance(operation, dict) and is_id(operation.get("id"))
+        ]
+        existing = self.queryset.in_bulk(ids)
+
+        results = [None] * len(operations)
+        creates = []
+        updates = []
+        deletes = []
+        seen = set()
+        for position, operation in enumerate(operations):
+            def fail(status, errors):
+                results[position] = {"index": position, "status": status, "errors": errors}
+
+            if not isinstance(operation, dict) or operation.get("op") not in OPERATIONS:
+                fail(400, {"op": [f"Use one of {', '.join(OPERATIONS)}."]})
+                continue
+            data = operation.get("data") or {}
+            if not isinstance(data, dict):
+                fail(400, {"data": ["Send the fields as an object."]})
+                continue
+
+            if operation["op"] == "create":
+                instance = self.new_instance()
+            elif not is_id(operation.get("id")):
+                fail(400, {"id": ["Send an integer id."]})
+                continue
+            else:
+                instance = existing.get(operation.get("id"))
+                if instance is None:
+                    fail(404, {"id": ["Not found."]})
+                    continue
+                if instance.id in seen:
+                    fail(400, {"id": ["Only one operation per object is allowed."]})
+                    continue
+                seen.add(instance.id)
+                if operation["op"] == "delete":
+                    deletes.append((position, instance))
+                    continue
+                data = {**model_to_dict(instance, self.fields), **data}
+
+            form = self.form_class(data, instance=instance)
+            if not form.is_valid():
+                fail(400, form.errors.get_json_data())
+            elif operation["op"] == "create":
+                creates.append((position, instance))
+            else:
+                updates.append((position, instance, form))
+
+        extra = set()
+        for position, instance, form in updates:
+            extra.update(self.prepare_update(instance, form))
+        updated = [instance for position, instance, form in updates]
+
+        with transaction.atomic():
+            create_all(self.model, [instance for position, instance in creates])
+            if updated:
+                self.model.objects.bulk_update(updated, self.fields + sorted(extra))
+                # bulk_update sends no signals
+                index(self.model, updated)
+            if deletes:
+                self.queryset.filter(
+                    id__in=[instance.id for position, instance in deletes]
+                ).delete()
+        self.after_apply([instance for position, instance in creates], updated)
+
+        for position, instance in creates:
+            results[position] = {"index": position, "status": 201, "data": instance.serialize()}
+        for position, instance, form in updates:
+            results[position] = {"index": position, "status": 200, "data": instance.serialize()}
+        for position, instance in deletes:
+            results[position] = {"index": position, "status": 204, "id": instance.id}
+        return results
+
+
+class NoteBatch(Batch):
+    model = Note
+    form_class = NoteForm
+
+    def __init__(self, course):
+        self.course = course
+        super().__init__(Note.objects.filter(course=course))
+
+    def new_instance(self):
+        return Note(course=self.course)
+
+    def after_apply(self, created, updated):
+        # bulk_create and bulk_update send no signals to give the course a
+        # new version or to count the new notes
+        caching.invalidate_course(self.course.id)
+        caching.invalidate_courses(self.course.user_id)
+        bulk_created = created if connection.features.can_return_rows_from_bulk_insert else []
+        if bulk_created or updated:
+            Course.objects.filter(id=self.course.id).record_activity(
+                note_count=len(bulk_created)
+            )
+
+
+class ReminderBatch(Batch):
+    model = Reminder
+    form_class = ReminderForm
+
+    def __init__(self, user):
+        self.user = user
+        super().__init__(Reminder.objects.filter(user=user))
+
+    def new_instance(self):
+        return Reminder(user=self.user)
+
+    def prepare_update(self, instance, form):
+        fields = super().prepare_update(instance, form)
+        # A reminder moved to another time is sent again
+        if "time" in form.changed_data:
+            instance.notified_time = None
+            fields.append("notified_time")
+        return fields
+
+    def after_apply(self, created, updated):
+        # bulk_update sends no signals to drop the cached reminder lists
+        # or to tell the event streams
+        caching.invalidate_reminders(self.user.id)
+        events.publish_reminders(self.user.id, "updated", updated)
+        if connection.features.can_return_rows_from_bulk_insert:
+            events.publish_reminders(self.user.id, "created", created)
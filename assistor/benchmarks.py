@@ -0,0 +1,297 @@
+import hashlib
+import json
+import os
+import time
+import tracemalloc
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.urls import reverse
+from django.utils import timezone
+
+from . import search
+from .models import Course, File, Note, Reminder, User
+from .uploads import MIN_CHUNK_SIZE
+from .urls import urlpatterns
+
+# Courses, notes, files and reminders of the seeded user
+SIZES = {"small": 10, "medium": 1000, "large": 50000}
+
+# The notes and files are spread over this many courses, so the course
+# pages show a tenth of them
+HOT_COURSES = 10
+
+BATCH_SIZE = 1000
+
+# Times a safe request is sent, to measure its memory once and its time
+# in the fastest of the other runs
+REPEAT = 3
+
+BASELINE = os.path.join(os.path.dirname(__file__), "benchmarks.json")
+
+PASSWORD = "benchmark"
+
+
+class BenchmarkError(Exception):
+    pass
+
+
+def seed(size, username="benchmark"):
+    """
+    Create a user with ``size`` courses, notes, files and reminders, return
+    the ids the benchmark requests need.
+    """
+    # Staff can read the timings
+    user = User.objects.create_user(
+        username=username, email=f"{username}@example.com", password=PASSWORD, is_staff=True
+    )
+    Course.objects.bulk_create(
+        [
+            Course(user=user, title=f"Course {i}", provider="Benchmark University")
+            for i in range(size)
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    courses = list(user.courses.order_by("id").values_list("id", flat=True))
+    hot = courses[:HOT_COURSES]
+
+    Note.objects.bulk_create(
+        [
+            Note(
+                course_id=hot[i % len(hot)],
+                title=f"Note {i}",
+                content=f"Lecture {i} about ciphers, hashing and signatures",
+            )
+            for i in range(size)
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    File.objects.bulk_create(
+        [
+            File(course_id=hot[i % len(hot)], name=f"Slides {i}", file=f"slides-{i}.pdf")
+            for i in range(size)
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    now = timezone.now()
+    Reminder.objects.bulk_create(
+        [
+            Reminder(user=user, name=f"Reminder {i}", time=now + timedelta(hours=i))
+            for i in range(size)
+        ],
+        batch_size=BATCH_SIZE,
+    )
+
+    # bulk_create sends no signals
+    search.get_backend().rebuild()
+
+    course = hot[0]
+    return {
+        "user": user,
+        "course": course,
+        "notes": list(
+            Note.objects.filter(course_id=course).order_by("id").values_list("id", flat=True)[:50]
+        ),
+        "file": File.objects.filter(course_id=course).order_by("id").values_list("id", flat=True)[0],
+        "reminders": list(
+            Reminder.objects.filter(user=user).order_by("id").values_list("id", flat=True)[:50]
+        ),
+    }
+
+
+def url_names():
+    return {pattern.name for pattern in urlpatterns}
+
+
+def requests(ids):
+    """
+    Yield ``(key, method, path, kwargs, safe)`` for a request to every URL,
+    and receive its response. Pages are read first, then data is changed
+    and deleted, and the session ends with a logout.
+    """
+    course = ids["course"]
+    note = ids["notes"][0]
+    reminder = ids["reminders"][0]
+
+    def get(name, *args, **params):
+        return f"GET {name}", "GET", reverse(name, args=args), {"data": params}, True
+
+    def post(name, *args, **kwargs):
+        return f"POST {name}", "POST", reverse(name, args=args), kwargs, False
+
+    def once(name, *args):
+        # GET requests changing data, sent only once
+        return f"GET {name}", "GET", reverse(name, args=args), {}, False
+
+    yield get("login")
+    yield get("register")
+    yield get("index")
+    yield get("courses")
+    yield get("course", course)
+    yield get("notes", course)
+    yield get("note", course, note)
+    yield get("files", course)
+    yield get("file", course, ids["file"])
+    yield get("reminders")
+    yield get("reminder", reminder)
+    yield get("search", q="cipher")
+    yield get("perfstats")
+    yield get("data_export")
+    for name in ["api_notes", "api_files", "api_instructors", "api_links"]:
+        yield get(name, course)
+    yield get("api_courses")
+    yield get("api_reminders")
+
+    yield post("course_new", data={"title": "Cryptography"})
+    yield post("course_edit", course, data={"title": "Information Security"})
+    yield post("note_new", course, data={"title": "Ciphers", "content": "Stream ciphers"})
+    yield post("note_edit", course, note, data={"title": "Ciphers", "content": "Block ciphers"})
+    yield post("notes_batch", course, content_type="application/json", data=json.dumps(
+        [{"op": "update", "id": i, "data": {"content": "Updated offline"}} for i in ids["notes"]]
+        + [{"op": "create", "data": {"title": "Offline", "content": "Written offline"}}]
+    ))
+    yield post("link_new", course, data={"name": "Syllabus", "url": "https://example.com"})
+    yield post("instructor_new", course, data={
+        "title": "PR", "first_name": "Ada", "last_name": "Lovelace", "email": f"ada-{course}@example.com",
+    })
+    yield post("reminder_new", data={"name": "Exam", "time": "2030-03-04T10:00"})
+    yield post("reminder_edit", reminder, data={"name": "Exam", "time": "2030-03-05T10:00"})
+    yield post("reminders_batch", content_type="application/json", data=json.dumps(
+        [{"op": "update", "id": i, "data": {"name": "Updated offline"}} for i in ids["reminders"]]
+    ))
+    yield "POST data_import", "POST", reverse("data_import") + "?format=jsonl", {
+        "content_type": "application/x-ndjson",
+        "data": "\n".join(
+            json.dumps({"type": "course", "title": f"Imported {i}"}) for i in range(50)
+        ),
+    }, False
+
+    response = yield post("file_new", course, data={
+        "name": "Slides", "category": "SL",
+        "file": SimpleUploadedFile("slides.pdf", b"%PDF" * 1024),
+    })
+    uploaded = response.json()["id"]
+    yield post("file_edit", course, uploaded, data={"name": "Lecture slides", "category": "SL"})
+    yield get("file_download", course, uploaded)
+
+    response = yield post("upload_new", course, data={
+        "name": "Lecture", "category": "SL", "filename": "lecture.mp4",
+        "size": MIN_CHUNK_SIZE, "chunk_size": MIN_CHUNK_SIZE,
+    })
+    upload = response.json()["id"]
+    yield get("upload", course, upload)
+    chunk = b"\0" * MIN_CHUNK_SIZE
+    yield "PUT upload_chunk", "PUT", reverse("upload_chunk", args=[course, upload, 0]), {
+        "data": chunk, "content_type": "application/octet-stream",
+        "HTTP_X_CHUNK_SHA256": hashlib.sha256(chunk).hexdigest(),
+    }, False
+    yield post("upload_finalize", course, upload)
+
+    yield once("note_delete", course, note)
+    yield once("file_delete", course, uploaded)
+    yield once("reminder_delete", reminder)
+    # Deletes every note and file of the course
+    yield once("course_delete", course)
+    yield once("logout")
+
+
+class QueryCounter:
+    """
+    Database execute wrapper counting the queries, unlike the query log
+    it is not capped. Savepoints are not counted, the test cases run in
+    a transaction where atomic blocks create them.
+    """
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        if not sql.startswith(("SAVEPOINT", "RELEASE SAVEPOINT", "ROLLBACK TO SAVEPOINT")):
+            self.count += 1
+        return execute(sql, params, many, context)
+
+
+def measure(client, method, path, kwargs, trace=True):
+    """
+    Send a request, return its response, the number of queries, the
+    seconds it took and, when ``trace`` is set, the peak of memory
+    allocated while it ran. The cache is cleared first so every request
+    pays its full cost.
+    """
+    cache.clear()
+    queries = QueryCounter()
+    if trace:
+        tracemalloc.start()
+    try:
+        with connection.execute_wrapper(queries):
+            started = time.perf_counter()
+            response = getattr(client, method.lower())(path, **kwargs)
+            if response.streaming:
+                for chunk in response.streaming_content:
+                    pass
+            elapsed = time.perf_counter() - started
+        memory = tracemalloc.get_traced_memory()[1] if trace else None
+    finally:
+        tracemalloc.stop()
+    response.close()
+    return response, {"queries": queries.count, "time": round(elapsed, 4), "memory": memory}
+
+
+def run(client, ids, repeat=REPEAT):
+    """
+    Send every request of the benchmark as the seeded user, return the
+    measures by request. Safe requests are sent ``repeat`` times: the
+    first run traces the memory, which slows it down, and the fastest of
+    the others is kept.
+    """
+    client.force_login(ids["user"])
+    results = {}
+    steps = requests(ids)
+    step = next(steps)
+    while True:
+        key, method, path, kwargs, safe = step
+        response, result = measure(client, method, path, kwargs)
+        if response.status_code >= 400:
+            raise BenchmarkError(f"{key} returned {response.status_code}")
+        if safe:
+            result["time"] = min(
+                measure(client, method, path, kwargs, trace=False)[1]["time"]
+                for _ in range(max(repeat - 1, 1))
+            )
+        results[key] = result
+        try:
+            step = steps.send(response)
+        except StopIteration:
+            return results
+
+
+def compare(results, baseline, time_factor=2.0, memory_factor=1.5):
+    """
+    Return the budgets of ``baseline`` that ``results`` exceed. Query
+    counts must not grow at all. Time and memory may grow by their factor
+    plus a small allowance, as they vary between runs and machines.
+    """
+    failures = []
+    for key, result in sorted(results.items()):
+        budget = baseline.get(key)
+        if budget is None:
+            failures.append(f"{key}: no baseline")
+            continue
+        if result["queries"] > budget["queries"]:
+            failures.append(f"{key}: {result['queries']} queries, budget {budget['queries']}")
+        if time_factor and result["time"] > budget["time"] * time_factor + 0.005:
+            failures.append(
+                f"{key}: {result['time'] * 1000:.1f} ms, budget {budget['time'] * 1000:.1f} ms"
+            )
+        if memory_factor and result["memory"] > budget["memory"] * memory_factor + 65536:
+            failures.append(
+                f"{key}: {result['memory'] // 1024} KiB, budget {budget['memory'] // 1024} KiB"
+            )
+    return failures
+
+
+def load_baseline(path=BASELINE):
+    with open(path) as f:
+        return json.load(f)
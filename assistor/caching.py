@@ -0,0 +1,82 @@
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import InvalidCacheBackendError, cache, caches
+from django.core.cache.utils import make_template_fragment_key
+
+# Seconds a cached fragment is kept. Fragments are invalidated by bumping
+# the version of the data they show, the timeout only frees memory.
+TIMEOUT = getattr(settings, "ASSISTOR_CACHE_TIMEOUT", 60 * 60 * 24)
+
+
+def version_key(name, object_id):
+    return f"assistor:{name}-version:{object_id}"
+
+
+def get_version(name, object_id):
+    """Return the current version of the ``name`` data of a user or course"""
+    key = version_key(name, object_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid4().hex, None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(name, object_id):
+    """Give the ``name`` data of a user or course a new version"""
+    cache.set(version_key(name, object_id), uuid4().hex, None)
+
+
+def courses_version(user_id):
+    return get_version("courses", user_id)
+
+
+def reminders_version(user_id):
+    return get_version("reminders", user_id)
+
+
+def course_version(course_id):
+    return get_version("course", course_id)
+
+
+def invalidate_courses(user_id):
+    """
+    Drop the cached course lists of a user. Signals call it on save and
+    delete, code using bulk operations has to call it itself.
+    """
+    bump_version("courses", user_id)
+
+
+def invalidate_reminders(user_id):
+    """
+    Drop the cached reminder lists of a user. Signals call it on save and
+    delete, code using bulk operations has to call it itself.
+    """
+    bump_version("reminders", user_id)
+
+
+def invalidate_course(course_id):
+    """
+    Give a course and its notes, files, instructors and links a new
+    version. Signals call it on save and delete, code using bulk
+    operations has to call it itself.
+    """
+    bump_version("course", course_id)
+
+
+def fragment_cache():
+    # The cache the {% cache %} tag uses
+    try:
+        return caches["template_fragments"]
+    except InvalidCacheBackendError:
+        return caches["default"]
+
+
+def cached_fragments(*fragments):
+    """
+    Return the names of the ``(name, vary_on)`` template fragments that
+    are cached, so a view can skip reading the rows they show.
+    """
+    keys = {make_template_fragment_key(name, vary_on): name for name, vary_on in fragments}
+    return {keys[key] for key in fragment_cache().get_many(list(keys))}
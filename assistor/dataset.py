@@ -0,0 +1,285 @@
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Max
+
+from . import caching, search
+from .forms import CourseForm, InstructorForm, LinkForm, NoteForm, ReminderForm
+from .models import Course, File, Instructor, Link, Note, Reminder
+
+# Records validated and inserted in one transaction
+BATCH_SIZE = 500
+
+FORMATS = {
+    "csv": "text/csv",
+    "jsonl": "application/x-ndjson",
+}
+
+# Fields of each type of record, in the order they are exported
+FIELDS = {
+    "course": ["title", "start_date", "completion_date", "grade", "provider"],
+    "instructor": ["title", "first_name", "last_name", "email"],
+    "link": ["name", "url"],
+    "note": ["title", "content"],
+    "file": ["name", "category"],
+    "reminder": ["name", "time"],
+}
+COLUMNS = ["type"] + list(dict.fromkeys(f for fields in FIELDS.values() for f in fields))
+
+FORMS = {
+    "course": CourseForm,
+    "instructor": InstructorForm,
+    "link": LinkForm,
+    "note": NoteForm,
+    "reminder": ReminderForm,
+}
+
+# Types of records belonging to the course above them
+COURSE_ROWS = {"instructor": Instructor, "link": Link, "note": Note, "file": File}
+
+# Errors reported in detail, the rest are only counted
+MAX_ERRORS = 100
+
+
+class DatasetError(Exception):
+    pass
+
+
+def read_records(lines, format):
+    """
+    Yield the line number and the fields of every record of a CSV or JSON
+    lines stream, one line at a time.
+    """
+    if format == "csv":
+        reader = csv.DictReader(lines)
+        for record in reader:
+            yield reader.line_num, record
+    elif format == "jsonl":
+        for number, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                raise DatasetError(f"Line {number} is not valid JSON.")
+            if not isinstance(record, dict):
+                raise DatasetError(f"Line {number} is not a JSON object.")
+            yield number, record
+    else:
+        raise DatasetError(f"Unknown format {format!r}.")
+
+
+class Importer:
+    """
+    Import records of a user. Every instructor, link and note belongs to
+    the course above it, reminders belong to the user. File records carry
+    no content, they are counted as skipped.
+
+    Records are validated with the forms the views use and inserted in
+    transactional batches of about ``batch_size`` records. A batch the
+    database rejects is rolled back and reported, the others are kept.
+    """
+
+    def __init__(self, user, batch_size=BATCH_SIZE):
+        self.user = user
+        self.batch_size = batch_size
+        self.created = dict.fromkeys(FORMS, 0)
+        self.errors = []
+        self.error_count = 0
+        self.skipped = 0
+
+        # Emails must be unique across instructors, check the batch too
+        self.emails = set()
+
+    def error(self, line, errors):
+        self.error_count += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append({"line": line, "errors": errors})
+
+    def build(self, line, kind, record, course):
+        """Return the instance for a record, or None when it is invalid"""
+        if kind == "file":
+            # Exports list the files, their content is uploaded separately
+            self.skipped += 1
+            return None
+        if kind not in FORMS:
+            self.error(line, {"type": [f"Unknown type {kind!r}."]})
+            return None
+        if kind in COURSE_ROWS and course is None:
+            self.error(line, {"type": ["No valid course above this record."]})
+            return None
+
+        if kind == "course":
+            instance = Course(user=self.user)
+        elif kind == "reminder":
+            instance = Reminder(user=self.user)
+        else:
+            instance = COURSE_ROWS[kind](course=course)
+
+        data = {
+            field: "" if record.get(field) is None else record[field]
+            for field in FIELDS[kind]
+        }
+        form = FORMS[kind](data, instance=instance)
+        if not form.is_valid():
+            self.error(line, form.errors.get_json_data())
+            return None
+
+        if kind == "instructor" and instance.email:
+            if instance.email in self.emails:
+                self.error(line, {"email": ["Instructor with this Email already exists."]})
+                return None
+            self.emails.add(instance.email)
+        return instance
+
+    def flush(self, batch):
+        """Insert a batch, return whether it was inserted"""
+        if not batch:
+            return True
+        try:
+            with transaction.atomic():
+                self.insert([instance for line, instance in batch])
+        except DatabaseError as error:
+            self.error(batch[0][0], {"__all__": [
+                f"Lines {batch[0][0]} to {batch[-1][0]} were not imported: {error}"
+            ]})
+            return False
+        for line, instance in batch:
+            self.created[instance._meta.model_name] += 1
+        return True
+
+    def insert(self, instances):
+        courses = [i for i in instances if isinstance(i, Course)]
+        if connection.features.can_return_rows_from_bulk_insert:
+            Course.objects.bulk_create(courses)
+        else:
+            # The rows below need the ids of their courses
+            for course in courses:
+                course.save()
+
+        rows = {}
+        for instance in instances:
+            if isinstance(instance, Course):
+                continue
+            if not isinstance(instance, Reminder):
+                instance.course_id = instance.course.id
+            rows.setdefault(type(instance), []).append(instance)
+
+        # bulk_create sends no signals and may not return the ids, index
+        # the rows added after the last existing one
+        backend = search.get_backend()
+        backend.index_queryset(Course.objects.filter(id__in=[c.id for c in courses]))
+        for model, objects in rows.items():
+            last = model.objects.aggregate(last=Max("id"))["last"] or 0
+            model.objects.bulk_create(objects)
+            if model in (Note, Link):
+                backend.index_queryset(
+                    model.objects.filter(id__gt=last, course__user=self.user)
+                )
+
+        # Count the children again, their courses may have some from an
+        # earlier batch
+        course_ids = {i.course_id for i in instances if not isinstance(i, (Course, Reminder))}
+        Course.objects.filter(id__in=course_ids).rebuild_counters()
+
+    def run(self, records):
+        """Import the records, return what was created and the errors"""
+        batch = []
+        course = None
+        for line, record in records:
+            if len(batch) >= self.batch_size:
+                inserted = self.flush(batch)
+                # The rows of a course rolled back cannot be inserted
+                if not inserted and any(item is course for _, item in batch):
+                    course = None
+                batch = []
+
+            kind = str(record.get("type") or "").strip().lower()
+            instance = self.build(line, kind, record, course)
+            if kind == "course":
+                course = instance
+            if instance is not None:
+                batch.append((line, instance))
+        self.flush(batch)
+
+        caching.invalidate_courses(self.user.id)
+        caching.invalidate_reminders(self.user.id)
+        return {
+            "created": self.created,
+            "skipped": self.skipped,
+            "error_count": self.error_count,
+            "errors": self.errors,
+        }
+
+
+def merge_rows(queryset):
+    """Return an iterator of the rows of ``queryset`` and the next row"""
+    rows = queryset.iterator()
+    return [rows, next(rows, None)]
+
+
+def export_records(user):
+    """
+    Yield the records of a user's data set: every course followed by its
+    instructors, links, notes and files, then the reminders. One query
+    per type is streamed with iterator() and merged on the course, so
+    memory stays flat however much is exported.
+    """
+    courses = (
+        Course.objects.filter(user=user)
+        .order_by("id")
+        .values("id", *FIELDS["course"])
+        .iterator()
+    )
+    children = {
+        kind: merge_rows(
+            # Rows of deleted courses would stop the merge
+            model.objects.filter(course__user=user, course__deleted_time__isnull=True)
+            .order_by("course_id", "id")
+            .values("course_id", *FIELDS[kind])
+        )
+        for kind, model in COURSE_ROWS.items()
+    }
+
+    for course in courses:
+        course_id = course.pop("id")
+        yield {"type": "course", **course}
+        for kind, state in children.items():
+            rows, row = state
+            while row is not None and row["course_id"] == course_id:
+                row.pop("course_id")
+                yield {"type": kind, **row}
+                row = next(rows, None)
+            state[1] = row
+
+    reminders = (
+        Reminder.objects.filter(user=user)
+        .order_by("time", "id")
+        .values(*FIELDS["reminder"])
+        .iterator()
+    )
+    for reminder in reminders:
+        yield {"type": "reminder", **reminder}
+
+
+class Echo:
+    """File-like object returning what is written, for csv.writer"""
+
+    def write(self, value):
+        return value
+
+
+def write_records(records, format):
+    """Yield the lines of records in CSV or JSON lines"""
+    if format == "csv":
+        writer = csv.DictWriter(Echo(), fieldnames=COLUMNS)
+        yield writer.writeheader()
+        for record in records:
+            yield writer.writerow(record)
+    elif format == "jsonl":
+        for record in records:
+            yield json.dumps(record, cls=DjangoJSONEncoder) + "\n"
+    else:
+        raise DatasetError(f"Unknown format {format!r}.")
@@ -0,0 +1,149 @@
+import hashlib
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+
+# Bytes read from disk at a time while streaming
+CHUNK_SIZE = 64 * 1024
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class RangeFile:
+    """File-like object reading ``length`` bytes of a file from ``start``"""
+
+    def __init__(self, handle, start, length):
+        self.handle = handle
+        self.remaining = length
+        self.handle.seek(start)
+
+    def read(self, size=CHUNK_SIZE):
+        if self.remaining <= 0:
+            return b""
+        data = self.handle.read(min(size, self.remaining))
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.handle.close()
+
+
+def parse_range(header, size):
+    """
+    Return the first and last byte of a single byte range, or None when
+    the header is missing or not understood and the whole file is sent.
+    Raise ValueError when the range cannot be satisfied.
+    """
+    match = RANGE_RE.match(header or "")
+    if not match or match.groups() == ("", ""):
+        return None
+    if size == 0:
+        raise ValueError("Empty file")
+    first, last = match.groups()
+
+    # Suffix range, the last bytes of the file
+    if not first:
+        length = int(last)
+        if length == 0:
+            raise ValueError("Empty suffix range")
+        return max(size - length, 0), size - 1
+
+    first = int(first)
+    last = int(last) if last else size - 1
+    if first > last or first >= size:
+        raise ValueError("Range not satisfiable")
+    return first, min(last, size - 1)
+
+
+def content_disposition(filename):
+    try:
+        filename.encode("ascii")
+        escaped = filename.replace("\\", "\\\\").replace('"', r"\"")
+        return 'inline; filename="%s"' % escaped
+    except UnicodeEncodeError:
+        return "inline; filename*=utf-8''%s" % quote(filename)
+
+
+def sendfile_response(field_file, filename):
+    """Let the web server send the file, named by ``ASSISTOR_SENDFILE``"""
+    header = settings.ASSISTOR_SENDFILE
+    response = HttpResponse()
+    if header == "X-Accel-Redirect":
+        # nginx decodes the URI, names may hold spaces and other characters
+        response[header] = settings.ASSISTOR_SENDFILE_URL + quote(field_file.name)
+    else:
+        response[header] = field_file.path
+
+    # Let the web server pick the content type
+    del response["Content-Type"]
+    response["Content-Disposition"] = content_disposition(filename)
+    return response
+
+
+def serve_file(request, field_file, filename=None):
+    """
+    Stream a stored file, named ``filename`` for the browser. Supports a
+    single byte range, conditional GET with ETag and Last-Modified, and
+    sending through the web server with X-Sendfile or X-Accel-Redirect.
+    The file is never read into memory.
+    """
+    storage = field_file.storage
+    name = field_file.name
+    if not name or not storage.exists(name):
+        raise Http404("File not found")
+
+    size = storage.size(name)
+    last_modified = int(storage.get_modified_time(name).timestamp())
+    version = f"{name}:{size}:{last_modified}".encode()
+    etag = quote_etag(hashlib.md5(version).hexdigest())
+    filename = filename or os.path.basename(name)
+
+    def add_validators(response):
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(last_modified)
+        response["Accept-Ranges"] = "bytes"
+        return response
+
+    # Answer 304 or 412 before touching the file
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+    if response is not None:
+        return add_validators(response)
+
+    if getattr(settings, "ASSISTOR_SENDFILE", None):
+        return add_validators(sendfile_response(field_file, filename))
+
+    # A Range only applies while the If-Range validator still matches
+    header = request.META.get("HTTP_RANGE")
+    if_range = request.META.get("HTTP_IF_RANGE")
+    if if_range and if_range != etag and parse_http_date_safe(if_range) != last_modified:
+        header = None
+
+    try:
+        byte_range = parse_range(header, size)
+    except ValueError:
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{size}"
+        return add_validators(response)
+
+    handle = storage.open(name, "rb")
+    if byte_range is None:
+        response = FileResponse(handle, filename=filename)
+        response["Content-Length"] = size
+    else:
+        first, last = byte_range
+        length = last - first + 1
+        response = FileResponse(
+            RangeFile(handle, first, length), filename=filename, status=206
+        )
+        response["Content-Length"] = length
+        response["Content-Range"] = f"bytes {first}-{last}/{size}"
+    response.block_size = CHUNK_SIZE
+    response["Content-Disposition"] = content_disposition(filename)
+    return add_validators(response)
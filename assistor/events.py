@@ -0,0 +1,254 @@
+import asyncio
+import json
+import threading
+from collections import defaultdict
+from datetime import timedelta
+from importlib import import_module
+from types import SimpleNamespace
+
+from django.conf import settings
+from django.contrib import auth
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.http import parse_cookie
+from django.utils import timezone
+
+from .asyncviews import query
+from .models import Reminder
+
+# Path of the stream, served in front of Django by the ASGI application
+PATH = "/reminders/events"
+
+# Events kept for a slow client before its stream is closed, it then
+# reconnects and reloads
+QUEUE_SIZE = 100
+
+# Seconds between the comments keeping idle connections open through
+# proxies
+HEARTBEAT = getattr(settings, "ASSISTOR_EVENTS_HEARTBEAT", 15)
+
+# How often the next due reminder is read again, for the reminders saved
+# by other processes
+REFRESH = timedelta(minutes=5)
+
+
+class Subscription:
+    """The queue of events of a stream, filled from any thread"""
+
+    def __init__(self, loop, maxsize=QUEUE_SIZE):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize)
+        self.overflowed = False
+
+    def put(self, event):
+        # Runs in the event loop of the stream
+        if self.queue.full():
+            self.overflowed = True
+        else:
+            self.queue.put_nowait(event)
+
+
+class Broker:
+    """
+    Publish and subscribe to the events of a user in this process.
+
+    An idle subscriber is a queue waited on by its stream, it costs no
+    thread. Events saved by another process are not seen, the due events
+    are read from the database so they are.
+    """
+
+    def __init__(self):
+        self.subscriptions = defaultdict(set)
+        self.lock = threading.Lock()
+
+    def subscribe(self, user_id):
+        subscription = Subscription(asyncio.get_running_loop())
+        with self.lock:
+            self.subscriptions[user_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, user_id, subscription):
+        with self.lock:
+            subscriptions = self.subscriptions.get(user_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self.subscriptions[user_id]
+
+    def publish(self, user_id, kind, data):
+        """Send an event to the streams of a user, from any thread"""
+        with self.lock:
+            subscriptions = list(self.subscriptions.get(user_id, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.put, (kind, data))
+            except RuntimeError:
+                # The loop of the stream is closed
+                self.unsubscribe(user_id, subscription)
+
+
+broker = Broker()
+
+
+def publish_reminders(user_id, kind, reminders):
+    """
+    Send an event for each of ``reminders`` once the transaction commits,
+    so streams never show a change that is rolled back.
+    """
+    events = [reminder.serialize() for reminder in reminders]
+    transaction.on_commit(
+        lambda: [broker.publish(user_id, kind, data) for data in events]
+    )
+
+
+def format_event(kind, data):
+    return f"event: {kind}\ndata: {json.dumps(data, cls=DjangoJSONEncoder)}\n\n".encode()
+
+
+def session_user_id(scope):
+    """Return the id of the user signed in with the session cookie, or None"""
+    cookies = {}
+    for name, value in scope.get("headers", []):
+        if name == b"cookie":
+            cookies.update(parse_cookie(value.decode("latin1")))
+    session_key = cookies.get(settings.SESSION_COOKIE_NAME)
+    if not session_key:
+        return None
+    store = import_module(settings.SESSION_ENGINE).SessionStore(session_key)
+    user = auth.get_user(SimpleNamespace(session=store))
+    return user.id if user.is_authenticated else None
+
+
+def next_due(user_id, after):
+    """Return the time of the first reminder of the user due after ``after``"""
+    return (
+        Reminder.objects.filter(user_id=user_id, time__gt=after)
+        .order_by("time", "id")
+        .values_list("time", flat=True)
+        .first()
+    )
+
+
+def due_between(user_id, start, end):
+    return [
+        reminder.serialize()
+        for reminder in Reminder.objects.filter(user_id=user_id, time__gt=start, time__lte=end)
+    ]
+
+
+class ReminderEvents:
+    """
+    ASGI application streaming the reminder events of the signed-in user
+    as server-sent events: ``created``, ``updated`` and ``deleted`` when a
+    reminder is saved or deleted in this process and ``due`` when the
+    time of one is reached. The data of each is the serialized reminder.
+
+    Django 3.2 iterates streaming responses synchronously, so the stream
+    is served here rather than by a view. It waits on its queue with a
+    timer for the next due reminder, an idle stream costs no thread and
+    no query.
+    """
+
+    def __init__(self, broker=broker, heartbeat=HEARTBEAT, refresh=REFRESH, clock=timezone.now):
+        self.broker = broker
+        self.heartbeat = heartbeat
+        self.refresh = refresh
+        self.clock = clock
+
+    async def __call__(self, scope, receive, send):
+        if scope["method"] != "GET":
+            return await self.respond(send, 405, b"Method Not Allowed")
+        user_id = await query(lambda: session_user_id(scope))
+        if user_id is None:
+            return await self.respond(send, 403, b"Forbidden")
+
+        subscription = self.broker.subscribe(user_id)
+        disconnect = asyncio.ensure_future(self.wait_disconnect(receive))
+        try:
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": 200,
+                    "headers": [
+                        (b"content-type", b"text/event-stream"),
+                        (b"cache-control", b"no-cache"),
+                        # Stop nginx buffering the stream
+                        (b"x-accel-buffering", b"no"),
+                    ],
+                }
+            )
+            await self.stream(user_id, subscription, disconnect, send)
+        finally:
+            disconnect.cancel()
+            self.broker.unsubscribe(user_id, subscription)
+
+    async def stream(self, user_id, subscription, disconnect, send):
+        since = self.clock()
+        due = await query(lambda: next_due(user_id, since))
+        refresh_at = since + self.refresh
+        sent_at = since
+        while not subscription.overflowed:
+            now = self.clock()
+            timeout = self.heartbeat - (now - sent_at).total_seconds()
+            if due is not None:
+                timeout = min(timeout, (due - now).total_seconds())
+            get = asyncio.ensure_future(subscription.queue.get())
+            done, _ = await asyncio.wait(
+                {get, disconnect}, timeout=max(timeout, 0), return_when=asyncio.FIRST_COMPLETED
+            )
+            if disconnect in done:
+                get.cancel()
+                return
+
+            chunks = []
+            if get in done:
+                chunks.append(format_event(*get.result()))
+            else:
+                get.cancel()
+
+            now = self.clock()
+            if due is not None and due <= now:
+                reminders = await query(lambda: due_between(user_id, since, now))
+                chunks += [format_event("due", data) for data in reminders]
+                since = now
+            if chunks or now >= refresh_at:
+                due = await query(lambda: next_due(user_id, since))
+                refresh_at = now + self.refresh
+            if not chunks and (now - sent_at).total_seconds() >= self.heartbeat:
+                chunks.append(b": keepalive\n\n")
+
+            if chunks:
+                await send(
+                    {"type": "http.response.body", "body": b"".join(chunks), "more_body": True}
+                )
+                sent_at = now
+
+        # Too many events were missed, the client reconnects
+        await send({"type": "http.response.body", "body": b""})
+
+    async def wait_disconnect(self, receive):
+        while (await receive())["type"] != "http.disconnect":
+            pass
+
+    async def respond(self, send, status, body):
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": [(b"content-type", b"text/plain")],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+
+class EventsRouter:
+    """ASGI application sending ``PATH`` to the events, the rest to Django"""
+
+    def __init__(self, application, events=None):
+        self.application = application
+        self.events = events or ReminderEvents()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] == PATH:
+            return await self.events(scope, receive, send)
+        return await self.application(scope, receive, send)
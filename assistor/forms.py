@@ -1,7 +1,10 @@
 from django import forms
 from django.forms import EmailInput, PasswordInput, TextInput, DateInput
 from django.forms.utils import ErrorList
+from django.utils.safestring import mark_safe
+from django.utils.translation import get_language
 from .models import Course, File, Note, Reminder, User, Link, Instructor
+from .uploads import MAX_CHUNK_SIZE, MIN_CHUNK_SIZE
 
 # Custom Error List
 class CustomErrorList(ErrorList):
@@ -85,6 +88,25 @@ class FileForm(forms.ModelForm):
         self.error_class = CustomErrorList
 
 
+class UploadForm(forms.ModelForm):
+    # Name of the uploaded file
+    filename = forms.CharField(max_length=255, required=True)
+
+    # Size of the whole file in bytes
+    size = forms.IntegerField(min_value=1, required=True)
+
+    # Size of the chunks the file is sent in
+    chunk_size = forms.IntegerField(min_value=MIN_CHUNK_SIZE, max_value=MAX_CHUNK_SIZE, required=False)
+
+    class Meta:
+        model = File
+        fields = ["name", "category"]
+
+    def __init__(self, *args, **kwargs):
+        super(UploadForm, self).__init__(*args, **kwargs)
+        self.error_class = CustomErrorList
+
+
 class LinkForm(forms.ModelForm):
     class Meta:
         model = Link
@@ -127,4 +149,53 @@ class ReminderForm(forms.ModelForm):
     
     def __init__(self, *args, **kwargs):
         super(ReminderForm, self).__init__(*args, **kwargs)
-        self.error_class = CustomErrorList
\ No newline at end of file
+        self.error_class = CustomErrorList
+
+class RenderedField:
+    """Markup and label of a field of an unbound form"""
+    def __init__(self, field):
+        self.html = mark_safe(str(field))
+        self.id_for_label = field.id_for_label
+        self.label = field.label
+        self.help_text = field.help_text
+
+    def __str__(self):
+        return self.html
+
+    def __html__(self):
+        return self.html
+
+class RenderedForm:
+    """
+    Unbound form rendered once, with the attributes the templates read:
+    ``form.<field>`` with its label and help text, and empty ``errors``.
+    It holds no request data, so it is shared by every request.
+    """
+    errors = ""
+
+    def __init__(self, form):
+        self.fields = {name: RenderedField(form[name]) for name in form.fields}
+
+    def __getitem__(self, name):
+        return self.fields[name]
+
+    def __getattr__(self, name):
+        try:
+            return self.__dict__["fields"][name]
+        except KeyError:
+            raise AttributeError(name)
+
+# Rendered forms by class and language
+rendered_forms = {}
+
+def empty_form(form_class):
+    """
+    Return the unbound ``form_class`` for a template, rendered on first
+    use. Pages draw the same empty forms in their modals on every request,
+    this saves building the form and rendering its widgets each time.
+    """
+    key = (form_class, get_language())
+    form = rendered_forms.get(key)
+    if form is None:
+        form = rendered_forms[key] = RenderedForm(form_class())
+    return form
@@ -0,0 +1,146 @@
+import http.client
+import json
+import re
+import threading
+import time
+from http.cookies import SimpleCookie
+from urllib.parse import urlencode, urlsplit
+
+from .stress import percentile
+
+CSRF_RE = re.compile(r'name="csrfmiddlewaretoken" value="([^"]+)"')
+
+
+class LoadTestError(Exception):
+    pass
+
+
+class Client:
+    """A keep-alive HTTP connection to the server, keeping its cookies"""
+
+    def __init__(self, url, cookies=None):
+        parts = urlsplit(url)
+        connection_class = (
+            http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+        )
+        self.connection = connection_class(parts.hostname, parts.port, timeout=30)
+        self.cookies = SimpleCookie(cookies or "")
+
+    def request(self, method, path, body=None, headers=None):
+        headers = dict(headers or {})
+        if self.cookies:
+            headers["Cookie"] = "; ".join(f"{k}={m.value}" for k, m in self.cookies.items())
+        try:
+            self.connection.request(method, path, body, headers)
+            response = self.connection.getresponse()
+            content = response.read()
+        except (OSError, http.client.HTTPException):
+            # Reconnect on the next request
+            self.connection.close()
+            raise
+        for header in response.headers.get_all("Set-Cookie") or []:
+            self.cookies.load(header)
+        return response.status, content
+
+    def close(self):
+        self.connection.close()
+
+
+def login(url, username, password):
+    """Sign in and return the cookies of the session"""
+    client = Client(url)
+    try:
+        status, content = client.request("GET", "/login")
+        match = CSRF_RE.search(content.decode())
+        if status != 200 or not match:
+            raise LoadTestError(f"Could not read the login form of {url}")
+        body = urlencode(
+            {"username": username, "password": password, "csrfmiddlewaretoken": match.group(1)}
+        )
+        status, _ = client.request(
+            "POST",
+            "/login",
+            body,
+            {"Content-Type": "application/x-www-form-urlencoded", "Referer": url + "/login"},
+        )
+        if status != 302 or "sessionid" not in client.cookies:
+            raise LoadTestError(f"Could not sign in to {url} as {username}")
+        return client.cookies.output(attrs=[], header="", sep=";")
+    finally:
+        client.close()
+
+
+def default_paths(url, cookies):
+    """The read-heavy pages, for the first course of the user"""
+    client = Client(url, cookies)
+    try:
+        status, content = client.request("GET", "/courses?format=json")
+        results = json.loads(content)["results"] if status == 200 else []
+    finally:
+        client.close()
+    if not results:
+        raise LoadTestError("The user has no course, add some with the --seed option")
+    course = f"/courses/{results[0]['id']}"
+    return ["/", "/courses", course, f"{course}/notes", f"{course}/files", "/reminders"]
+
+
+def worker(url, cookies, paths, offset, deadline, results, barrier):
+    client = Client(url, cookies)
+    latencies = []
+    errors = 0
+    try:
+        barrier.wait()
+        i = offset
+        while time.perf_counter() < deadline[0]:
+            started = time.perf_counter()
+            try:
+                status, _ = client.request("GET", paths[i % len(paths)])
+            except (OSError, http.client.HTTPException):
+                errors += 1
+            else:
+                if status == 200:
+                    latencies.append(time.perf_counter() - started)
+                else:
+                    errors += 1
+            i += 1
+    finally:
+        client.close()
+    results.append((latencies, errors))
+
+
+def run(url, username, password, concurrency=20, seconds=10.0, paths=None):
+    """
+    Request ``paths`` in turn from ``concurrency`` clients, each on a
+    keep-alive connection, for ``seconds`` against the server at ``url``
+    signed in as ``username``. Return the number of pages served, the
+    pages per second, their median and 95th percentile in milliseconds
+    and the number of failed requests.
+    """
+    url = url.rstrip("/")
+    cookies = login(url, username, password)
+    paths = paths or default_paths(url, cookies)
+
+    results = []
+    deadline = [0]
+    barrier = threading.Barrier(concurrency + 1)
+    threads = [
+        threading.Thread(
+            target=worker, args=(url, cookies, paths, i, deadline, results, barrier)
+        )
+        for i in range(concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    deadline[0] = time.perf_counter() + seconds
+    barrier.wait()
+    for thread in threads:
+        thread.join()
+
+    latencies = sorted(latency for measures, _ in results for latency in measures)
+    return {
+        "count": len(latencies),
+        "per_second": round(len(latencies) / seconds, 1),
+        "p50": percentile(latencies, 0.5),
+        "p95": percentile(latencies, 0.95),
+        "errors": sum(errors for _, errors in results),
+    }
@@ -0,0 +1,66 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.template import Context, Engine
+
+from assistor.models import Course
+
+# The list of courses.html, with the card drawn by an include and by the
+# tag. The blank line stands for the {% url %} line so both render alike.
+INCLUDE = """{% for course in courses %}<div class="col-sm-3">
+{% url 'course' course.id as course_url %}
+{% include "assistor/snippets/card.html" with background_color="bg-light-purple" text_color="text-purple" title=course.title url=course_url %}
+</div>{% endfor %}"""
+
+TAG = """{% load cards %}{% for course in courses %}<div class="col-sm-3">
+
+{% card 'course' course.id background_color="bg-light-purple" text_color="text-purple" title=course.title %}
+</div>{% endfor %}"""
+
+
+class Command(BaseCommand):
+    help = (
+        "Time rendering a list of course cards with the card included, "
+        "without and with the cached template loader of the production "
+        "settings, and drawn by the card tag."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--courses", type=int, default=5000)
+        parser.add_argument("--repeat", type=int, default=10)
+
+    def handle(self, *args, **options):
+        default = Engine.get_default()
+        loader = "django.template.loaders.app_directories.Loader"
+        uncached = Engine(loaders=[loader], libraries=default.libraries, builtins=default.builtins)
+        cached = Engine(
+            loaders=[("django.template.loaders.cached.Loader", [loader])],
+            libraries=default.libraries,
+            builtins=default.builtins,
+        )
+        courses = [
+            Course(id=i, title=f"Course <{i}> & more") for i in range(1, options["courses"] + 1)
+        ]
+        context = {"courses": courses}
+
+        outputs = {}
+        runs = [
+            ("include, uncached loader", uncached, INCLUDE),
+            ("include", cached, INCLUDE),
+            ("card tag", cached, TAG),
+        ]
+        for name, engine, source in runs:
+            template = engine.from_string(source)
+            timings = []
+            for _ in range(options["repeat"]):
+                started = time.perf_counter()
+                outputs[name] = template.render(Context(context))
+                timings.append((time.perf_counter() - started) * 1000)
+            self.stdout.write(
+                f"{name:<25} {len(courses)} cards: median {statistics.median(timings):.1f} ms, "
+                f"min {min(timings):.1f} ms"
+            )
+
+        if outputs["include"] != outputs["card tag"]:
+            self.stderr.write("The card tag and the include render differently.")
@@ -0,0 +1,96 @@
+import itertools
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+
+from assistor.search import SQLiteSearchBackend
+
+
+def vocabulary(size, rng):
+    """Return ``size`` distinct made up words"""
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(letters) for _ in range(rng.randint(3, 10))))
+    words = sorted(words)
+    # Common words must not all start alike
+    rng.shuffle(words)
+    return words
+
+
+class Command(BaseCommand):
+    help = (
+        "Time searches on a generated corpus of notes in a scratch SQLite "
+        "database, with the index and query the SQLite backend uses."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--notes", type=int, default=1000000)
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--words", type=int, default=150, help="Words per note.")
+        parser.add_argument("--queries", type=int, default=500)
+        parser.add_argument("--budget", type=float, default=50.0, help="Milliseconds.")
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        backend = SQLiteSearchBackend()
+        words = vocabulary(20000, rng)
+        # Word frequencies follow Zipf's law like natural text
+        weights = list(itertools.accumulate(1 / rank for rank in range(1, len(words) + 1)))
+
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, "search.sqlite3")
+        connection = sqlite3.connect(path)
+        try:
+            connection.execute(backend.create_sql())
+            insert = backend.insert_sql().replace("%s", "?")
+
+            started = time.perf_counter()
+            batch = []
+            for note_id in range(1, options["notes"] + 1):
+                user_id = rng.randint(1, options["users"])
+                title = " ".join(rng.choices(words, cum_weights=weights, k=4))
+                body = " ".join(rng.choices(words, cum_weights=weights, k=options["words"]))
+                batch.append(backend.row("note", note_id, user_id, title, body))
+                if len(batch) == 10000:
+                    connection.executemany(insert, batch)
+                    batch = []
+            connection.executemany(insert, batch)
+            connection.execute(
+                f"INSERT INTO {backend.table} ({backend.table}) VALUES ('optimize')"
+            )
+            connection.commit()
+            self.stdout.write(
+                f"Indexed {options['notes']} notes in "
+                f"{time.perf_counter() - started:.1f} s."
+            )
+
+            search = backend.search_sql().replace("%s", "?")
+            timings = []
+            for _ in range(options["queries"]):
+                user_id = rng.randint(1, options["users"])
+                terms = rng.choices(words, cum_weights=weights, k=rng.randint(1, 3))
+                # Type ahead, the last word is usually incomplete
+                terms[-1] = terms[-1][: rng.randint(2, len(terms[-1]))]
+                started = time.perf_counter()
+                connection.execute(search, [backend.match(user_id, terms), 20]).fetchall()
+                timings.append((time.perf_counter() - started) * 1000)
+        finally:
+            connection.close()
+            os.remove(path)
+            os.rmdir(directory)
+
+        timings.sort()
+        p95 = timings[int(len(timings) * 0.95) - 1]
+        self.stdout.write(
+            f"{len(timings)} queries: median {statistics.median(timings):.2f} ms, "
+            f"p95 {p95:.2f} ms, max {timings[-1]:.2f} ms."
+        )
+        if p95 > options["budget"]:
+            self.stderr.write(f"p95 is over the {options['budget']:.0f} ms budget.")
@@ -0,0 +1,89 @@
+import json
+import shutil
+import tempfile
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import (
+    override_settings,
+    setup_test_environment,
+    teardown_test_environment,
+)
+
+from assistor import benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        "Send a request to every view as users with 10, 1k and 50k courses, "
+        "notes, files and reminders in a scratch test database, and compare "
+        "the queries, time and peak memory of each with the baseline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes", nargs="+", choices=list(benchmarks.SIZES), default=list(benchmarks.SIZES)
+        )
+        parser.add_argument("--baseline", default=benchmarks.BASELINE)
+        parser.add_argument(
+            "--update", action="store_true", help="Write the results as the new baseline."
+        )
+        parser.add_argument("--time-factor", type=float, default=2.0)
+        parser.add_argument("--memory-factor", type=float, default=1.5)
+        parser.add_argument("--repeat", type=int, default=benchmarks.REPEAT)
+
+    def handle(self, *args, **options):
+        results = {}
+        media = tempfile.mkdtemp()
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False
+        )
+        try:
+            with override_settings(MEDIA_ROOT=media):
+                for size in options["sizes"]:
+                    ids = benchmarks.seed(benchmarks.SIZES[size], username=f"benchmark-{size}")
+                    results[size] = benchmarks.run(Client(), ids, options["repeat"])
+        except benchmarks.BenchmarkError as error:
+            raise CommandError(error)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+            shutil.rmtree(media)
+
+        for size, measures in results.items():
+            self.stdout.write(f"{size} ({benchmarks.SIZES[size]} rows of each type)")
+            for key, result in measures.items():
+                self.stdout.write(
+                    f"  {key:<24} {result['queries']:>4} queries "
+                    f"{result['time'] * 1000:>9.1f} ms {result['memory'] // 1024:>8} KiB"
+                )
+
+        try:
+            baseline = benchmarks.load_baseline(options["baseline"])
+        except FileNotFoundError:
+            baseline = {}
+
+        if options["update"]:
+            baseline.update(results)
+            with open(options["baseline"], "w") as f:
+                json.dump(baseline, f, indent=2, sort_keys=True)
+                f.write("\n")
+            self.stdout.write(f"Wrote the baseline to {options['baseline']}.")
+            return
+
+        failures = []
+        for size, measures in results.items():
+            failures += [
+                f"{size} {failure}"
+                for failure in benchmarks.compare(
+                    measures,
+                    baseline.get(size, {}),
+                    options["time_factor"],
+                    options["memory_factor"],
+                )
+            ]
+        if failures:
+            raise CommandError("Over budget:\n" + "\n".join(failures))
+        self.stdout.write("Every view is within its budget.")
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from assistor.dataset import FORMATS, export_records, write_records
+from assistor.models import User
+
+
+class Command(BaseCommand):
+    help = "Export the courses, instructors, links, notes, files and reminders of a user."
+
+    def add_arguments(self, parser):
+        parser.add_argument("username")
+        parser.add_argument("--format", choices=list(FORMATS), default="csv")
+        parser.add_argument("--output", help="File written, the standard output by default.")
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options["username"])
+        except User.DoesNotExist:
+            raise CommandError(f"No user named {options['username']!r}.")
+
+        lines = write_records(export_records(user), options["format"])
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8", newline="") as f:
+                f.writelines(lines)
+        else:
+            for line in lines:
+                self.stdout.write(line, ending="")
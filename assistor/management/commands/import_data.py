@@ -0,0 +1,44 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from assistor.dataset import BATCH_SIZE, FORMATS, DatasetError, Importer, read_records
+from assistor.models import User
+
+
+class Command(BaseCommand):
+    help = "Import courses, instructors, links, notes and reminders of a user from CSV or JSON lines."
+
+    def add_arguments(self, parser):
+        parser.add_argument("username")
+        parser.add_argument("path")
+        parser.add_argument(
+            "--format", choices=list(FORMATS),
+            help="Format of the file, guessed from its extension by default.",
+        )
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options["username"])
+        except User.DoesNotExist:
+            raise CommandError(f"No user named {options['username']!r}.")
+
+        format = options["format"] or os.path.splitext(options["path"])[1].lstrip(".")
+        if format not in FORMATS:
+            raise CommandError("Use --format to give the format of the file.")
+
+        importer = Importer(user, batch_size=options["batch_size"])
+        try:
+            with open(options["path"], encoding="utf-8-sig", newline="") as f:
+                summary = importer.run(read_records(f, format))
+        except DatasetError as error:
+            raise CommandError(str(error))
+
+        for error in summary["errors"]:
+            self.stderr.write(f"Line {error['line']}: {error['errors']}")
+        created = ", ".join(f"{count} {kind}s" for kind, count in summary["created"].items())
+        self.stdout.write(
+            f"Created {created}. {summary['error_count']} records were rejected, "
+            f"{summary['skipped']} files were skipped."
+        )
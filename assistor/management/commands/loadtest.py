@@ -0,0 +1,69 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from assistor import benchmarks, loadtest
+
+
+class Command(BaseCommand):
+    help = (
+        "Request the home, courses, course, notes, files and reminders pages "
+        "from running servers with concurrent clients and compare the pages "
+        "per second and latencies of each, for example a WSGI server, an "
+        "ASGI server and an ASGI server with ASSISTOR_ASYNC_VIEWS set."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--server",
+            action="append",
+            metavar="NAME=URL",
+            help="A server to test, like wsgi=http://127.0.0.1:8001. Repeat to compare.",
+        )
+        parser.add_argument("--username", default="loadtest")
+        parser.add_argument("--password", default=benchmarks.PASSWORD)
+        parser.add_argument(
+            "--seed",
+            type=int,
+            metavar="ROWS",
+            help="First add the user with ROWS courses, notes, files and reminders "
+            "to the database the servers use.",
+        )
+        parser.add_argument("--concurrency", type=int, default=20)
+        parser.add_argument("--seconds", type=float, default=10.0)
+        parser.add_argument(
+            "--path", action="append", help="A page to request instead of the defaults."
+        )
+
+    def handle(self, *args, **options):
+        servers = []
+        for server in options["server"] or ["server=http://127.0.0.1:8000"]:
+            name, _, url = server.rpartition("=")
+            servers.append((name or url, url))
+
+        if options["seed"]:
+            if options["password"] != benchmarks.PASSWORD:
+                raise CommandError(f"Seeded users have the password {benchmarks.PASSWORD!r}")
+            benchmarks.seed(options["seed"], username=options["username"])
+
+        first = None
+        for name, url in servers:
+            try:
+                result = loadtest.run(
+                    url,
+                    options["username"],
+                    options["password"],
+                    options["concurrency"],
+                    options["seconds"],
+                    options["path"],
+                )
+            except loadtest.LoadTestError as error:
+                raise CommandError(error)
+            except OSError as error:
+                raise CommandError(f"Could not reach {url}: {error}")
+
+            first = first or result
+            ratio = result["per_second"] / first["per_second"] if first["per_second"] else 0
+            self.stdout.write(
+                f"{name:<12} {result['per_second']:>9.1f}/s ({ratio:.2f}x) "
+                f"p50 {result['p50']} ms p95 {result['p95']} ms "
+                f"{result['errors']} errors"
+            )
@@ -0,0 +1,61 @@
+import json
+import sys
+
+from django.core.management.base import BaseCommand
+
+from assistor.timing import Histogram
+
+COLUMNS = ["count", "errors", "p50", "p95", "p99", "max", "mean_db", "mean_queries", "mean_template"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Summarize by view the request timings logged as JSON lines to the "
+        "assistor.timing logger, slowest views first."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("paths", nargs="*", help="Log files, the standard input by default.")
+        parser.add_argument(
+            "--sort", choices=["total", "count", "p95"], default="total",
+            help="Order by the time spent in all requests, the requests or the p95.",
+        )
+        parser.add_argument("--limit", type=int, default=20)
+
+    def read(self, paths):
+        if not paths:
+            yield from sys.stdin
+        for path in paths:
+            with open(path) as f:
+                yield from f
+
+    def handle(self, *args, **options):
+        histograms = {}
+        for line in self.read(options["paths"]):
+            # The line may start with what the log formatter adds
+            start = line.find("{")
+            if start < 0:
+                continue
+            try:
+                measures = json.loads(line[start:])
+                name = measures["name"]
+                if name:
+                    histograms.setdefault(name, Histogram()).add(measures)
+            except (ValueError, KeyError, TypeError):
+                continue
+
+        def key(item):
+            histogram = item[1]
+            if options["sort"] == "count":
+                return histogram.count
+            if options["sort"] == "p95":
+                return histogram.percentile(0.95)
+            return histogram.totals["total"]
+
+        rows = sorted(histograms.items(), key=key, reverse=True)[: options["limit"]]
+        self.stdout.write(f"{'view':<24}" + "".join(f"{column:>14}" for column in COLUMNS))
+        for name, histogram in rows:
+            summary = histogram.summary()
+            self.stdout.write(
+                f"{name:<24}" + "".join(f"{summary[column]:>14}" for column in COLUMNS)
+            )
@@ -0,0 +1,47 @@
+import signal
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from assistor.purge import BATCH_SIZE, INTERVAL, WORKERS, CoursePurge
+
+
+class Command(BaseCommand):
+    help = "Delete the rows and files of the deleted courses in batches, until stopped."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=BATCH_SIZE,
+            help="Rows deleted in each transaction.",
+        )
+        parser.add_argument(
+            "--interval", type=int, default=int(INTERVAL.total_seconds()),
+            help="Seconds between looks for deleted courses.",
+        )
+        parser.add_argument(
+            "--workers", type=int, default=WORKERS,
+            help="Threads removing stored files, 0 removes them in the purging thread.",
+        )
+        parser.add_argument(
+            "--once", action="store_true",
+            help="Purge the courses deleted so far and exit.",
+        )
+
+    def handle(self, *args, **options):
+        purge = CoursePurge(
+            batch_size=options["batch_size"],
+            interval=timedelta(seconds=options["interval"]),
+            workers=options["workers"],
+        )
+        if options["once"]:
+            count = purge.tick()
+            purge.close()
+            self.stdout.write(f"Purged {count} courses.")
+            return
+
+        # Finish the current batch and exit
+        signal.signal(signal.SIGINT, lambda *args: purge.stop())
+        signal.signal(signal.SIGTERM, lambda *args: purge.stop())
+        self.stdout.write("Course purge started.")
+        purge.run()
+        self.stdout.write("Course purge stopped.")
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+
+from assistor.caching import invalidate_courses
+from assistor.models import Course
+
+
+class Command(BaseCommand):
+    help = "Count the notes, files, links and instructors of every course again."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Courses updated in each transaction",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        last = Course.objects.aggregate(last=Max("id"))["last"] or 0
+        count = 0
+        # Ranges of ids keep each UPDATE and its locks short
+        for start in range(0, last, batch_size):
+            with transaction.atomic():
+                count += Course.objects.filter(
+                    id__gt=start, id__lte=start + batch_size
+                ).rebuild_counters()
+        for user_id in Course.objects.values_list("user_id", flat=True).distinct():
+            invalidate_courses(user_id)
+        self.stdout.write(f"Counted the rows of {count} courses.")
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from assistor.search import get_backend
+
+
+class Command(BaseCommand):
+    help = "Index every course, note, file and link again."
+
+    def handle(self, *args, **options):
+        backend = get_backend()
+        # Searches keep seeing the old index until the new one is complete
+        with transaction.atomic():
+            backend.setup()
+            count = backend.rebuild()
+        self.stdout.write(f"Indexed {count} documents with {type(backend).__name__}.")
@@ -0,0 +1,48 @@
+import signal
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from assistor.notifiers import get_notifiers
+from assistor.scheduler import BATCH_SIZE, LOOKAHEAD, REFRESH, ReminderScheduler
+
+
+class Command(BaseCommand):
+    help = "Send reminders when they are due, until stopped."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=BATCH_SIZE,
+            help="Reminders read or sent at a time.",
+        )
+        parser.add_argument(
+            "--lookahead", type=int, default=int(LOOKAHEAD.total_seconds()),
+            help="Seconds ahead reminders are read into memory.",
+        )
+        parser.add_argument(
+            "--refresh", type=int, default=int(REFRESH.total_seconds()),
+            help="Seconds between reads of new reminders.",
+        )
+        parser.add_argument(
+            "--once", action="store_true",
+            help="Send the reminders due now and exit.",
+        )
+
+    def handle(self, *args, **options):
+        scheduler = ReminderScheduler(
+            get_notifiers(),
+            batch_size=options["batch_size"],
+            lookahead=timedelta(seconds=options["lookahead"]),
+            refresh=timedelta(seconds=options["refresh"]),
+        )
+        if options["once"]:
+            while scheduler.tick() == 0:
+                pass
+            return
+
+        # Finish the current tick and exit
+        signal.signal(signal.SIGINT, lambda *args: scheduler.stop())
+        signal.signal(signal.SIGTERM, lambda *args: scheduler.stop())
+        self.stdout.write("Reminder scheduler started.")
+        scheduler.run()
+        self.stdout.write("Reminder scheduler stopped.")
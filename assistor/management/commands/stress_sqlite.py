@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from assistor import stress
+
+
+class Command(BaseCommand):
+    help = (
+        "Run reader and writer threads on a scratch SQLite database, first "
+        "with the rollback journal then with ASSISTOR_SQLITE_PRAGMAS, and "
+        "print the operations per second, latencies and errors of both."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--readers", type=int, default=4)
+        parser.add_argument("--writers", type=int, default=4)
+        parser.add_argument("--seconds", type=float, default=5.0)
+
+    def handle(self, *args, **options):
+        profiles = {
+            "rollback journal": stress.ROLLBACK,
+            "ASSISTOR_SQLITE_PRAGMAS": settings.ASSISTOR_SQLITE_PRAGMAS,
+        }
+        for name, pragmas in profiles.items():
+            self.stdout.write(
+                f"{name}: " + ", ".join(f"{key}={value}" for key, value in pragmas.items())
+            )
+            summary = stress.run(
+                pragmas, options["readers"], options["writers"], options["seconds"]
+            )
+            for operation, result in summary.items():
+                self.stdout.write(
+                    f"  {operation:<6} {result['per_second']:>9.1f}/s "
+                    f"p50 {result['p50']} ms p95 {result['p95']} ms "
+                    f"{result['errors']} errors"
+                )
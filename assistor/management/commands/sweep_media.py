@@ -0,0 +1,132 @@
+import os
+import shutil
+import time
+
+from django.core.management.base import BaseCommand
+
+from assistor.models import File
+from assistor.storage import SAVED_SUFFIX
+from assistor.uploads import UPLOAD_DIR
+
+
+def walk(root, skip):
+    """
+    Yield the name relative to ``root`` and the modification time of every
+    file below it, one directory at a time, without listing the whole tree.
+
+    A file saved again is as recent as its ``.saved`` marker. The markers
+    themselves are only yielded once their file is gone.
+    """
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.path not in skip:
+                        stack.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    mtime = entry.stat(follow_symlinks=False).st_mtime
+                    if entry.name.endswith(SAVED_SUFFIX):
+                        if os.path.exists(entry.path[: -len(SAVED_SUFFIX)]):
+                            continue
+                    else:
+                        try:
+                            mtime = max(mtime, os.path.getmtime(entry.path + SAVED_SUFFIX))
+                        except FileNotFoundError:
+                            pass
+                    name = os.path.relpath(entry.path, root).replace(os.sep, "/")
+                    yield name, mtime
+
+
+def batches(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class Command(BaseCommand):
+    help = "Delete stored files no File row refers to and abandoned chunked uploads."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=1000,
+            help="Number of files checked against the database per query.",
+        )
+        parser.add_argument(
+            "--min-age", type=int, default=60 * 60,
+            help="Keep files modified less than this many seconds ago.",
+        )
+        parser.add_argument(
+            "--upload-age", type=int, default=60 * 60 * 24,
+            help="Delete chunked uploads untouched for this many seconds.",
+        )
+        parser.add_argument(
+            "--dry-run", action="store_true",
+            help="Only report what would be deleted.",
+        )
+
+    def handle(self, *args, **options):
+        storage = File._meta.get_field("file").storage
+        root = storage.location
+        if not os.path.isdir(root):
+            self.stdout.write("Nothing to sweep.")
+            return
+
+        now = time.time()
+        dry_run = options["dry_run"]
+        uploads = os.path.join(root, UPLOAD_DIR)
+        checked = deleted = 0
+
+        # Only one batch of names is held in memory at a time
+        for batch in batches(walk(root, {uploads}), options["batch_size"]):
+            names = [name for name, mtime in batch if now - mtime >= options["min_age"]]
+            referenced = set(
+                File.objects.filter(file__in=names).values_list("file", flat=True)
+            )
+            checked += len(batch)
+            for name in names:
+                if name not in referenced:
+                    deleted += 1
+                    if dry_run:
+                        self.stdout.write(f"Would delete {name}")
+                    else:
+                        storage.delete(name)
+                        if storage.exists(name + SAVED_SUFFIX):
+                            storage.delete(name + SAVED_SUFFIX)
+
+        abandoned = self.sweep_uploads(uploads, now - options["upload_age"], dry_run)
+
+        verb = "Would delete" if dry_run else "Deleted"
+        self.stdout.write(
+            f"Checked {checked} files. {verb} {deleted} orphaned files "
+            f"and {abandoned} abandoned uploads."
+        )
+
+    def sweep_uploads(self, uploads, before, dry_run):
+        """Delete the chunked uploads with no activity since ``before``"""
+        abandoned = 0
+        if not os.path.isdir(uploads):
+            return abandoned
+        for user in os.scandir(uploads):
+            if not user.is_dir(follow_symlinks=False):
+                continue
+            for upload in os.scandir(user.path):
+                if not upload.is_dir(follow_symlinks=False):
+                    continue
+                with os.scandir(upload.path) as entries:
+                    latest = max(
+                        [entry.stat().st_mtime for entry in entries] + [upload.stat().st_mtime]
+                    )
+                if latest < before:
+                    abandoned += 1
+                    if dry_run:
+                        self.stdout.write(f"Would delete upload {upload.path}")
+                    else:
+                        shutil.rmtree(upload.path, ignore_errors=True)
+        return abandoned
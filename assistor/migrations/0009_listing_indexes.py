@@ -0,0 +1,61 @@
+# Generated by Django 3.2.9 on 2026-10-18 17:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assistor', '0008_rename_catergory_file_category_alter_user_email'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='course',
+            options={'ordering': ['-creation_time', '-id']},
+        ),
+        migrations.AlterModelOptions(
+            name='file',
+            options={'ordering': ['-creation_time', '-id']},
+        ),
+        migrations.AlterModelOptions(
+            name='instructor',
+            options={'ordering': ['id']},
+        ),
+        migrations.AlterModelOptions(
+            name='link',
+            options={'ordering': ['-creation_time', '-id']},
+        ),
+        migrations.AlterModelOptions(
+            name='note',
+            options={'ordering': ['-creation_time', '-id']},
+        ),
+        migrations.AlterModelOptions(
+            name='reminder',
+            options={'ordering': ['time', 'id']},
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['user', 'creation_time', 'id'], name='course_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='file',
+            index=models.Index(fields=['course', 'creation_time', 'id'], name='file_course_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='link',
+            index=models.Index(fields=['course', 'creation_time', 'id'], name='link_course_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='note',
+            index=models.Index(fields=['course', 'creation_time', 'id'], name='note_course_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reminder',
+            index=models.Index(fields=['user', 'time', 'id'], name='reminder_user_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reminder',
+            index=models.Index(fields=['user', 'creation_time', 'id'], name='reminder_user_created_idx'),
+        ),
+    ]
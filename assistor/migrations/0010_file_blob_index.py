@@ -0,0 +1,18 @@
+# Generated by Django 3.2.9 on 2026-10-18 17:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assistor', '0009_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='file',
+            name='file',
+            field=models.FileField(db_index=True, upload_to=''),
+        ),
+    ]
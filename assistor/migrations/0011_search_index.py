@@ -0,0 +1,62 @@
+import re
+import unicodedata
+
+from django.db import migrations
+
+WORD_RE = re.compile(r"[^\W_]+")
+
+# Kind, model, owner and fields of the indexed objects as of this
+# migration. The position of a kind is encoded in the rowid.
+SOURCES = [
+    ("course", "Course", "user_id", "title", "provider"),
+    ("note", "Note", "course__user_id", "title", "content"),
+    ("file", "File", "course__user_id", "name", None),
+    ("link", "Link", "course__user_id", "name", "url"),
+]
+
+INSERT_SQL = "INSERT OR REPLACE INTO assistor_search (rowid, title, body) VALUES (%s, %s, %s)"
+
+
+def scope(user_id, text):
+    """Return the words of a text, lowercased, without diacritics and prefixed with their owner"""
+    text = unicodedata.normalize("NFKD", (text or "").lower())
+    words = WORD_RE.findall("".join(c for c in text if not unicodedata.combining(c)))
+    return " ".join(f"{user_id}u{word}" for word in words)
+
+
+def create_search_index(apps, schema_editor):
+    # The FTS5 index only exists on SQLite
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS assistor_search "
+            "USING fts5(title, body, tokenize = 'unicode61', detail = column)"
+        )
+        for kind, (_, name, owner, title, body) in enumerate(SOURCES):
+            model = apps.get_model('assistor', name)
+            fields = ["id", owner, title] + ([body] if body else [])
+            rows = model.objects.using(schema_editor.connection.alias).order_by().values_list(*fields)
+            cursor.executemany(INSERT_SQL, [
+                [object_id * len(SOURCES) + kind, scope(user_id, text), scope(user_id, rest[0] if rest else "")]
+                for object_id, user_id, text, *rest in rows.iterator()
+            ])
+        cursor.execute("INSERT INTO assistor_search (assistor_search) VALUES ('optimize')")
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("DROP TABLE IF EXISTS assistor_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assistor', '0010_file_blob_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
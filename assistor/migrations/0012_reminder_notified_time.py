@@ -0,0 +1,31 @@
+# Generated by Django 3.2.9 on 2026-10-18 18:08
+
+from django.db import migrations, models
+from django.db.models import F
+from django.utils import timezone
+
+
+def mark_past_reminders(apps, schema_editor):
+    # Reminders already due were never sent, do not send them all at once
+    Reminder = apps.get_model('assistor', 'Reminder')
+    Reminder.objects.filter(time__lte=timezone.now()).update(notified_time=F('time'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assistor', '0011_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reminder',
+            name='notified_time',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='reminder',
+            index=models.Index(condition=models.Q(('notified_time__isnull', True)), fields=['time', 'id'], name='reminder_pending_time_idx'),
+        ),
+        migrations.RunPython(mark_past_reminders, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 3.2.9 on 2026-10-18 19:02
+
+from django.db import migrations, models
+from django.db.models import Count, DateTimeField, F, IntegerField, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+
+def child_subquery(model, **aggregate):
+    rows = (
+        model.objects.filter(course=OuterRef('pk'))
+        .order_by()
+        .values('course')
+        .annotate(**aggregate)
+        .values(*aggregate)
+    )
+    return rows
+
+
+def count_children(apps, schema_editor):
+    # Count the rows of the existing courses, instructors keep no time
+    Course = apps.get_model('assistor', 'Course')
+    children = {
+        'note_count': apps.get_model('assistor', 'Note'),
+        'file_count': apps.get_model('assistor', 'File'),
+        'link_count': apps.get_model('assistor', 'Link'),
+        'instructor_count': apps.get_model('assistor', 'Instructor'),
+    }
+    Course.objects.update(
+        last_activity=Greatest(*[
+            Coalesce(
+                Subquery(child_subquery(model, latest=Max('creation_time')), output_field=DateTimeField()),
+                F('creation_time'),
+            )
+            for field, model in children.items()
+            if field != 'instructor_count'
+        ]),
+        **{
+            field: Coalesce(Subquery(child_subquery(model, count=Count('id')), output_field=IntegerField()), 0)
+            for field, model in children.items()
+        },
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assistor', '0012_reminder_notified_time'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='file_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='instructor_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='last_activity',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='link_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='note_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(count_children, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 3.2.9 on 2026-10-18 19:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assistor', '0013_course_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='deleted_time',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(condition=models.Q(('deleted_time__isnull', False)), fields=['deleted_time', 'id'], name='course_deleted_idx'),
+        ),
+    ]
@@ -1,9 +1,27 @@
 import email
+import threading
+from contextlib import contextmanager
 from pyexpat import model
 from statistics import mode
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.db.models import (
+    Count,
+    DateTimeField,
+    F,
+    IntegerField,
+    Max,
+    OuterRef,
+    Prefetch,
+    Q,
+    Subquery,
+)
 from django.db.models.fields.related import ForeignKey
+from django.db.models.functions import Coalesce, Greatest
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.formats import date_format
+from django.utils.translation import ngettext
 
 from django.utils.translation import gettext_lazy as _
 
@@ -19,6 +37,133 @@ class User(AbstractUser):
     email = models.CharField(max_length=256, null=False, blank=False, unique=True)
 
 
+def count_subquery(model):
+    """Count rows of ``model`` that belong to the outer course"""
+    rows = (
+        model.objects.filter(course=OuterRef("pk"))
+        .order_by()
+        .values("course")
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
+    return Coalesce(Subquery(rows, output_field=IntegerField()), 0)
+
+
+def latest_subquery(model):
+    """Time the newest row of ``model`` of the outer course was saved"""
+    rows = (
+        model.objects.filter(course=OuterRef("pk"))
+        .order_by()
+        .values("course")
+        .annotate(latest=Max("creation_time"))
+        .values("latest")
+    )
+    return Coalesce(Subquery(rows, output_field=DateTimeField()), F("creation_time"))
+
+
+def latest_prefetch(lookup, model, limit):
+    """Prefetch only the newest ``limit`` rows of ``model`` for each course"""
+    latest = model.objects.filter(course=OuterRef("course")).values("id")[:limit]
+    return Prefetch(
+        lookup,
+        queryset=model.objects.filter(id__in=Subquery(latest)),
+        to_attr=f"latest_{lookup}",
+    )
+
+
+# Counter of each kind of course child
+COUNTERS = {
+    "note_count": "Note",
+    "file_count": "File",
+    "link_count": "Link",
+    "instructor_count": "Instructor",
+}
+
+
+# Courses being deleted in this thread, their children are not counted
+# down one by one
+deleting = threading.local()
+
+
+@contextmanager
+def deleting_courses():
+    """
+    Collect in ``deleting.ids`` the courses deleted in the block, the
+    pre_delete signal adds them. They are forgotten when the outermost
+    block ends, also when the delete fails.
+    """
+    if getattr(deleting, "ids", None) is not None:
+        yield
+        return
+    deleting.ids = set()
+    try:
+        yield
+    finally:
+        deleting.ids = None
+
+
+class CourseQuerySet(models.QuerySet):
+    def delete(self):
+        with deleting_courses():
+            return super().delete()
+
+    delete.alters_data = True
+    delete.queryset_only = True
+
+    def record_activity(self, **deltas):
+        """
+        Add ``deltas`` like ``note_count=1`` to the counters of the courses
+        and set their last activity to now. It is one UPDATE with F()
+        expressions, so concurrent requests never lose a count. Rows added
+        without signals are not counted, counters stop at zero rather than
+        fail and rebuild_counters() corrects them.
+        """
+        return self.update(
+            last_activity=timezone.now(),
+            **{field: Greatest(F(field) + delta, 0) for field, delta in deltas.items()},
+        )
+
+    def rebuild_counters(self):
+        """Count the children of the courses again, in one UPDATE"""
+        models_by_counter = {
+            field: self.model._meta.apps.get_model("assistor", name)
+            for field, name in COUNTERS.items()
+        }
+        # Instructors keep no time, the newest note, file or link is the
+        # last activity
+        dated = [models_by_counter[field] for field in ("note_count", "file_count", "link_count")]
+        return self.update(
+            last_activity=Greatest(*[latest_subquery(model) for model in dated]),
+            **{field: count_subquery(model) for field, model in models_by_counter.items()},
+        )
+
+    def mark_deleted(self):
+        """
+        Hide the courses at once, in one UPDATE. Their rows are deleted in
+        batches later by the purge_courses command.
+        """
+        return self.update(deleted_time=timezone.now())
+
+    def with_dashboard(self, limit=4):
+        """
+        Load everything the course page shows: the newest ``limit`` notes
+        and files and all the instructors and links.
+        """
+        return self.prefetch_related(
+            latest_prefetch("notes", Note, limit),
+            latest_prefetch("files", File, limit),
+            "instructors",
+            "links",
+        )
+
+
+class CourseManager(models.Manager.from_queryset(CourseQuerySet)):
+    """The courses not deleted, those waiting for the purge are left out"""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_time__isnull=True)
+
+
 class Course(models.Model):
     # User who created the course
     user = models.ForeignKey(
@@ -43,21 +188,81 @@ class Course(models.Model):
     # Time of creation
     creation_time = models.DateTimeField(auto_now=True, null=False, blank=True)
 
+    # Number of notes, files, links and instructors, kept by the signals
+    note_count = models.PositiveIntegerField(default=0)
+    file_count = models.PositiveIntegerField(default=0)
+    link_count = models.PositiveIntegerField(default=0)
+    instructor_count = models.PositiveIntegerField(default=0)
+
+    # Time a note, file, link or instructor was last saved or deleted
+    last_activity = models.DateTimeField(null=True, blank=True)
+
+    # Time the user deleted the course, its rows are purged in the background
+    deleted_time = models.DateTimeField(null=True, blank=True)
+
+    objects = CourseManager()
+    # Deleted courses included, for the purge
+    all_objects = CourseQuerySet.as_manager()
+
+    class Meta:
+        # Newest first, matching the (user, creation_time) index
+        ordering = ["-creation_time", "-id"]
+        indexes = [
+            models.Index(
+                fields=["user", "creation_time", "id"], name="course_user_created_idx"
+            ),
+            # Only the deleted courses, read by the purge
+            models.Index(
+                fields=["deleted_time", "id"],
+                name="course_deleted_idx",
+                condition=Q(deleted_time__isnull=False),
+            ),
+        ]
+
     def serialize(self):
         return {
             "id": self.id,
-            "user": self.user.id,
+            "user": self.user_id,
             "title": self.title,
             "start_date": self.start_date,
             "completion_date": self.completion_date,
             "grade": self.grade,
             "provider": self.provider,
+            "note_count": self.note_count,
+            "file_count": self.file_count,
+            "link_count": self.link_count,
+            "instructor_count": self.instructor_count,
+            "last_activity": self.last_activity,
         }
 
+    def activity(self):
+        """
+        Line of the course cards, like "12 notes · 5 files · Oct. 18, 2026".
+        A date rather than a time since, the cards are cached and revalidated.
+        """
+        notes = ngettext("%(count)d note", "%(count)d notes", self.note_count)
+        files = ngettext("%(count)d file", "%(count)d files", self.file_count)
+        updated = date_format(timezone.localtime(self.last_activity or self.creation_time))
+        return (
+            f"{notes % {'count': self.note_count}} · "
+            f"{files % {'count': self.file_count}} · {updated}"
+        )
+
+    def delete(self, *args, **kwargs):
+        with deleting_courses():
+            return super().delete(*args, **kwargs)
+
     def __str__(self):
         return f"{self.title} by {self.user}"
 
 
+def course_user_id(instance):
+    """Return the user of the course of a child without loading the course"""
+    if type(instance)._meta.get_field("course").is_cached(instance):
+        return instance.course.user_id
+    return Course.all_objects.filter(id=instance.course_id).values_list("user_id", flat=True).first()
+
+
 class Instructor(models.Model):
     # The course taught by instructor
     course = models.ForeignKey(
@@ -96,10 +301,14 @@ class Instructor(models.Model):
     # Email of the Instructor
     email = models.EmailField(max_length=256, null=True, blank=True, unique=True)
 
+    class Meta:
+        # Instructors are listed in the order they were added
+        ordering = ["id"]
+
     def serialize(self):
         return {
             "id": self.id,
-            "course": self.course.id,
+            "course": self.course_id,
             "title": self.get_title_display(),
             "first_name": self.first_name,
             "last_name": self.last_name,
@@ -125,10 +334,19 @@ class Note(models.Model):
     # Time of creation
     creation_time = models.DateTimeField(auto_now=True, null=False, blank=True)
 
+    class Meta:
+        # Newest first, matching the (course, creation_time) index
+        ordering = ["-creation_time", "-id"]
+        indexes = [
+            models.Index(
+                fields=["course", "creation_time", "id"], name="note_course_created_idx"
+            ),
+        ]
+
     def serialize(self):
         return {
             "id": self.id,
-            "course": self.course.id,
+            "course": self.course_id,
             "title": self.title,
             "content": self.content,
         }
@@ -167,19 +385,28 @@ class File(models.Model):
         max_length=2, choices=CATEGORIES, default=OTHER, null=False, blank=False
     )
 
-    # File
-    file = models.FileField(null=False, blank=False)
+    # File, indexed to find the rows sharing a stored blob
+    file = models.FileField(null=False, blank=False, db_index=True)
 
     # Time of creation
     creation_time = models.DateTimeField(auto_now=True, null=False, blank=True)
 
+    class Meta:
+        # Newest first, matching the (course, creation_time) index
+        ordering = ["-creation_time", "-id"]
+        indexes = [
+            models.Index(
+                fields=["course", "creation_time", "id"], name="file_course_created_idx"
+            ),
+        ]
+
     def serialize(self):
         return {
             "id": self.id,
-            "course": self.course.id,
+            "course": self.course_id,
             "name": self.name,
             "category": self.get_category_display(),
-            "file": self.file.url,
+            "file": reverse("file_download", args=[self.course_id, self.id]),
         }
 
 
@@ -198,10 +425,19 @@ class Link(models.Model):
     # Time of creation
     creation_time = models.DateTimeField(auto_now=True, null=False, blank=True)
 
+    class Meta:
+        # Newest first, matching the (course, creation_time) index
+        ordering = ["-creation_time", "-id"]
+        indexes = [
+            models.Index(
+                fields=["course", "creation_time", "id"], name="link_course_created_idx"
+            ),
+        ]
+
     def serialize(self):
         return {
             "id": self.id,
-            "course": self.course.id,
+            "course": self.course_id,
             "name": self.name,
             "url": self.url,
         }
@@ -219,13 +455,33 @@ class Reminder(models.Model):
     # Time of the reminder
     time = models.DateTimeField(null=False, blank=False)
 
+    # Time the reminder was sent, empty until it is due
+    notified_time = models.DateTimeField(null=True, blank=True)
+
     # Time of creation
     creation_time = models.DateTimeField(auto_now=True, null=False, blank=True)
 
+    class Meta:
+        # Soonest first, matching the (user, time) index
+        ordering = ["time", "id"]
+        indexes = [
+            models.Index(fields=["user", "time", "id"], name="reminder_user_time_idx"),
+            models.Index(
+                fields=["user", "creation_time", "id"],
+                name="reminder_user_created_idx",
+            ),
+            # Only the reminders still to send, in the order they are due
+            models.Index(
+                fields=["time", "id"],
+                name="reminder_pending_time_idx",
+                condition=Q(notified_time__isnull=True),
+            ),
+        ]
+
     def serialize(self):
         return {
             "id": self.id,
-            "user": self.user.id,
+            "user": self.user_id,
             "name": self.name,
             "time": self.time,
         }
@@ -0,0 +1,78 @@
+import json
+import sys
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+
+def describe(reminder):
+    time = timezone.localtime(reminder.time)
+    return f"{reminder.name} at {time:%Y-%m-%d %H:%M}"
+
+
+def get_notifiers():
+    """Return the notifiers named by ``ASSISTOR_REMINDER_NOTIFIERS``"""
+    paths = getattr(
+        settings, "ASSISTOR_REMINDER_NOTIFIERS", ["assistor.notifiers.ConsoleNotifier"]
+    )
+    return [import_string(path)() for path in paths]
+
+
+class Notifier:
+    """
+    Deliver due reminders. ``send`` gets the reminders due at the same
+    tick, with their user loaded.
+    """
+
+    def send(self, reminders):
+        raise NotImplementedError
+
+
+class ConsoleNotifier(Notifier):
+    """Write a line per reminder to the standard output"""
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+
+    def send(self, reminders):
+        for reminder in reminders:
+            self.stream.write(f"Reminder for {reminder.user.username}: {describe(reminder)}\n")
+        self.stream.flush()
+
+
+class FileNotifier(Notifier):
+    """Append a JSON line per reminder to ``ASSISTOR_REMINDER_FILE``"""
+
+    def __init__(self, path=None):
+        self.path = path or settings.ASSISTOR_REMINDER_FILE
+
+    def send(self, reminders):
+        with open(self.path, "a") as f:
+            for reminder in reminders:
+                line = {
+                    "id": reminder.id,
+                    "user": reminder.user_id,
+                    "name": reminder.name,
+                    "time": reminder.time.isoformat(),
+                }
+                f.write(json.dumps(line) + "\n")
+
+
+class EmailNotifier(Notifier):
+    """
+    Email every reminder to its user, all through one connection of the
+    configured ``EMAIL_BACKEND``.
+    """
+
+    def send(self, reminders):
+        messages = [
+            EmailMessage(
+                subject=f"Reminder: {reminder.name}",
+                body=f"This is your reminder for {describe(reminder)}.",
+                to=[reminder.user.email],
+            )
+            for reminder in reminders
+        ]
+        get_connection().send_messages(messages)
@@ -0,0 +1,145 @@
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.http import Http404
+
+# Number of rows shown on a page, a multiple of the four card columns
+PAGE_SIZE = 24
+
+
+class KeysetPage:
+    """
+    A page of rows read after a cursor.
+
+    The cursor holds the ordering values of the last row of the previous
+    page, so every page is one indexed range scan however deep it is.
+    Rows are only read when the page is first used, so a page rendered
+    from a cached fragment costs no query.
+    """
+
+    def __init__(self, queryset, ordering, page_size):
+        self.queryset = queryset
+        self.ordering = ordering
+        self.page_size = page_size
+        self._rows = None
+        self._next_token = None
+
+    def _fetch(self):
+        if self._rows is not None:
+            return
+
+        # Read one extra row to know whether there is a next page
+        rows = list(self.queryset[: self.page_size + 1])
+        if len(rows) > self.page_size:
+            rows = rows[: self.page_size]
+            last = rows[-1]
+            self._next_token = encode_cursor(
+                [get_value(last, field.lstrip("-")) for field in self.ordering]
+            )
+        self._rows = rows
+
+    @property
+    def object_list(self):
+        self._fetch()
+        return self._rows
+
+    @property
+    def next_token(self):
+        self._fetch()
+        return self._next_token
+
+    @property
+    def has_next(self):
+        return self.next_token is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def serialize(self):
+        return {
+            "results": [obj.serialize() for obj in self.object_list],
+            "next": self.next_token,
+        }
+
+
+def get_ordering(queryset):
+    """Return the ordering of the queryset, ending with the primary key"""
+    ordering = list(queryset.query.order_by or queryset.model._meta.ordering)
+    if not any(field.lstrip("-") in ("id", "pk") for field in ordering):
+        ordering.append("id")
+    return ordering
+
+
+def get_value(row, field):
+    """Read a field from a model instance or a values() row"""
+    return row[field] if isinstance(row, dict) else getattr(row, field)
+
+
+def encode_cursor(values):
+    # isoformat() keeps the microseconds that DjangoJSONEncoder drops
+    values = [
+        value.isoformat() if hasattr(value, "isoformat") else value for value in values
+    ]
+    data = json.dumps(values).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+
+def decode_cursor(queryset, ordering, token):
+    """Turn a cursor back into the ordering values of a row"""
+    try:
+        data = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        values = json.loads(data)
+        if not isinstance(values, list) or len(values) != len(ordering):
+            raise ValueError
+        meta = queryset.model._meta
+        values = [
+            meta.get_field(field.lstrip("-")).to_python(value)
+            for field, value in zip(ordering, values)
+        ]
+        # The ordering fields are never null, and None cannot be compared
+        if None in values:
+            raise ValueError
+        return values
+    except (binascii.Error, TypeError, ValueError, ValidationError):
+        raise Http404("Invalid cursor")
+
+
+def after(ordering, values):
+    """Build the filter selecting the rows that come after ``values``"""
+    condition = Q()
+    for i in reversed(range(len(ordering))):
+        field = ordering[i].lstrip("-")
+        lookup = "lt" if ordering[i].startswith("-") else "gt"
+        beyond = Q(**{f"{field}__{lookup}": values[i]})
+        if condition:
+            condition = beyond | (Q(**{field: values[i]}) & condition)
+        else:
+            condition = beyond
+
+    # Repeat the bound on the leading column so the index can seek to it
+    field = ordering[0].lstrip("-")
+    lookup = "lte" if ordering[0].startswith("-") else "gte"
+    return Q(**{f"{field}__{lookup}": values[0]}) & condition
+
+
+def paginate(queryset, token=None, page_size=PAGE_SIZE):
+    """
+    Return the page of ``queryset`` that follows the cursor ``token``.
+
+    Rows are ordered by the queryset ordering (the model ordering by
+    default) with the primary key as a tie breaker. A values() queryset
+    must select the ordering fields.
+    """
+    ordering = get_ordering(queryset)
+    queryset = queryset.order_by(*ordering)
+    if token:
+        values = decode_cursor(queryset, ordering, token)
+        queryset = queryset.filter(after(ordering, values))
+
+    return KeysetPage(queryset, ordering, page_size)
@@ -0,0 +1,138 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.db import connection, transaction
+
+from . import search
+from .models import Course, File, Instructor, Link, Note
+from .signals import release_file
+
+logger = logging.getLogger(__name__)
+
+# Rows deleted in each transaction
+BATCH_SIZE = 1000
+
+# How often deleted courses are looked for
+INTERVAL = timedelta(seconds=30)
+
+# Threads removing the stored files of the purged rows
+WORKERS = 2
+
+# Children of a course, deleted before it
+CHILDREN = [Note, File, Link, Instructor]
+
+
+def release_files(storage, names):
+    """Delete the stored files no row refers to any more"""
+    try:
+        for name in names:
+            release_file(storage, name)
+    finally:
+        # Runs in a worker thread, which would keep its connection open
+        connection.close()
+
+
+class CoursePurge:
+    """
+    Delete the rows of the courses users deleted.
+
+    Deleting a course only sets its ``deleted_time``, which hides it. The
+    purge deletes its children ``batch_size`` rows at a time: the ids of
+    the next batch are read in order from the course index and the range
+    they span is deleted with one DELETE, in its own transaction, without
+    loading the rows or sending signals. The search index is updated and
+    the stored files are handed to ``workers`` threads once each batch
+    commits, so removing them never holds a transaction open. The course
+    itself goes last, with the few rows added to it meanwhile.
+    """
+
+    def __init__(self, batch_size=BATCH_SIZE, interval=INTERVAL, workers=WORKERS):
+        self.batch_size = batch_size
+        self.interval = interval
+        # Without workers files are removed in the purging thread
+        self.executor = ThreadPoolExecutor(workers) if workers else None
+        self.stopped = threading.Event()
+
+    def release(self, storage, names):
+        if self.executor is None:
+            for name in names:
+                release_file(storage, name)
+        else:
+            self.executor.submit(release_files, storage, names)
+
+    def delete_batch(self, model, course_id):
+        """Delete the next batch of children of a course, return how many"""
+        children = model.objects.filter(course_id=course_id)
+        ids = list(children.order_by("id").values_list("id", flat=True)[: self.batch_size])
+        if not ids:
+            return 0
+
+        batch = children.filter(id__gte=ids[0], id__lte=ids[-1])
+        storage = File._meta.get_field("file").storage
+        with transaction.atomic():
+            names = list(batch.values_list("file", flat=True)) if model is File else []
+            # Only rows with no signals and no cascades are deleted this way
+            deleted = batch._raw_delete(batch.db)
+            if model in search.BY_MODEL:
+                search.get_backend().remove_ids(model, ids)
+            if names:
+                transaction.on_commit(lambda: self.release(storage, names))
+        return deleted
+
+    def purge(self, course_id):
+        """Delete a deleted course and its rows, return how many rows"""
+        count = 0
+        for model in CHILDREN:
+            while not self.stopped.is_set():
+                deleted = self.delete_batch(model, course_id)
+                count += deleted
+                if deleted < self.batch_size:
+                    break
+        if self.stopped.is_set():
+            return count
+
+        # The signals of the course drop its cached fragments and index
+        # entry, and delete whatever was added since the batches
+        deleted, _ = Course.all_objects.filter(id=course_id, deleted_time__isnull=False).delete()
+        return count + deleted
+
+    def tick(self):
+        """Purge the courses deleted so far, return how many"""
+        purged = 0
+        while not self.stopped.is_set():
+            course_ids = list(
+                Course.all_objects.filter(deleted_time__isnull=False)
+                .order_by("deleted_time", "id")
+                .values_list("id", flat=True)[: self.batch_size]
+            )
+            for course_id in course_ids:
+                if self.stopped.is_set():
+                    break
+                rows = self.purge(course_id)
+                if not self.stopped.is_set():
+                    purged += 1
+                    logger.info("Purged course %d and %d rows", course_id, rows)
+            if len(course_ids) < self.batch_size:
+                break
+        return purged
+
+    def run(self):
+        while not self.stopped.is_set():
+            try:
+                self.tick()
+            except Exception:
+                # A course left half purged is purged again on the next tick
+                logger.exception("Could not purge the deleted courses")
+            self.stopped.wait(self.interval.total_seconds())
+        self.close()
+
+    def stop(self):
+        """Stop the purge after the current batch, waking it up when it sleeps"""
+        self.stopped.set()
+
+    def close(self):
+        """Wait for the stored files still being removed"""
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
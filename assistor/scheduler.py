@@ -0,0 +1,139 @@
+import heapq
+import logging
+import threading
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Reminder
+
+logger = logging.getLogger(__name__)
+
+# Reminders read from the database or sent at a time
+BATCH_SIZE = 1000
+
+# How far ahead reminders are read into the heap
+LOOKAHEAD = timedelta(minutes=10)
+
+# How often the heap is refilled, which bounds how late a reminder created
+# for the next minutes can be sent
+REFRESH = timedelta(seconds=30)
+
+
+class ReminderScheduler:
+    """
+    Send reminders when they are due.
+
+    The reminders due within ``lookahead`` are read with a range query on
+    the index of the pending reminders and kept in a heap ordered by
+    time. The scheduler sleeps until the earliest of them is due, or
+    until the next refill of the heap. Every query reads at most
+    ``batch_size`` rows, so a tick costs the same however many reminders
+    are stored.
+
+    Reminders are marked as sent before the notifiers run, so a reminder
+    is never sent twice even when a notifier fails.
+    """
+
+    def __init__(
+        self,
+        notifiers,
+        batch_size=BATCH_SIZE,
+        lookahead=LOOKAHEAD,
+        refresh=REFRESH,
+        clock=timezone.now,
+    ):
+        self.notifiers = notifiers
+        self.batch_size = batch_size
+        self.lookahead = lookahead
+        self.refresh = refresh
+        self.clock = clock
+        self.heap = []
+        # Time each queued reminder was queued for
+        self.queued = {}
+        self.next_load = None
+        self.stopped = threading.Event()
+
+    def load(self, now):
+        """Queue the earliest pending reminders due before the horizon"""
+        rows = (
+            Reminder.objects.filter(
+                notified_time__isnull=True, time__lt=now + self.lookahead
+            )
+            .order_by("time", "id")
+            .values_list("time", "id")[: self.batch_size]
+        )
+        count = 0
+        last = None
+        for time, reminder_id in rows:
+            count += 1
+            last = time
+            # A reminder moved since it was queued is queued again, the
+            # stale entry is skipped when it comes out of the heap
+            if self.queued.get(reminder_id) != time:
+                self.queued[reminder_id] = time
+                heapq.heappush(self.heap, (time, reminder_id))
+
+        # A full batch means more are waiting. They are due no sooner than
+        # the last row read, read them after this tick if it is due,
+        # otherwise when it is
+        self.next_load = now + self.refresh
+        if count == self.batch_size:
+            self.next_load = max(min(last, self.next_load), now)
+
+    def dispatch(self, now):
+        """Send the queued reminders that are due, return how many were sent"""
+        ids = []
+        while self.heap and self.heap[0][0] <= now and len(ids) < self.batch_size:
+            time, reminder_id = heapq.heappop(self.heap)
+            if self.queued.get(reminder_id) == time:
+                del self.queued[reminder_id]
+                ids.append(reminder_id)
+        if not ids:
+            return 0
+
+        # Reminders deleted, sent or moved later since they were queued
+        # are skipped, the moved ones are queued again by a later load
+        with transaction.atomic():
+            reminders = list(
+                Reminder.objects.select_for_update()
+                .filter(id__in=ids, notified_time__isnull=True, time__lte=now)
+                .select_related("user")
+            )
+            Reminder.objects.filter(id__in=[r.id for r in reminders]).update(
+                notified_time=now
+            )
+
+        for notifier in self.notifiers:
+            try:
+                notifier.send(reminders)
+            except Exception:
+                logger.exception(
+                    "%s failed to send %d reminders", type(notifier).__name__, len(reminders)
+                )
+        return len(reminders)
+
+    def tick(self):
+        """
+        Load and send what is due, return the seconds until the scheduler
+        has something to do again.
+        """
+        now = self.clock()
+        if self.next_load is None or now >= self.next_load:
+            self.load(now)
+        self.dispatch(now)
+
+        # The heap still holds due reminders when a batch was full
+        wake = self.next_load
+        if self.heap and self.heap[0][0] < wake:
+            wake = self.heap[0][0]
+        return max((wake - now).total_seconds(), 0)
+
+    def run(self):
+        while not self.stopped.is_set():
+            self.stopped.wait(self.tick())
+
+    def stop(self):
+        """Stop the scheduler, waking it up when it sleeps"""
+        self.stopped.set()
@@ -0,0 +1,349 @@
+import re
+import unicodedata
+from collections import defaultdict, namedtuple
+
+from django.conf import settings
+from django.db import connection as default_connection
+from django.db.models import Q
+from django.urls import reverse
+from django.utils.module_loading import import_string
+
+from .models import Course, File, Link, Note, course_user_id
+
+# Results returned by a search
+LIMIT = 20
+
+# Words of a query used, the rest is ignored
+MAX_TERMS = 16
+
+# Characters of a body shown with a result
+SNIPPET_LENGTH = 160
+
+# Rows written to the index at a time by a rebuild
+BATCH_SIZE = 2000
+
+WORD_RE = re.compile(r"[^\W_]+")
+
+# The model of each kind of indexed object, the lookup of its owner and
+# course, the fields searched and the lookup leaving out the objects of
+# deleted courses. The position of a kind is encoded in the rowid of the
+# SQLite index.
+Source = namedtuple("Source", "kind model owner course title body live")
+SOURCES = [
+    Source("course", Course, "user_id", "id", "title", "provider", "deleted_time__isnull"),
+    Source("note", Note, "course__user_id", "course_id", "title", "content", "course__deleted_time__isnull"),
+    Source("file", File, "course__user_id", "course_id", "name", None, "course__deleted_time__isnull"),
+    Source("link", Link, "course__user_id", "course_id", "name", "url", "course__deleted_time__isnull"),
+]
+KINDS = [source.kind for source in SOURCES]
+BY_KIND = {source.kind: source for source in SOURCES}
+BY_MODEL = {source.model: source for source in SOURCES}
+
+
+def get_words(text):
+    """Return the words of a text, lowercased and without diacritics"""
+    text = unicodedata.normalize("NFKD", (text or "").lower())
+    return WORD_RE.findall("".join(c for c in text if not unicodedata.combining(c)))
+
+
+def get_fields(source):
+    """Return the fields of a source read to show a result"""
+    return ["id", source.course, source.title] + ([source.body] if source.body else [])
+
+
+def document(instance):
+    """Return the user, title and body indexed for an instance"""
+    source = BY_MODEL[type(instance)]
+    if isinstance(instance, Course):
+        user_id = instance.user_id
+    else:
+        user_id = course_user_id(instance)
+    body = getattr(instance, source.body) if source.body else ""
+    return user_id, getattr(instance, source.title), body or ""
+
+
+def make_snippet(text, words):
+    """Return the part of ``text`` around the first word found in it"""
+    if not text:
+        return ""
+    lowered = text.lower()
+    found = [i for i in (lowered.find(word) for word in words) if i >= 0]
+    start = max(min(found) - SNIPPET_LENGTH // 4, 0) if found else 0
+    end = start + SNIPPET_LENGTH
+    snippet = text[start:end].strip()
+    if start > 0:
+        snippet = "…" + snippet
+    if end < len(text):
+        snippet += "…"
+    return snippet
+
+
+def result_url(kind, object_id, course_id):
+    if kind == "course":
+        return reverse("course", args=[object_id])
+    if kind == "note":
+        return reverse("note", args=[course_id, object_id])
+    if kind == "file":
+        return reverse("file", args=[course_id, object_id])
+    return reverse("course", args=[course_id])
+
+
+def make_result(kind, row, words):
+    """Build a result from a row read with the fields of ``get_fields``"""
+    object_id, course_id, title = row[:3]
+    return {
+        "kind": kind,
+        "id": object_id,
+        "course": course_id,
+        "title": title,
+        "snippet": make_snippet(row[3], words) if len(row) > 3 else "",
+        "url": result_url(kind, object_id, course_id),
+    }
+
+
+def load_results(user_id, hits, words):
+    """
+    Return the results of ``hits``, (kind, id) pairs in rank order, read
+    with one query per kind. Objects of other users are left out.
+    """
+    ids = defaultdict(list)
+    for kind, object_id in hits:
+        ids[kind].append(object_id)
+
+    found = {}
+    for kind, object_ids in ids.items():
+        source = BY_KIND[kind]
+        rows = source.model.objects.filter(
+            **{source.owner: user_id, source.live: True, "id__in": object_ids}
+        ).values_list(*get_fields(source))
+        for row in rows:
+            found[kind, row[0]] = make_result(kind, row, words)
+    return [found[hit] for hit in hits if hit in found]
+
+
+def get_backend(connection=default_connection):
+    """
+    Return the backend named by ``ASSISTOR_SEARCH_BACKEND``, by default the
+    FTS5 index on SQLite and LIKE queries on other databases
+    """
+    path = getattr(settings, "ASSISTOR_SEARCH_BACKEND", "")
+    if path:
+        return import_string(path)()
+    if connection.vendor == "sqlite":
+        return SQLiteSearchBackend()
+    return DatabaseSearchBackend()
+
+
+def search(user_id, query, limit=LIMIT):
+    """Return the best matches of ``query`` among the objects of a user"""
+    return get_backend().search(user_id, query, limit)
+
+
+class SearchBackend:
+    """
+    Interface of the search backends. ``index`` and ``remove`` are called
+    by signals whenever an indexed object is saved or deleted, ``rebuild``
+    indexes every object again.
+    """
+
+    def setup(self, connection=default_connection):
+        pass
+
+    def teardown(self, connection=default_connection):
+        pass
+
+    def index(self, instance):
+        pass
+
+    def remove(self, instance):
+        pass
+
+    def remove_ids(self, model, ids):
+        """Remove the rows of ``model`` deleted without signals"""
+        pass
+
+    def index_queryset(self, queryset):
+        """Index the rows of a queryset, for rows saved without signals"""
+        pass
+
+    def rebuild(self, connection=default_connection):
+        """Index every object again, return the number of documents"""
+        return 0
+
+    def search(self, user_id, query, limit=LIMIT):
+        raise NotImplementedError
+
+
+class DatabaseSearchBackend(SearchBackend):
+    """
+    Search with plain LIKE queries, for databases without a full-text
+    index. Nothing is indexed, so every search scans the user's rows.
+    Matches in titles come first.
+    """
+
+    def search(self, user_id, query, limit=LIMIT):
+        words = (query or "").lower().split()[:MAX_TERMS]
+        if not words:
+            return []
+
+        def matching(fields):
+            condition = Q()
+            for word in words:
+                any_field = Q()
+                for field in fields:
+                    any_field |= Q(**{f"{field}__icontains": word})
+                condition &= any_field
+            return condition
+
+        titles = []
+        bodies = []
+        for source in SOURCES:
+            fields = [source.title] + ([source.body] if source.body else [])
+            rows = source.model.objects.filter(
+                matching(fields), **{source.owner: user_id, source.live: True}
+            ).values_list(*get_fields(source))[:limit]
+            for row in rows:
+                in_title = all(word in row[2].lower() for word in words)
+                (titles if in_title else bodies).append(
+                    make_result(source.kind, row, words)
+                )
+        return (titles + bodies)[:limit]
+
+
+class SQLiteSearchBackend(SearchBackend):
+    """
+    Search with an SQLite FTS5 table holding one row per course, note,
+    file and link, ranked by BM25 with titles weighing ten times more
+    than bodies.
+
+    Every word is indexed prefixed with its owner, ``<user id>u<word>``,
+    so the terms of a query and the expansion of a prefix only read the
+    postings of one user and a search costs the same however many users
+    share the index. The rowid is ``id * 4 + kind`` so a row is replaced
+    and deleted without a lookup. The index keeps no word positions,
+    snippets are cut from the rows themselves.
+    """
+
+    table = "assistor_search"
+
+    def create_sql(self):
+        return (
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} "
+            "USING fts5(title, body, tokenize = 'unicode61', detail = column)"
+        )
+
+    def insert_sql(self):
+        return (
+            f"INSERT OR REPLACE INTO {self.table} (rowid, title, body) "
+            "VALUES (%s, %s, %s)"
+        )
+
+    def search_sql(self):
+        return (
+            f"SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s "
+            f"ORDER BY bm25({self.table}, 10.0, 1.0) LIMIT %s"
+        )
+
+    def rowid(self, kind, object_id):
+        return object_id * len(KINDS) + KINDS.index(kind)
+
+    def scope(self, user_id, text):
+        """Return the words of a text prefixed with their owner"""
+        return " ".join(f"{user_id}u{word}" for word in get_words(text))
+
+    def row(self, kind, object_id, user_id, title, body):
+        """Return the parameters of ``insert_sql`` for an object"""
+        return [
+            self.rowid(kind, object_id),
+            self.scope(user_id, title),
+            self.scope(user_id, body),
+        ]
+
+    def match(self, user_id, words):
+        """
+        Return the FTS5 query matching every word of a user, the last one
+        as a prefix since it may not be typed completely yet.
+        """
+        phrases = [f'"{user_id}u{word}"' for word in words]
+        phrases[-1] += "*"
+        return " AND ".join(phrases)
+
+    def setup(self, connection=default_connection):
+        with connection.cursor() as cursor:
+            cursor.execute(self.create_sql())
+
+    def teardown(self, connection=default_connection):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {self.table}")
+
+    def index(self, instance):
+        source = BY_MODEL[type(instance)]
+        user_id, title, body = document(instance)
+        with default_connection.cursor() as cursor:
+            cursor.execute(
+                self.insert_sql(),
+                self.row(source.kind, instance.id, user_id, title, body),
+            )
+
+    def remove(self, instance):
+        source = BY_MODEL[type(instance)]
+        with default_connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {self.table} WHERE rowid = %s",
+                [self.rowid(source.kind, instance.id)],
+            )
+
+    def remove_ids(self, model, ids):
+        kind = BY_MODEL[model].kind
+        with default_connection.cursor() as cursor:
+            cursor.executemany(
+                f"DELETE FROM {self.table} WHERE rowid = %s",
+                [[self.rowid(kind, object_id)] for object_id in ids],
+            )
+
+    def write(self, cursor, queryset):
+        """Index the rows of a queryset, return how many were written"""
+        source = BY_MODEL[queryset.model]
+        fields = ["id", source.owner, source.title]
+        if source.body:
+            fields.append(source.body)
+        rows = queryset.order_by().values_list(*fields).iterator(chunk_size=BATCH_SIZE)
+
+        count = 0
+        batch = []
+        for object_id, user_id, title, *body in rows:
+            body = body[0] if body else ""
+            batch.append(self.row(source.kind, object_id, user_id, title, body))
+            if len(batch) == BATCH_SIZE:
+                cursor.executemany(self.insert_sql(), batch)
+                count += len(batch)
+                batch = []
+        cursor.executemany(self.insert_sql(), batch)
+        return count + len(batch)
+
+    def index_queryset(self, queryset):
+        with default_connection.cursor() as cursor:
+            self.write(cursor, queryset)
+
+    def rebuild(self, connection=default_connection):
+        count = 0
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table}")
+            for source in SOURCES:
+                count += self.write(cursor, source.model._base_manager.using(connection.alias))
+
+            # Merge the index segments for faster queries
+            cursor.execute(f"INSERT INTO {self.table} ({self.table}) VALUES ('optimize')")
+        return count
+
+    def search(self, user_id, query, limit=LIMIT):
+        words = get_words(query)[:MAX_TERMS]
+        if not words:
+            return []
+        with default_connection.cursor() as cursor:
+            cursor.execute(self.search_sql(), [self.match(user_id, words), limit])
+            hits = [
+                (KINDS[rowid % len(KINDS)], rowid // len(KINDS))
+                for rowid, in cursor.fetchall()
+            ]
+        return load_results(user_id, hits, words)
@@ -0,0 +1,108 @@
+from django.urls import reverse
+
+from .models import Course, File, Instructor, Link, Note, Reminder
+
+
+def download_url(course_id, file_id):
+    return reverse("file_download", args=[course_id, file_id])
+
+
+# Public name of each serialized field and the column it is read from,
+# with an optional function turning the column value into the output.
+# A field built from several columns passes them all to the function.
+FIELDS = {
+    Course: {
+        "id": ("id", None),
+        "user": ("user_id", None),
+        "title": ("title", None),
+        "start_date": ("start_date", None),
+        "completion_date": ("completion_date", None),
+        "grade": ("grade", None),
+        "provider": ("provider", None),
+        "note_count": ("note_count", None),
+        "file_count": ("file_count", None),
+        "link_count": ("link_count", None),
+        "instructor_count": ("instructor_count", None),
+        "last_activity": ("last_activity", None),
+    },
+    Instructor: {
+        "id": ("id", None),
+        "course": ("course_id", None),
+        "title": ("title", dict(Instructor.Titles.choices).get),
+        "first_name": ("first_name", None),
+        "last_name": ("last_name", None),
+        "email": ("email", None),
+    },
+    Note: {
+        "id": ("id", None),
+        "course": ("course_id", None),
+        "title": ("title", None),
+        "content": ("content", None),
+    },
+    File: {
+        "id": ("id", None),
+        "course": ("course_id", None),
+        "name": ("name", None),
+        "category": ("category", dict(File.CATEGORIES).get),
+        "file": (("course_id", "id"), download_url),
+    },
+    Link: {
+        "id": ("id", None),
+        "course": ("course_id", None),
+        "name": ("name", None),
+        "url": ("url", None),
+    },
+    Reminder: {
+        "id": ("id", None),
+        "user": ("user_id", None),
+        "name": ("name", None),
+        "time": ("time", None),
+    },
+}
+
+
+def parse_fields(model, value):
+    """
+    Return the fields selected by a comma separated ``fields`` parameter,
+    all of them when it is empty. Raise ValueError for unknown fields.
+    """
+    if not value:
+        return list(FIELDS[model])
+    fields = [field.strip() for field in value.split(",") if field.strip()]
+    unknown = [field for field in fields if field not in FIELDS[model]]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return fields
+
+
+def columns(model, fields):
+    """Return the columns to pass to values() for the given fields"""
+    selected = []
+    for field in fields:
+        column = FIELDS[model][field][0]
+        selected += column if isinstance(column, tuple) else [column]
+    return list(dict.fromkeys(selected))
+
+
+def serialize_row(model, row, fields):
+    """Serialize a values() row without building a model instance"""
+    data = {}
+    for field in fields:
+        column, convert = FIELDS[model][field]
+        if isinstance(column, tuple):
+            data[field] = convert(*(row[name] for name in column))
+            continue
+        value = row[column]
+        data[field] = convert(value) if convert and value is not None else value
+    return data
+
+
+def serialize_many(queryset, fields=None):
+    """
+    Serialize every row of ``queryset`` in a single query, reading the
+    selected fields (all of them by default) with values().
+    """
+    model = queryset.model
+    fields = fields or list(FIELDS[model])
+    rows = queryset.values(*columns(model, fields))
+    return [serialize_row(model, row, fields) for row in rows.iterator()]
@@ -0,0 +1,202 @@
+import logging
+import re
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.signals import request_started
+from django.db import connections, transaction
+from django.db.backends.signals import connection_created
+from django.db.models.fields.files import FieldFile
+from django.db.models.signals import post_delete, post_init, post_save, pre_delete
+from django.dispatch import receiver
+
+from . import events, search, timing
+from .caching import invalidate_course, invalidate_courses, invalidate_reminders
+from .models import Course, File, Instructor, Link, Note, Reminder, course_user_id, deleting
+
+logger = logging.getLogger(__name__)
+
+
+def invalidate(function, object_id):
+    # Invalidate now so the writing request never reads a stale fragment,
+    # and again after commit so a fragment cached by another request
+    # before the commit is dropped too
+    function(object_id)
+    transaction.on_commit(lambda: function(object_id))
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+def course_changed(sender, instance, **kwargs):
+    invalidate(invalidate_courses, instance.user_id)
+    invalidate(invalidate_course, instance.id)
+
+
+@receiver(post_save, sender=Note)
+@receiver(post_delete, sender=Note)
+@receiver(post_save, sender=File)
+@receiver(post_delete, sender=File)
+@receiver(post_save, sender=Instructor)
+@receiver(post_delete, sender=Instructor)
+@receiver(post_save, sender=Link)
+@receiver(post_delete, sender=Link)
+def course_child_changed(sender, instance, **kwargs):
+    invalidate(invalidate_course, instance.course_id)
+
+
+# Counter of the course kept for each kind of child
+COUNTERS = {Note: "note_count", File: "file_count", Link: "link_count", Instructor: "instructor_count"}
+
+
+@receiver(post_save, sender=Note)
+@receiver(post_save, sender=File)
+@receiver(post_save, sender=Instructor)
+@receiver(post_save, sender=Link)
+def course_child_saved(sender, instance, created, raw=False, **kwargs):
+    # Fixtures are counted by the rebuild_course_counters command
+    if raw:
+        return
+    deltas = {COUNTERS[sender]: 1} if created else {}
+    Course.objects.filter(id=instance.course_id).record_activity(**deltas)
+    # The course cards show the counts
+    invalidate(invalidate_courses, course_user_id(instance))
+
+
+@receiver(pre_delete, sender=Course)
+def course_deleting(sender, instance, **kwargs):
+    # Only deletes run through Course.delete() or CourseQuerySet.delete()
+    # collect them, a cascade from a user counts the children down
+    if getattr(deleting, "ids", None) is not None:
+        deleting.ids.add(instance.id)
+
+
+@receiver(post_delete, sender=Note)
+@receiver(post_delete, sender=File)
+@receiver(post_delete, sender=Instructor)
+@receiver(post_delete, sender=Link)
+def course_child_deleted(sender, instance, **kwargs):
+    if instance.course_id in (getattr(deleting, "ids", None) or ()):
+        return
+    Course.objects.filter(id=instance.course_id).record_activity(**{COUNTERS[sender]: -1})
+    invalidate(invalidate_courses, course_user_id(instance))
+
+
+@receiver(post_save, sender=Reminder)
+@receiver(post_delete, sender=Reminder)
+def reminder_changed(sender, instance, **kwargs):
+    invalidate(invalidate_reminders, instance.user_id)
+
+
+@receiver(post_save, sender=Reminder)
+def reminder_saved(sender, instance, created, **kwargs):
+    events.publish_reminders(instance.user_id, "created" if created else "updated", [instance])
+
+
+@receiver(post_delete, sender=Reminder)
+def reminder_deleted(sender, instance, **kwargs):
+    events.publish_reminders(instance.user_id, "deleted", [instance])
+
+
+def release_file(storage, name):
+    """Delete a stored file once no File row refers to it"""
+    if File.objects.filter(file=name).exists():
+        return
+
+    # Shared blobs decide themselves whether they can go
+    delete = getattr(storage, "delete_unused", storage.delete)
+    try:
+        delete(name)
+    except (OSError, SuspiciousFileOperation):
+        # The sweep_media command reclaims whatever is left behind
+        logger.exception("Could not delete the stored file %s", name)
+
+
+def release_after_commit(field_file):
+    storage = field_file.storage
+    name = field_file.name
+    if name:
+        transaction.on_commit(lambda: release_file(storage, name))
+
+
+def stored_name(instance):
+    # Read the raw attribute, the descriptor would load a deferred field
+    value = instance.__dict__.get("file")
+    return getattr(value, "name", value)
+
+
+@receiver(post_init, sender=File)
+def file_loaded(sender, instance, **kwargs):
+    # Remember the stored name to notice when it is replaced
+    instance._stored_name = stored_name(instance)
+
+
+@receiver(post_save, sender=File)
+def file_saved(sender, instance, **kwargs):
+    replaced = instance._stored_name
+    current = stored_name(instance)
+    if replaced and current is not None and replaced != current:
+        field = File._meta.get_field("file")
+        release_after_commit(FieldFile(instance, field, replaced))
+    instance._stored_name = current
+
+
+@receiver(post_delete, sender=File)
+def file_deleted(sender, instance, **kwargs):
+    release_after_commit(instance.file)
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_save, sender=Note)
+@receiver(post_save, sender=File)
+@receiver(post_save, sender=Link)
+def index_saved(sender, instance, **kwargs):
+    # The index lives in the database, so it commits or rolls back with
+    # the row
+    search.get_backend().index(instance)
+
+
+@receiver(post_delete, sender=Course)
+@receiver(post_delete, sender=Note)
+@receiver(post_delete, sender=File)
+@receiver(post_delete, sender=Link)
+def index_deleted(sender, instance, **kwargs):
+    search.get_backend().remove(instance)
+
+
+PRAGMA_RE = re.compile(r"^-?\w+$")
+
+
+@receiver(connection_created)
+def set_sqlite_pragmas(sender, connection, **kwargs):
+    """Set ``ASSISTOR_SQLITE_PRAGMAS`` on every new SQLite connection"""
+    if connection.vendor != "sqlite":
+        return
+    pragmas = getattr(settings, "ASSISTOR_SQLITE_PRAGMAS", {})
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            if not PRAGMA_RE.match(name) or not PRAGMA_RE.match(str(value)):
+                raise ValueError(f"Invalid SQLite pragma {name} = {value}")
+            cursor.execute(f"PRAGMA {name} = {value}")
+
+
+@receiver(connection_created)
+def measure_queries(sender, connection, **kwargs):
+    """Add the queries of every connection to the timings of the request"""
+    if timing.record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(timing.record_query)
+
+
+@receiver(request_started)
+def check_connections(sender, **kwargs):
+    """
+    Close the connections kept from a previous request that the database
+    dropped, when ``CONN_HEALTH_CHECKS`` is set, so the request opens a
+    new one instead of failing. Django 4.1 does this itself.
+    """
+    for connection in connections.all():
+        if (
+            connection.settings_dict.get("CONN_HEALTH_CHECKS")
+            and connection.connection is not None
+            and not connection.is_usable()
+        ):
+            connection.close()
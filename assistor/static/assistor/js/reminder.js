@@ -1,8 +1,72 @@
 document.addEventListener("DOMContentLoaded", () => {
+    followReminders();
     document.querySelector("#addReminderButton").onclick = addReminder;
     document.querySelector("#editReminderButton").onclick = editReminder;
 });
 
+// Keep the reminders on the page up to date while it is open
+function followReminders() {
+    if (!window.EventSource) {
+        return;
+    }
+
+    // Only served under ASGI, elsewhere the stream fails and stays closed
+    const events = new EventSource("/reminders/events");
+    events.addEventListener("created", event => showReminder(JSON.parse(event.data)));
+    events.addEventListener("updated", event => showReminder(JSON.parse(event.data)));
+    events.addEventListener("deleted", event => removeReminder(JSON.parse(event.data)));
+    events.addEventListener("due", event => alertReminder(JSON.parse(event.data)));
+}
+
+function findReminderCard(reminder) {
+    const link = document.querySelector('#reminderList a[href="/reminders/' + reminder.id + '"]');
+    return link ? link.closest(".card") : null;
+}
+
+function showReminder(reminder) {
+    const list = document.querySelector("#reminderList");
+    if (!list) {
+        return;
+    }
+    let card = findReminderCard(reminder);
+
+    // Add a card like the ones of the page
+    if (!card) {
+        const column = document.createElement("div");
+        column.className = "col-sm-3 mb-4";
+        column.innerHTML = '<div class="card bg-light-teal text-teal text-center align-middle mb-4 clickable" style="height: 20rem;">' +
+            '<div class="card-body d-flex flex-column justify-content-center">' +
+            '<h5 class="card-title"></h5><p class="card-text"></p>' +
+            '<a href="/reminders/' + reminder.id + '" class="stretched-link"></a></div></div>';
+        list.appendChild(column);
+        card = column.querySelector(".card");
+    }
+    card.querySelector(".card-title").textContent = reminder.name;
+    card.querySelector(".card-text").textContent = new Date(reminder.time).toLocaleString();
+}
+
+function removeReminder(reminder) {
+    const card = findReminderCard(reminder);
+    if (card) {
+        card.parentElement.remove();
+    }
+}
+
+function alertReminder(reminder) {
+    const alert = document.createElement("div");
+    alert.className = "alert alert-info alert-dismissible fade show";
+    alert.setAttribute("role", "alert");
+    alert.textContent = reminder.name + " is due";
+
+    const close = document.createElement("button");
+    close.type = "button";
+    close.className = "btn-close";
+    close.setAttribute("data-bs-dismiss", "alert");
+    close.setAttribute("aria-label", "Close");
+    alert.appendChild(close);
+    document.querySelector("main").prepend(alert);
+}
+
 function addReminder() {
     const request = new XMLHttpRequest();
     const form = document.forms['newReminderForm'];
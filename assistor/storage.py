@@ -0,0 +1,83 @@
+import hashlib
+import os
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+
+# Directory of the storage holding the blobs
+BLOB_DIR = "blobs"
+
+# Suffix of the file marking when a blob was last saved again. The blob
+# keeps its modification time, which the downloads use as a validator.
+SAVED_SUFFIX = ".saved"
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    File system storage naming every file after the SHA-256 of its
+    content, so a file uploaded many times is stored once.
+
+    The name of a blob is ``blobs/<first two hex digits>/<hash><ext>``.
+    A blob is shared by every File row with that name and is only freed
+    by ``delete_unused`` once none of them is left.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # The name is decided by the content in _save
+        return name
+
+    def blob_name(self, digest, name):
+        extension = os.path.splitext(self.get_valid_name(os.path.basename(name)))[1]
+        return "/".join([BLOB_DIR, digest[:2], digest + extension.lower()])
+
+    def _save(self, name, content):
+        # Hash the content while streaming it to a temporary file next to
+        # the blobs, so the final rename stays on the same file system
+        directory = os.path.join(self.location, BLOB_DIR)
+        os.makedirs(directory, exist_ok=True)
+        digest = hashlib.sha256()
+        handle, temporary = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(handle, "wb") as f:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    f.write(chunk)
+
+            name = self.blob_name(digest.hexdigest(), name)
+            path = self.path(name)
+            if os.path.exists(path):
+                # Already stored, mark it as used again
+                with open(path + SAVED_SUFFIX, "a"):
+                    pass
+                os.utime(path + SAVED_SUFFIX)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(temporary, path)
+                if self.file_permissions_mode is not None:
+                    os.chmod(path, self.file_permissions_mode)
+        finally:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+        return name
+
+    def delete_unused(self, name):
+        """
+        Delete a blob no File row refers to any more. A blob saved again
+        within ``ASSISTOR_BLOB_GRACE`` seconds is kept, since a row for
+        that upload may not be committed yet.
+        """
+        grace = getattr(settings, "ASSISTOR_BLOB_GRACE", 60)
+        path = self.path(name)
+        try:
+            saved = os.path.getmtime(path)
+        except FileNotFoundError:
+            return
+        if os.path.exists(path + SAVED_SUFFIX):
+            saved = max(saved, os.path.getmtime(path + SAVED_SUFFIX))
+        if time.time() - saved < grace:
+            return
+        self.delete(name)
+        if os.path.exists(path + SAVED_SUFFIX):
+            os.remove(path + SAVED_SUFFIX)
@@ -0,0 +1,133 @@
+import os
+import random
+import tempfile
+import threading
+import time
+
+from django.db import DatabaseError, connection
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.test.utils import override_settings
+
+# Pragmas of a SQLite database Django opens with no tuning: the rollback
+# journal, and the 5 seconds busy timeout of the sqlite3 module
+ROLLBACK = {"journal_mode": "DELETE", "synchronous": "FULL", "busy_timeout": 5000}
+
+COURSES = 10
+
+NOTES = 1000
+
+SCHEMA = [
+    "CREATE TABLE note (id INTEGER PRIMARY KEY, course_id INTEGER NOT NULL, "
+    "title TEXT NOT NULL, content TEXT NOT NULL, creation_time REAL NOT NULL)",
+    "CREATE INDEX note_course ON note (course_id)",
+    "CREATE TABLE reminder (id INTEGER PRIMARY KEY, name TEXT NOT NULL, time REAL NOT NULL)",
+]
+
+
+def connect(path):
+    """Open a connection to ``path``, getting the pragmas like the app's"""
+    wrapper = DatabaseWrapper({**connection.settings_dict, "NAME": path}, alias="stress")
+    wrapper.ensure_connection()
+    return wrapper
+
+
+def create(path):
+    wrapper = connect(path)
+    with wrapper.cursor() as cursor:
+        for statement in SCHEMA:
+            cursor.execute(statement)
+        cursor.executemany(
+            "INSERT INTO note (course_id, title, content, creation_time) VALUES (%s, %s, %s, %s)",
+            [(i % COURSES, f"Note {i}", f"Lecture {i}", time.time()) for i in range(NOTES)],
+        )
+    wrapper.close()
+
+
+def read(cursor):
+    # Like the course page, the count and the latest notes of a course
+    course = random.randrange(COURSES)
+    cursor.execute("SELECT COUNT(*) FROM note WHERE course_id = %s", [course])
+    cursor.fetchone()
+    cursor.execute(
+        "SELECT id, title, content FROM note WHERE course_id = %s ORDER BY id DESC LIMIT 24",
+        [course],
+    )
+    cursor.fetchall()
+
+
+def write(cursor):
+    # Like note_edit then reminder_new, each save is its own transaction
+    cursor.execute(
+        "UPDATE note SET content = %s, creation_time = %s WHERE id = %s",
+        [f"Edited {time.time()}", time.time(), random.randrange(1, NOTES + 1)],
+    )
+    cursor.execute("INSERT INTO reminder (name, time) VALUES (%s, %s)", ["Exam", time.time()])
+
+
+def worker(path, operation, deadline, results, barrier):
+    wrapper = connect(path)
+    latencies = []
+    errors = 0
+    try:
+        barrier.wait()
+        with wrapper.cursor() as cursor:
+            while time.perf_counter() < deadline[0]:
+                started = time.perf_counter()
+                try:
+                    operation(cursor)
+                except DatabaseError:
+                    errors += 1
+                else:
+                    latencies.append(time.perf_counter() - started)
+    finally:
+        wrapper.close()
+    results.append((operation.__name__, latencies, errors))
+
+
+def percentile(latencies, fraction):
+    """Return the percentile of sorted ``latencies`` in milliseconds"""
+    if not latencies:
+        return None
+    return round(latencies[min(int(fraction * len(latencies)), len(latencies) - 1)] * 1000, 2)
+
+
+def run(pragmas, readers=4, writers=4, seconds=2.0):
+    """
+    Run ``readers`` and ``writers`` threads for ``seconds`` on a new
+    database opened with ``pragmas``. Return by operation the number
+    done, the operations per second, their median and 95th percentile
+    in milliseconds, and the number which failed, mostly with "database
+    is locked".
+    """
+    results = []
+    deadline = [0]
+    barrier = threading.Barrier(readers + writers + 1)
+    with tempfile.TemporaryDirectory() as directory, override_settings(
+        ASSISTOR_SQLITE_PRAGMAS=pragmas
+    ):
+        path = os.path.join(directory, "stress.sqlite3")
+        create(path)
+        threads = [
+            threading.Thread(target=worker, args=(path, operation, deadline, results, barrier))
+            for operation in [read] * readers + [write] * writers
+        ]
+        for thread in threads:
+            thread.start()
+        deadline[0] = time.perf_counter() + seconds
+        barrier.wait()
+        for thread in threads:
+            thread.join()
+
+    summary = {}
+    for name in ["read", "write"]:
+        latencies = sorted(
+            latency for n, measures, _ in results if n == name for latency in measures
+        )
+        summary[name] = {
+            "count": len(latencies),
+            "per_second": round(len(latencies) / seconds, 1),
+            "p50": percentile(latencies, 0.5),
+            "p95": percentile(latencies, 0.95),
+            "errors": sum(errors for n, _, errors in results if n == name),
+        }
+    return summary
@@ -0,0 +1,97 @@
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from assistor.models import Course, User, File, Link, Instructor, Reminder, Note
+
+class CoursesApiTestCase(TestCase):
+    """Test the courses API"""
+    def setUp(self):
+        user = User.objects.create_user(first_name="admin", last_name="admin", username = "admin",
+        email="admin@admin.com", password="admin")
+        for i in range(30):
+            Course.objects.create(user=user, title=f"TestCourse{i}", provider="X University")
+        other = User.objects.create_user(first_name="Azain", last_name="Ayub", username = "azainayub",
+        email="azain.ayub2014@gmail.com", password="azain")
+        Course.objects.create(user=other, title="Human Computer Interaction")
+
+    def test_courses_list(self):
+        """Check the courses are listed a page at a time"""
+        self.client.login(username="admin", password="admin")
+        response = self.client.get(reverse("api_courses"))
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(len(data["results"]), 24)
+        self.assertEqual(set(data["results"][0]), {
+            "id", "user", "title", "start_date", "completion_date", "grade", "provider",
+            "note_count", "file_count", "link_count", "instructor_count", "last_activity",
+        })
+
+        response = self.client.get(reverse("api_courses"), {"cursor": data["next"]})
+        data = response.json()
+        self.assertEqual(len(data["results"]), 6)
+        self.assertIsNone(data["next"])
+
+    def test_courses_fields(self):
+        """Check only the selected fields are returned"""
+        self.client.login(username="admin", password="admin")
+        response = self.client.get(reverse("api_courses"), {"fields": "id,title"})
+        self.assertEqual(set(response.json()["results"][0]), {"id", "title"})
+
+    def test_courses_unknown_field(self):
+        """Check an unknown field is rejected"""
+        self.client.login(username="admin", password="admin")
+        response = self.client.get(reverse("api_courses"), {"fields": "id,password"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_courses_read_only(self):
+        """Check the API only answers GET"""
+        self.client.login(username="admin", password="admin")
+        response = self.client.post(reverse("api_courses"), {"title": "Test"})
+        self.assertEqual(response.status_code, 405)
+
+class CourseChildrenApiTestCase(TestCase):
+    """Test the notes, files, instructors and links API"""
+    def setUp(self):
+        user = User.objects.create_user(first_name="admin", last_name="admin", username = "admin",
+        email="admin@admin.com", password="admin")
+        self.course = Course.objects.create(user=user, title="Information Security")
+        for i in range(3):
+            Note.objects.create(course=self.course, title=f"Test{i}", content="Lorem Ipsum....")
+            File.objects.create(course=self.course, name=f"TestFile{i}", category="SL", file=f"slides{i}.pdf")
+            Instructor.objects.create(course=self.course, title="DR", first_name=f"Test{i}", email=f"test{i}@test.com")
+            Link.objects.create(course=self.course, name=f"TestLink{i}", url="https://hello.com")
+        Reminder.objects.create(user=user, name="Test", time=timezone.now())
+
+    def test_children_match_serialize(self):
+        """Check the rows are serialized like the model serialize()"""
+        self.client.login(username="admin", password="admin")
+        for name, queryset in [
+            ("api_notes", self.course.notes.all()),
+            ("api_files", self.course.files.all()),
+            ("api_instructors", self.course.instructors.all()),
+            ("api_links", self.course.links.all()),
+        ]:
+            response = self.client.get(reverse(name, args=[self.course.id]))
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()["results"], [obj.serialize() for obj in queryset])
+
+    def test_children_query_count(self):
+        """Check a list costs the course lookup and one values() query"""
+        self.client.login(username="admin", password="admin")
+        with self.assertNumQueries(4):
+            self.client.get(reverse("api_notes", args=[self.course.id]))
+
+    def test_children_of_other_user(self):
+        """Check the children of another user's course are not found"""
+        User.objects.create_user(first_name="Azain", last_name="Ayub", username = "azainayub",
+        email="azain.ayub2014@gmail.com", password="azain")
+        self.client.login(username="azainayub", password="azain")
+        response = self.client.get(reverse("api_notes", args=[self.course.id]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_reminders_list(self):
+        """Check the reminders are listed"""
+        self.client.login(username="admin", password="admin")
+        response = self.client.get(reverse("api_reminders"), {"fields": "name"})
+        self.assertEqual(response.json()["results"], [{"name": "Test"}])
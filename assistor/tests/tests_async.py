@@ -0,0 +1,116 @@
+from django.core.cache import cache
+from django.test import AsyncClient, TestCase, TransactionTestCase, override_settings
+from django.urls import include, path, reverse
+
+from assistor import asyncviews
+from assistor.models import Course, Instructor, Link, Note, Reminder, User
+
+# The assistor URLs with the async pages matched first
+urlpatterns = [
+    path("", asyncviews.index, name="index"),
+    path("courses", asyncviews.courses, name="courses"),
+    path("courses/<int:course_id>", asyncviews.course, name="course"),
+    path("courses/<int:course_id>/notes", asyncviews.notes, name="notes"),
+    path("courses/<int:course_id>/files", asyncviews.files, name="files"),
+    path("reminders", asyncviews.reminders, name="reminders"),
+    path("", include("assistor.urls")),
+]
+
+
+def create_course(user):
+    course = Course.objects.create(user=user, title="Information Security")
+    Note.objects.create(course=course, title="Ciphers", content="Caesar and Vigenere")
+    Instructor.objects.create(course=course, first_name="Alan", last_name="Turing")
+    Link.objects.create(course=course, name="Crypto", url="https://example.com/crypto")
+    return course
+
+
+@override_settings(ROOT_URLCONF=__name__, ASSISTOR_CONCURRENT_QUERIES=False)
+class AsyncViewsTestCase(TestCase):
+    """Test the async versions of the read-heavy pages"""
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(first_name="admin", last_name="admin", username = "admin",
+        email="admin@admin.com", password="admin")
+        self.course = create_course(self.user)
+        Reminder.objects.create(user=self.user, name="Exam", time="2030-01-01T09:00:00Z")
+        self.client.force_login(self.user)
+        self.async_client = AsyncClient()
+        self.async_client.force_login(self.user)
+
+    def test_pages_render(self):
+        """Check every async page shows the rows of the user"""
+        pages = {
+            reverse("index"): ["Information Security", "Exam"],
+            reverse("courses"): ["Information Security"],
+            reverse("course", args=[self.course.id]): ["Ciphers", "Turing", "Crypto"],
+            reverse("notes", args=[self.course.id]): ["Ciphers"],
+            reverse("files", args=[self.course.id]): ["Files"],
+            reverse("reminders"): ["Exam"],
+        }
+        for url, texts in pages.items():
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, url)
+            for text in texts:
+                self.assertContains(response, text)
+
+    def test_json_pages(self):
+        """Check the JSON variants of the async pages"""
+        response = self.client.get(reverse("notes", args=[self.course.id]), {"format": "json"})
+        self.assertEqual([note["title"] for note in response.json()["results"]], ["Ciphers"])
+        response = self.client.get(reverse("reminders"), {"format": "json"})
+        self.assertEqual([reminder["name"] for reminder in response.json()["results"]], ["Exam"])
+
+    def test_login_required(self):
+        """Check anonymous users are sent to the login page"""
+        self.client.logout()
+        response = self.client.get(reverse("course", args=[self.course.id]))
+        self.assertRedirects(response, f"{reverse('login')}?next=/courses/{self.course.id}")
+
+    def test_course_of_another_user(self):
+        """Check a course and its children are hidden from other users"""
+        other = User.objects.create_user(username="other", email="other@other.com", password="other")
+        course = create_course(other)
+        for name in ["course", "notes", "files"]:
+            response = self.client.get(reverse(name, args=[course.id]))
+            self.assertEqual(response.status_code, 404)
+
+    def test_cached_lists_are_not_read(self):
+        """Check the home page skips the lists of its cached fragments"""
+        self.client.get(reverse("index"))
+        with self.assertNumQueries(2):
+            # The session and the user
+            response = self.client.get(reverse("index"))
+        self.assertContains(response, "Information Security")
+
+    def test_not_modified(self):
+        """Check the async pages answer 304 to their current ETag"""
+        url = reverse("course", args=[self.course.id])
+        self.client.get(reverse("login"))
+        etag = self.client.get(url)["ETag"]
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    async def test_timings(self):
+        """Check the timings count the queries of the async views under ASGI"""
+        response = await self.async_client.get(reverse("course", args=[self.course.id]))
+        self.assertEqual(response.status_code, 200)
+        queries = int(response["Server-Timing"].split('desc="')[1].split()[0])
+        self.assertGreaterEqual(queries, 6)
+
+
+@override_settings(ROOT_URLCONF=__name__, ASSISTOR_CONCURRENT_QUERIES=True)
+class ConcurrentQueriesTestCase(TransactionTestCase):
+    """Test the async pages reading from threads with their own connections"""
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(first_name="admin", last_name="admin", username = "admin",
+        email="admin@admin.com", password="admin")
+        self.course = create_course(self.user)
+        self.client.force_login(self.user)
+
+    def test_course_page(self):
+        """Check the course page is read concurrently from committed rows"""
+        response = self.client.get(reverse("course", args=[self.course.id]))
+        self.assertEqual(response.status_code, 200)
+        for text in ["Ciphers", "Turing", "Crypto"]:
+            self.assertContains(response, text)
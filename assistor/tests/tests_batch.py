@@ -0,0 +1,110 @@
+import json
+from datetime import datetime, timezone
+from django.test import TestCase
+from django.urls import reverse
+
+from assistor.batch import MAX_OPERATIONS
+from assistor.models import Course, User, Reminder, Note
+from assistor.search import search
+
+
+class BatchTestCase(TestCase):
+    """Test creating, updating and deleting notes and reminders in one request"""
+    def setUp(self):
+        self.user = User.objects.create_user(first_name="admin", last_name="admin", username = "admin",
+        email="admin@admin.com", password="admin")
+        self.other = User.objects.create_user(first_name="other", last_name="other", username = "other",
+        email="other@other.com", password="other")
+        self.course = Course.objects.create(user=self.user, title="Information Security")
+        self.note = Note.objects.create(course=self.course, title="Ciphers", content="Block ciphers")
+        self.old_note = Note.objects.create(course=self.course, title="Old", content="To delete")
+        other_course = Course.objects.create(user=self.other, title="Other")
+        self.other_note = Note.objects.create(course=other_course, title="Other", content="Not yours")
+        self.client.login(username="admin", password="admin")
+
+    def post(self, url, operations):
+        return self.client.post(url, json.dumps(operations), content_type="application/json")
+
+    def test_notes_batch(self):
+        """Check every operation is applied and reported in order"""
+        url = reverse("notes_batch", args=[self.course.id])
+        response = self.post(url, [
+            {"op": "create", "data": {"title": "Hashing", "content": "SHA-256"}},
+            {"op": "update", "id": self.note.id, "data": {"content": "Stream ciphers"}},
+            {"op": "delete", "id": self.old_note.id},
+            {"op": "create", "data": {"title": ""}},
+            {"op": "delete", "id": self.other_note.id},
+            {"op": "rename", "id": self.note.id},
+        ])
+        self.assertEqual(response.status_code, 200)
+        results = response.json()["results"]
+        self.assertEqual([r["status"] for r in results], [201, 200, 204, 400, 404, 400])
+        self.assertEqual([r["index"] for r in results], list(range(6)))
+        self.assertIn("content", results[3]["errors"])
+
+        self.note.refresh_from_db()
+        self.assertEqual(self.note.title, "Ciphers")
+        self.assertEqual(self.note.content, "Stream ciphers")
+        self.assertFalse(Note.objects.filter(id=self.old_note.id).exists())
+        self.assertTrue(Note.objects.filter(id=self.other_note.id).exists())
+        created = Note.objects.get(id=results[0]["data"]["id"])
+        self.assertEqual(created.course, self.course)
+
+        # Created and updated notes are searchable
+        titles = {result["title"] for result in search(self.user.id, "sha")}
+        self.assertEqual(titles, {"Hashing"})
+        titles = {result["title"] for result in search(self.user.id, "stream")}
+        self.assertEqual(titles, {"Ciphers"})
+
+    def test_one_operation_per_note(self):
+        """Check a second operation on the same note is rejected"""
+        url = reverse("notes_batch", args=[self.course.id])
+        response = self.post(url, [
+            {"op": "update", "id": self.note.id, "data": {"title": "First"}},
+            {"op": "delete", "id": self.note.id},
+        ])
+        results = response.json()["results"]
+        self.assertEqual([r["status"] for r in results], [200, 400])
+        self.assertEqual(Note.objects.get(id=self.note.id).title, "First")
+
+    def test_invalid_ids(self):
+        """Check ids which are not integers are rejected one by one"""
+        url = reverse("notes_batch", args=[self.course.id])
+        response = self.post(url, [
+            {"op": "update", "id": [self.note.id], "data": {}},
+            {"op": "delete", "id": {"id": self.note.id}},
+            {"op": "delete", "id": True},
+            {"op": "delete", "id": str(self.note.id)},
+        ])
+        self.assertEqual(response.status_code, 200)
+        results = response.json()["results"]
+        self.assertEqual([r["status"] for r in results], [400] * 4)
+        self.assertEqual(results[0]["errors"], {"id": ["Send an integer id."]})
+        self.assertTrue(Note.objects.filter(id=self.note.id).exists())
+
+    def test_reminders_batch(self):
+        """Check reminders are updated and sent again when moved"""
+        reminder = Reminder.objects.create(user=self.user, name="Exam", time=datetime(2022, 3, 4, 10, tzinfo=timezone.utc))
+        Reminder.objects.filter(id=reminder.id).update(notified_time=reminder.time)
+        response = self.post(reverse("reminders_batch"), [
+            {"op": "update", "id": reminder.id, "data": {"time": "2022-03-05T10:00"}},
+            {"op": "create", "data": {"name": "Assignment", "time": "2022-03-06T10:00"}},
+        ])
+        self.assertEqual([r["status"] for r in response.json()["results"]], [200, 201])
+        reminder.refresh_from_db()
+        self.assertEqual(reminder.name, "Exam")
+        self.assertEqual(reminder.time.day, 5)
+        self.assertIsNone(reminder.notified_time)
+        self.assertEqual(Reminder.objects.filter(user=self.user).count(), 2)
+
+    def test_invalid_body(self):
+        """Check a body which is not a list of operations is rejected"""
+        url = reverse("reminders_batch")
+        response = self.client.post(url, "{", content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+        response = self.post(url, {"op": "create"})
+        self.assertEqual(response.status_code, 400)
+        response = self.post(url, [{"op": "delete", "id": 1}] * (MAX_OPERATIONS + 1))
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 405)
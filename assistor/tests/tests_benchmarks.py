@@ -0,0 +1,40 @@
+import shutil
+import tempfile
+from django.test import TestCase, override_settings
+
+from assistor import benchmarks
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class BenchmarkTestCase(TestCase):
+    """Test the query budgets of the views"""
+
+    @classmethod
+    def tearDownClass(cls):
+        from django.conf import settings
+        shutil.rmtree(settings.MEDIA_ROOT)
+        super().tearDownClass()
+
+    def test_views_within_query_budget(self):
+        """Check every view runs no more queries than the small baseline"""
+        ids = benchmarks.seed(benchmarks.SIZES["small"])
+        results = benchmarks.run(self.client, ids, repeat=1)
+
+        # Every URL is benchmarked
+        self.assertEqual({key.split()[1] for key in results}, benchmarks.url_names())
+
+        # Time and memory depend on the machine, only queries are checked
+        baseline = benchmarks.load_baseline()["small"]
+        self.assertEqual(benchmarks.compare(results, baseline, time_factor=0, memory_factor=0), [])
+
+    def test_compare(self):
+        """Check the exceeded budgets are reported"""
+        baseline = {"GET index": {"queries": 4, "time": 0.01, "memory": 100000}}
+        results = {
+            "GET index": {"queries": 5, "time": 0.05, "memory": 100000},
+            "GET courses": {"queries": 3, "time": 0.01, "memory": 100000},
+        }
+        self.assertEqual(benchmarks.compare(results, baseline), [
+            "GET courses: no baseline",
+            "GET index: 5 queries, budget 4",
+            "GET index: 50.0 ms, budget 10.0 ms",
+        ])
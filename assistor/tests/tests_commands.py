@@ -0,0 +1,295 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+from django.core import mail
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from assistor import search
+from assistor.models import Course, User, File, Instructor, Link, Note, Reminder
+from assistor.notifiers import EmailNotifier, FileNotifier, Notifier
+from assistor.purge import CoursePurge
+from assistor.scheduler import ReminderScheduler
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), ASSISTOR_BLOB_GRACE=0)
+class SweepMediaTestCase(TestCase):
+    """Test the sweep_media command and the file deletion hooks"""
+
+    def setUp(self):
+        user = User.objects.create_user(first_name="admin", last_name="admin", username = "admin",
+        email="admin@...", password="admin")
+        self.course = Course.objects.create(user=user, title="Information Security")
+
+    def tearDown(self):
+        from django.conf import settings
+        shutil.rmtree(settings.MEDIA_ROOT, ignore_errors=True)
+
+    def create_file(self, name, content):
+        file = File(course=self.course, name=name)
+        file.file.save(name, ContentFile(content), save=True)
+        return file
+
+    def write(self, name, age=0):
+        from django.conf import settings
+        path = os.path.join(settings.MEDIA_ROOT, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(b"orphan")
+        os.utime(path, (time.time() - age, time.time() - age))
+        return path
+
+    def sweep(self, *args):
+        out = StringIO()
+        call_command("sweep_media", *args, stdout=out)
+        return out.getvalue()
+
+    def test_replaced_file_is_deleted(self):
+        """Check the old content of an edited file is deleted after commit"""
+        file = self.create_file("syllabus.pdf", b"Syllabus")
+        path = file.file.path
+        file = File.objects.get(id=file.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            file.file.save("syllabus.pdf", ContentFile(b"Syllabus v2"), save=True)
+        self.assertFalse(os.path.exists(path))
+        self.assertTrue(os.path.exists(file.file.path))
+
+    def test_course_delete_deletes_files(self):
+        """Check deleting a course deletes the content of its files"""
+        paths = [self.create_file(f"slides{i}.pdf", b"Slides %d" % i).file.path for i in range(3)]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.course.delete()
+        self.assertFalse(any(os.path.exists(path) for path in paths))
+
+    def test_sweep_deletes_orphans(self):
+        """Check old files no row refers to are deleted in batches"""
+        file = self.create_file("syllabus.pdf", b"Syllabus")
+        os.utime(file.file.path, (time.time() - 7200, time.time() - 7200))
+        orphans = [self.write(f"blobs/aa/orphan{i}.pdf", age=7200) for i in range(5)]
+        recent = self.write("blobs/aa/recent.pdf")
+
+        out = self.sweep("--batch-size", "2")
+        self.assertIn("Deleted 5 orphaned files", out)
+        self.assertTrue(os.path.exists(file.file.path))
+        self.assertTrue(os.path.exists(recent))
+        self.assertFalse(any(os.path.exists(path) for path in orphans))
+
+    def test_sweep_dry_run(self):
+        """Check a dry run deletes nothing"""
+        orphan = self.write("blobs/aa/orphan.pdf", age=7200)
+        out = self.sweep("--dry-run")
+        self.assertIn("Would delete blobs/aa/orphan.pdf", out)
+        self.assertTrue(os.path.exists(orphan))
+
+    def test_sweep_saved_markers(self):
+        """Check a file saved again is kept and markers go with their file"""
+        file = self.create_file("syllabus.pdf", b"Syllabus")
+        os.utime(file.file.path, (time.time() - 7200, time.time() - 7200))
+        live = self.write(file.file.name + ".saved", age=7200)
+        resaved = self.write("blobs/aa/resaved.pdf", age=7200)
+        self.write("blobs/aa/resaved.pdf.saved")
+        old = self.write("blobs/aa/old.pdf", age=7200)
+        old_marker = self.write("blobs/aa/old.pdf.saved", age=7200)
+        stray = self.write("blobs/aa/gone.pdf.saved", age=7200)
+
+        out = self.sweep()
+        self.assertIn("Deleted 2 orphaned files", out)
+        self.assertTrue(os.path.exists(live))
+        self.assertTrue(os.path.exists(resaved))
+        self.assertTrue(os.path.exists(resaved + ".saved"))
+        self.assertFalse(any(os.path.exists(path) for path in [old, old_marker, stray]))
+
+    def test_sweep_abandoned_uploads(self):
+        """Check chunked uploads are only deleted once abandoned"""
+        abandoned = self.write("uploads/1/abandoned/0.part", age=2 * 86400)
+        os.utime(os.path.dirname(abandoned), (time.time() - 2 * 86400,) * 2)
+        active = self.write("uploads/1/active/0.part")
+
+        out = self.sweep()
+        self.assertIn("Deleted 0 orphaned files and 1 abandoned uploads", out)
+        self.assertFalse(os.path.exists(abandoned))
+        self.assertTrue(os.path.exists(active))
+
+class ReminderSchedulerTestCase(TestCase):
+    """Test the reminder scheduler and its notifiers"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(first_name="admin", last_name="admin", username = "admin",
+        email="admin@admin.com", password="admin")
+        self.now = timezone.now()
+        self.sent = []
+
+    def scheduler(self, **kwargs):
+        notifier = Notifier()
+        notifier.send = self.sent.extend
+        return ReminderScheduler([notifier], clock=lambda: self.now, **kwargs)
+
+    def create(self, name, seconds):
+        return Reminder.objects.create(user=self.user, name=name, time=self.now + timedelta(seconds=seconds))
+
+    def test_due_reminders_are_sent_once(self):
+        """Check due reminders are sent and marked, and later ones waited for"""
+        self.create("Assignment", -5)
+        self.create("Quiz", 60)
+        scheduler = self.scheduler()
+
+        self.assertAlmostEqual(scheduler.tick(), 30)
+        self.assertEqual([reminder.name for reminder in self.sent], ["Assignment"])
+        self.assertIsNotNone(Reminder.objects.get(name="Assignment").notified_time)
+
+        self.now += timedelta(seconds=30)
+        self.assertAlmostEqual(scheduler.tick(), 30)
+        self.now += timedelta(seconds=30)
+        self.assertAlmostEqual(scheduler.tick(), 30)
+        self.assertEqual([reminder.name for reminder in self.sent], ["Assignment", "Quiz"])
+
+    def test_sleeps_until_next_reminder(self):
+        """Check the scheduler wakes up when the next reminder is due"""
+        self.create("Quiz", 10)
+        self.assertAlmostEqual(self.scheduler().tick(), 10)
+
+    def test_changed_reminders(self):
+        """Check deleted and moved reminders are not sent at their old time"""
+        deleted = self.create("Assignment", 5)
+        moved = self.create("Quiz", 5)
+        scheduler = self.scheduler()
+        scheduler.tick()
+        deleted.delete()
+        moved.time = self.now + timedelta(hours=1)
+        moved.save()
+
+        self.now += timedelta(seconds=5)
+        scheduler.tick()
+        self.assertEqual(self.sent, [])
+
+    def test_batches(self):
+        """Check a backlog is sent a batch at a time without waiting"""
+        for i in range(5):
+            self.create(f"Reminder {i}", -i)
+        scheduler = self.scheduler(batch_size=2)
+        delays = [scheduler.tick() for i in range(3)]
+        self.assertEqual(delays, [0, 0, 30])
+        self.assertEqual(len(self.sent), 5)
+        self.assertEqual(self.sent[0].name, "Reminder 4")
+
+    def test_full_batch_not_due(self):
+        """Check a full batch of reminders not due yet is not read again every tick"""
+        for i in range(5):
+            self.create(f"Reminder {i}", 300 + i)
+        scheduler = self.scheduler(batch_size=2)
+        with self.assertNumQueries(1):
+            self.assertAlmostEqual(scheduler.tick(), 30)
+        self.assertEqual(self.sent, [])
+
+        self.now += timedelta(seconds=301)
+        while scheduler.tick() == 0:
+            pass
+        self.assertEqual([reminder.name for reminder in self.sent], ["Reminder 0", "Reminder 1"])
+
+    def test_notifiers(self):
+        """Check the email and file notifiers"""
+        reminder = self.create("Assignment", 0)
+        EmailNotifier().send([reminder])
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ["admin@admin.com"])
+        self.assertIn("Assignment", mail.outbox[0].subject)
+
+        path = os.path.join(tempfile.mkdtemp(), "reminders.log")
+        FileNotifier(path).send([reminder, reminder])
+        with open(path) as f:
+            lines = [json.loads(line) for line in f]
+        shutil.rmtree(os.path.dirname(path))
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(lines[0]["name"], "Assignment")
+
+    def test_command_once(self):
+        """Check the command sends the due reminders and exits"""
+        self.create("Assignment", -5)
+        out = StringIO()
+        with patch("sys.stdout", out):
+            call_command("run_reminder_scheduler", "--once")
+        self.assertIn("Reminder for admin: Assignment", out.getvalue())
+
+    def test_edit_sends_again(self):
+        """Check a reminder moved to another time is sent again"""
+        reminder = self.create("Assignment", -5)
+        self.scheduler().tick()
+        self.client.login(username="admin", password="admin")
+        self.client.post(reverse("reminder_edit", args=[reminder.id]), {"name": "Assignment", "time": "2030-03-04T10:00"})
+        self.assertIsNone(Reminder.objects.get(id=reminder.id).notified_time)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), ASSISTOR_BLOB_GRACE=0)
+class CoursePurgeTestCase(TestCase):
+    """Test deleting a course and purging its rows in the background"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(first_name="admin", last_name="admin", username = "admin",
+        email="admin@admin.com", password="admin")
+        self.course = Course.objects.create(user=self.user, title="Information Security")
+        for i in range(5):
+            Note.objects.create(course=self.course, title=f"Ciphers {i}", content="Caesar")
+            Link.objects.create(course=self.course, name=f"Crypto {i}", url="https://example.com")
+        Instructor.objects.create(course=self.course, first_name="Alan")
+        self.paths = []
+        for i in range(3):
+            file = File(course=self.course, name=f"Slides {i}")
+            file.file.save(f"slides{i}.pdf", ContentFile(b"Slides %d" % i), save=True)
+            self.paths.append(file.file.path)
+        self.client.force_login(self.user)
+
+    def tearDown(self):
+        from django.conf import settings
+        shutil.rmtree(settings.MEDIA_ROOT, ignore_errors=True)
+
+    def test_delete_hides_course(self):
+        """Check deleting a course hides it at once and leaves its rows to the purge"""
+        self.client.get(reverse("courses"))
+        with self.assertNumQueries(3):
+            # The session, the user and the UPDATE
+            response = self.client.get(reverse("course_delete", args=[self.course.id]))
+        self.assertRedirects(response, reverse("index"))
+        self.assertFalse(Course.objects.filter(id=self.course.id).exists())
+        self.assertTrue(Course.all_objects.filter(id=self.course.id).exists())
+        self.assertEqual(Note.objects.filter(course_id=self.course.id).count(), 5)
+        self.assertNotContains(self.client.get(reverse("courses")), "Information Security")
+        self.assertEqual(self.client.get(reverse("course", args=[self.course.id])).status_code, 404)
+        self.assertEqual(search.search(self.user.id, "ciphers"), [])
+        self.assertEqual(self.client.get(reverse("course_delete", args=[self.course.id])).status_code, 404)
+
+    def test_purge_in_batches(self):
+        """Check the purge deletes the rows in batches and then the files"""
+        Course.objects.filter(id=self.course.id).mark_deleted()
+        other = Course.objects.create(user=self.user, title="Networks")
+        Note.objects.create(course=other, title="Routing", content="BGP")
+
+        purge = CoursePurge(batch_size=2, workers=0)
+        with self.captureOnCommitCallbacks(execute=True):
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(purge.tick(), 1)
+        deletes = [q["sql"] for q in queries if q["sql"].startswith('DELETE FROM "assistor_note"')]
+        self.assertEqual(len(deletes), 3)
+
+        self.assertFalse(Course.all_objects.filter(id=self.course.id).exists())
+        for model in [Note, File, Link, Instructor]:
+            self.assertFalse(model.objects.filter(course_id=self.course.id).exists())
+        self.assertFalse(any(os.path.exists(path) for path in self.paths))
+        self.assertEqual(Note.objects.filter(course=other).count(), 1)
+        self.assertEqual([r["title"] for r in search.search(self.user.id, "routing")], ["Routing"])
+
+    def test_command_once(self):
+        """Check the command purges the deleted courses and exits"""
+        Course.objects.filter(id=self.course.id).mark_deleted()
+        out = StringIO()
+        call_command("purge_courses", "--once", "--workers", "0", stdout=out)
+        self.assertIn("Purged 1 courses", out.getvalue())
+        self.assertFalse(Course.all_objects.exists())
@@ -0,0 +1,91 @@
+import json
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from assistor.models import Course, Note, Reminder, User
+
+
+class ConditionalTestCase(TestCase):
+    """Test the ETags and 304 responses of the pages"""
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(first_name="admin", last_name="admin", username = "admin",
+        email="admin@admin.com", password="admin")
+        self.course = Course.objects.create(user=self.user, title="Information Security")
+        self.note = Note.objects.create(course=self.course, title="Ciphers", content="Caesar")
+        self.client.force_login(self.user)
+        # Pages depend on the CSRF cookie their forms use, set it first
+        self.client.get(reverse("login"))
+
+    def revalidate(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+        return etag, self.client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+
+    def test_not_modified(self):
+        """Check an unchanged page is answered with 304 before the view runs"""
+        url = reverse("course", args=[self.course.id])
+        etag = self.client.get(url)["ETag"]
+        with self.assertNumQueries(2):
+            # The session and the user
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+        self.assertIn("no-cache", response["Cache-Control"])
+
+    def test_pages(self):
+        """Check every page and API list can be revalidated"""
+        urls = [
+            reverse("index"),
+            reverse("courses"),
+            reverse("course", args=[self.course.id]),
+            reverse("notes", args=[self.course.id]),
+            reverse("note", args=[self.course.id, self.note.id]),
+            reverse("files", args=[self.course.id]),
+            reverse("reminders"),
+            reverse("api_courses"),
+            reverse("api_notes", args=[self.course.id]),
+            reverse("api_reminders"),
+        ]
+        for url in urls:
+            etag, response = self.revalidate(url)
+            self.assertEqual(response.status_code, 304, url)
+
+    def test_changes(self):
+        """Check a page gets a new ETag when its data changes"""
+        url = reverse("notes", args=[self.course.id])
+        etag = self.client.get(url)["ETag"]
+
+        self.client.post(reverse("note_new", args=[self.course.id]), {"title": "Hashes", "content": "SHA"})
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Hashes")
+
+        etag = response["ETag"]
+        self.client.post(
+            reverse("notes_batch", args=[self.course.id]),
+            json.dumps([{"op": "update", "id": self.note.id, "data": {"title": "Block ciphers"}}]),
+            content_type="application/json",
+        )
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, "Block ciphers")
+
+        etag = self.client.get(reverse("reminders"))["ETag"]
+        Reminder.objects.create(user=self.user, name="Exam", time="2030-01-01T09:00:00Z")
+        response = self.client.get(reverse("reminders"), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_variants(self):
+        """Check the JSON variant, other pages and other users get other ETags"""
+        url = reverse("notes", args=[self.course.id])
+        etag = self.client.get(url)["ETag"]
+        self.assertNotEqual(self.client.get(url, {"format": "json"})["ETag"], etag)
+
+        other = User.objects.create_user(username="other", email="other@other.com", password="other")
+        self.client.force_login(other)
+        self.client.get(reverse("login"))
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 404)
+        self.assertNotIn("ETag", response)
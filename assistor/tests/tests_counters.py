@@ -0,0 +1,117 @@
+import json
+from io import StringIO
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.db.models.signals import post_delete
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from assistor.models import Course, File, Instructor, Link, Note, User
+
+
+class CourseCountersTestCase(TestCase):
+    """Test the counts and last activity kept on the courses"""
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(first_name="admin", last_name="admin", username = "admin",
+        email="admin@admin.com", password="admin")
+        self.course = Course.objects.create(user=self.user, title="Information Security")
+        self.client.force_login(self.user)
+
+    def counters(self):
+        return Course.objects.values(
+            "note_count", "file_count", "link_count", "instructor_count", "last_activity"
+        ).get(id=self.course.id)
+
+    def test_saved_and_deleted(self):
+        """Check saving and deleting children counts them up and down"""
+        note = Note.objects.create(course=self.course, title="Ciphers", content="Caesar")
+        File.objects.create(course=self.course, name="Slides", category="AS", file="slides.pdf")
+        Link.objects.create(course=self.course, name="Crypto", url="https://example.com")
+        Instructor.objects.create(course=self.course, first_name="Alan")
+        counters = self.counters()
+        self.assertEqual(
+            [counters[f] for f in ["note_count", "file_count", "link_count", "instructor_count"]],
+            [1, 1, 1, 1],
+        )
+        self.assertIsNotNone(counters["last_activity"])
+
+        note.title = "Block ciphers"
+        note.save()
+        self.assertEqual(self.counters()["note_count"], 1)
+        note.delete()
+        self.assertEqual(self.counters()["note_count"], 0)
+
+    def test_batch(self):
+        """Check notes created and deleted in a batch are counted"""
+        note = Note.objects.create(course=self.course, title="Ciphers", content="Caesar")
+        self.client.post(
+            reverse("notes_batch", args=[self.course.id]),
+            json.dumps([
+                {"op": "create", "data": {"title": "Hashes", "content": "SHA"}},
+                {"op": "create", "data": {"title": "Signatures", "content": "RSA"}},
+                {"op": "delete", "id": note.id},
+            ]),
+            content_type="application/json",
+        )
+        self.assertEqual(self.counters()["note_count"], 2)
+
+    def test_course_deleted(self):
+        """Check deleting a course does not update it once per child"""
+        for i in range(5):
+            Note.objects.create(course=self.course, title=f"Note {i}", content="Text")
+        with CaptureQueriesContext(connection) as queries:
+            Course.objects.filter(id=self.course.id).delete()
+        self.assertFalse([q for q in queries if q["sql"].startswith("UPDATE")])
+
+    def test_child_delete_queries(self):
+        """Check deleting a child reads only the user of its course"""
+        Note.objects.create(course=self.course, title="Ciphers", content="Caesar")
+        note = Note.objects.get(course=self.course)
+        with CaptureQueriesContext(connection) as queries:
+            note.delete()
+        courses = [q["sql"] for q in queries if '"assistor_course"' in q["sql"]]
+        self.assertEqual(len(courses), 2)
+        self.assertTrue(courses[0].startswith('UPDATE "assistor_course"'))
+        self.assertTrue(courses[1].startswith('SELECT "assistor_course"."user_id" FROM'))
+
+    def test_failed_course_delete(self):
+        """Check children are counted down again after a course delete fails"""
+        for i in range(2):
+            Note.objects.create(course=self.course, title=f"Note {i}", content="Text")
+
+        def fail(**kwargs):
+            raise RuntimeError("Disk full")
+
+        post_delete.connect(fail, sender=Note)
+        try:
+            with self.assertRaises(RuntimeError):
+                with transaction.atomic():
+                    self.course.delete()
+        finally:
+            post_delete.disconnect(fail, sender=Note)
+
+        Note.objects.filter(course=self.course).first().delete()
+        self.assertEqual(self.counters()["note_count"], 1)
+
+    def test_rebuild(self):
+        """Check the command counts the children again"""
+        Note.objects.create(course=self.course, title="Ciphers", content="Caesar")
+        Link.objects.create(course=self.course, name="Crypto", url="https://example.com")
+        Course.objects.update(note_count=7, link_count=0, last_activity=None)
+        out = StringIO()
+        call_command("rebuild_course_counters", batch_size=1, stdout=out)
+        counters = self.counters()
+        self.assertEqual((counters["note_count"], counters["link_count"]), (1, 1))
+        self.assertIsNotNone(counters["last_activity"])
+        self.assertIn("1 courses", out.getvalue())
+
+    def test_course_cards(self):
+        """Check the course cards show the counts"""
+        Note.objects.create(course=self.course, title="Ciphers", content="Caesar")
+        response = self.client.get(reverse("courses"))
+        self.assertContains(response, "1 note · 0 files")
+        Note.objects.create(course=self.course, title="Hashes", content="SHA")
+        self.assertContains(self.client.get(reverse("courses")), "2 notes · 0 files")
@@ -0,0 +1,55 @@
+import os
+import tempfile
+from unittest.mock import patch
+from django.db import connection
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.test import TestCase, override_settings
+
+from assistor import stress
+from assistor.signals import check_connections
+
+class DatabaseTestCase(TestCase):
+    """Test the database connection settings"""
+
+    def connect(self, path):
+        wrapper = DatabaseWrapper({**connection.settings_dict, "NAME": path}, alias="pragmas")
+        wrapper.ensure_connection()
+        self.addCleanup(wrapper.close)
+        return wrapper
+
+    def test_sqlite_pragmas(self):
+        """Check new SQLite connections get the pragmas"""
+        with tempfile.TemporaryDirectory() as directory:
+            wrapper = self.connect(os.path.join(directory, "db.sqlite3"))
+            with wrapper.cursor() as cursor:
+                self.assertEqual(cursor.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+                self.assertEqual(cursor.execute("PRAGMA synchronous").fetchone()[0], 1)
+                self.assertEqual(cursor.execute("PRAGMA busy_timeout").fetchone()[0], 5000)
+                self.assertEqual(cursor.execute("PRAGMA cache_size").fetchone()[0], -20000)
+                self.assertEqual(cursor.execute("PRAGMA temp_store").fetchone()[0], 2)
+            wrapper.close()
+
+    @override_settings(ASSISTOR_SQLITE_PRAGMAS={"journal_mode": "wal; DROP TABLE x"})
+    def test_invalid_pragma(self):
+        """Check pragma values are not pasted into SQL"""
+        with tempfile.TemporaryDirectory() as directory:
+            with self.assertRaises(ValueError):
+                self.connect(os.path.join(directory, "db.sqlite3"))
+
+    def test_concurrent_readers_and_writers(self):
+        """Check readers and writers in threads all succeed with the pragmas"""
+        from django.conf import settings
+        summary = stress.run(settings.ASSISTOR_SQLITE_PRAGMAS, readers=2, writers=2, seconds=0.5)
+        for operation in ["read", "write"]:
+            self.assertGreater(summary[operation]["count"], 0)
+            self.assertEqual(summary[operation]["errors"], 0)
+
+    def test_health_check(self):
+        """Check a dropped connection is closed before a request when checks are on"""
+        connection.ensure_connection()
+        with patch.object(connection, "is_usable", return_value=False), patch.object(connection, "close") as close:
+            check_connections(sender=None)
+            close.assert_not_called()
+            with patch.dict(connection.settings_dict, CONN_HEALTH_CHECKS=True):
+                check_connections(sender=None)
+            close.assert_called_once()
@@ -0,0 +1,115 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from assistor.dataset import Importer, read_records
+from assistor.models import Course, User, File, Link, Instructor, Reminder, Note
+from assistor.search import search
+
+CSV = """type,title,start_date,provider,first_name,last_name,email,name,url,content,time
+course,Information Security,2022-07-03,X University,,,,,,,
+instructor,PR,,,Ada,Lovelace,ada@example.com,,,,
+link,,,,,,,Syllabus,https://example.com/syllabus,,
+note,Ciphers,,,,,,,,Block ciphers and hashing,
+course,,,,,,,,,,
+note,Orphan,,,,,,,,Belongs to the invalid course,
+course,Data Science,,,,,,,,,
+instructor,PR,,,Alan,Turing,ada@example.com,,,,
+reminder,,,,,,,Assignment,,,2022-03-04T10:00
+"""
+
+class DataImportTestCase(TestCase):
+    """Test importing courses and their rows"""
+    def setUp(self):
+        self.user = User.objects.create_user(first_name="admin", last_name="admin", username = "admin",
+        email="admin@admin.com", password="admin")
+
+    def test_import_csv(self):
+        """Check valid records are created and invalid ones reported"""
+        self.client.login(username="admin", password="admin")
+        response = self.client.post(reverse("data_import") + "?format=csv", CSV, content_type="text/csv")
+        self.assertEqual(response.status_code, 201)
+        summary = response.json()
+        self.assertEqual(summary["created"], {"course": 2, "instructor": 1, "link": 1, "note": 1, "reminder": 1})
+        self.assertEqual([error["line"] for error in summary["errors"]], [6, 7, 9])
+
+        course = Course.objects.get(title="Information Security")
+        self.assertEqual(course.user, self.user)
+        self.assertEqual(course.instructors.get().email, "ada@example.com")
+        self.assertEqual(course.links.get().name, "Syllabus")
+        self.assertEqual(Note.objects.get().course, course)
+        self.assertEqual(Reminder.objects.get().user, self.user)
+
+    def test_import_indexes_rows(self):
+        """Check imported rows can be searched"""
+        self.client.login(username="admin", password="admin")
+        self.client.post(reverse("data_import") + "?format=csv", CSV, content_type="text/csv")
+        kinds = [result["kind"] for result in search(self.user.id, "cipher")]
+        self.assertEqual(kinds, ["note"])
+        self.assertEqual(len(search(self.user.id, "syllabus")), 1)
+
+    def test_import_batches(self):
+        """Check rows are attached to their course across batches"""
+        lines = ['{"type": "course", "title": "Information Security"}']
+        lines += [json.dumps({"type": "note", "title": f"Note {i}", "content": "Text"}) for i in range(7)]
+        summary = Importer(self.user, batch_size=3).run(read_records(lines, "jsonl"))
+        self.assertEqual(summary["created"]["note"], 7)
+        self.assertEqual(Note.objects.filter(course__title="Information Security").count(), 7)
+        self.assertEqual(len(search(self.user.id, "note")), 7)
+
+    def test_import_rejects_bad_input(self):
+        """Check an unknown format or broken JSON is rejected"""
+        self.client.login(username="admin", password="admin")
+        response = self.client.post(reverse("data_import") + "?format=xml", "", content_type="text/xml")
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(reverse("data_import") + "?format=jsonl", "{", content_type="application/x-ndjson")
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Course.objects.exists())
+
+class DataExportTestCase(TestCase):
+    """Test exporting the data of a user"""
+    def setUp(self):
+        self.user = User.objects.create_user(first_name="admin", last_name="admin", username = "admin",
+        email="admin@admin.com", password="admin")
+        for i in range(3):
+            course = Course.objects.create(user=self.user, title=f"Course {i}")
+            Note.objects.create(course=course, title=f"Note {i}", content="Text")
+            Link.objects.create(course=course, name=f"Link {i}", url="https://example.com")
+            File.objects.create(course=course, name=f"File {i}", file="slides.pdf")
+        Instructor.objects.create(course=course, first_name="Ada", last_name="Lovelace", email="ada@example.com")
+        Reminder.objects.create(user=self.user, name="Assignment", time="2022-03-04T10:00Z")
+        other = User.objects.create_user(first_name="Azain", last_name="Ayub", username = "azainayub",
+        email="azain.ayub2014@gmail.com", password="azain")
+        Course.objects.create(user=other, title="Human Computer Interaction")
+
+    def test_export_streams_records(self):
+        """Check every course is followed by its rows"""
+        self.client.login(username="admin", password="admin")
+        response = self.client.get(reverse("data_export"), {"format": "jsonl"})
+        self.assertTrue(response.streaming)
+        records = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+        self.assertEqual([(r["type"], r.get("title") or r.get("name")) for r in records], [
+            ("course", "Course 0"), ("link", "Link 0"), ("note", "Note 0"), ("file", "File 0"),
+            ("course", "Course 1"), ("link", "Link 1"), ("note", "Note 1"), ("file", "File 1"),
+            ("course", "Course 2"), ("instructor", "PR"), ("link", "Link 2"), ("note", "Note 2"), ("file", "File 2"),
+            ("reminder", "Assignment"),
+        ])
+
+    def test_export_import_round_trip(self):
+        """Check an export imports into another account, skipping its files"""
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, "export.csv")
+        call_command("export_data", "admin", "--output", path)
+        out = StringIO()
+        Instructor.objects.all().delete()
+        call_command("import_data", "azainayub", path, stdout=out, stderr=StringIO())
+        shutil.rmtree(directory)
+        self.assertIn("Created 3 courses, 1 instructors, 3 links, 3 notes, 1 reminders. 0 records were rejected, 3 files were skipped.", out.getvalue())
+        self.assertEqual(Course.objects.filter(user__username="azainayub").count(), 4)
+        self.assertFalse(File.objects.filter(course__user__username="azainayub").exists())
+        self.assertEqual(Reminder.objects.filter(user__username="azainayub").get().time, Reminder.objects.filter(user=self.user).get().time)
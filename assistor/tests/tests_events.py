@@ -0,0 +1,94 @@
+import asyncio
+import json
+from datetime import timedelta
+from asgiref.sync import sync_to_async
+from django.test import TransactionTestCase
+from django.utils import timezone
+
+from assistor import events
+from assistor.models import Reminder, User
+
+
+class ReminderEventsTestCase(TransactionTestCase):
+    """Test the stream of reminder events, read in threads with their own connections"""
+    def setUp(self):
+        self.user = User.objects.create_user(first_name="admin", last_name="admin", username = "admin",
+        email="admin@admin.com", password="admin")
+        self.client.force_login(self.user)
+        self.cookie = f"sessionid={self.client.cookies['sessionid'].value}".encode()
+        self.broker = events.broker
+        self.app = events.EventsRouter(None, events.ReminderEvents(heartbeat=0.2))
+
+    def open(self, cookie=None):
+        scope = {
+            "type": "http",
+            "method": "GET",
+            "path": events.PATH,
+            "headers": [(b"cookie", cookie)] if cookie else [],
+        }
+        self.sent = asyncio.Queue()
+        self.received = asyncio.Queue()
+        return asyncio.ensure_future(self.app(scope, self.received.get, self.sent.put))
+
+    async def read(self):
+        return await asyncio.wait_for(self.sent.get(), 2)
+
+    async def read_event(self):
+        """Return the next event of the stream, skipping the heartbeats"""
+        while True:
+            body = (await self.read())["body"].decode()
+            if not body.startswith(":"):
+                kind, data = body.strip().split("\n")
+                return kind.split(": ")[1], json.loads(data.split(": ", 1)[1])
+
+    async def close(self, stream):
+        await self.received.put({"type": "http.disconnect"})
+        await asyncio.wait_for(stream, 2)
+        self.assertEqual(self.broker.subscriptions, {})
+
+    async def test_anonymous(self):
+        """Check the stream needs a signed-in user"""
+        await asyncio.wait_for(self.open(), 2)
+        self.assertEqual((await self.read())["status"], 403)
+
+    async def test_changes(self):
+        """Check saved and deleted reminders are sent to the user's streams"""
+        stream = self.open(self.cookie)
+        start = await self.read()
+        self.assertEqual(start["status"], 200)
+        self.assertIn((b"content-type", b"text/event-stream"), start["headers"])
+
+        def change():
+            reminder = Reminder.objects.create(
+                user=self.user, name="Exam", time=timezone.now() + timedelta(days=1)
+            )
+            reminder.name = "Final exam"
+            reminder.save()
+            reminder.delete()
+
+        await sync_to_async(change)()
+        received = [await self.read_event() for _ in range(3)]
+        self.assertEqual([kind for kind, data in received], ["created", "updated", "deleted"])
+        self.assertEqual(received[1][1]["name"], "Final exam")
+        await self.close(stream)
+
+    async def test_due(self):
+        """Check a due event is sent when the time of a reminder is reached"""
+        await sync_to_async(Reminder.objects.create)(
+            user=self.user, name="Exam", time=timezone.now() + timedelta(seconds=0.3)
+        )
+        stream = self.open(self.cookie)
+        await self.read()
+        kind, data = await self.read_event()
+        self.assertEqual(kind, "due")
+        self.assertEqual(data["name"], "Exam")
+        await self.close(stream)
+
+    async def test_other_users(self):
+        """Check events only reach the streams of their user"""
+        stream = self.open(self.cookie)
+        await self.read()
+        self.broker.publish(self.user.id + 1, "created", {"id": 1})
+        self.broker.publish(self.user.id, "deleted", {"id": 2})
+        self.assertEqual(await self.read_event(), ("deleted", {"id": 2}))
+        await self.close(stream)
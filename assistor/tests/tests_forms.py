@@ -1,8 +1,9 @@
 from datetime import date, datetime
+from django.template import Context, Template
 from django.test import TestCase, client
 
 from assistor.models import User, Course, Note
-from assistor.forms import CourseForm, NoteForm, FileForm, LinkForm, InstructorForm, ReminderForm, RegistrationForm, LoginForm
+from assistor.forms import CourseForm, NoteForm, FileForm, LinkForm, InstructorForm, ReminderForm, RegistrationForm, LoginForm, empty_form
 
 class CourseFormTestCase(TestCase):
     """Test the course form"""
@@ -81,3 +82,27 @@ class FileFormTestCase(TestCase):
     def test_invalid_file_data(self):
         """Check the form with invalid data"""
         pass
+
+class EmptyFormTestCase(TestCase):
+    """Test the rendered empty forms"""
+
+    def test_same_markup(self):
+        """Check a rendered form draws like a new form"""
+        template = Template(
+            "{{ form.errors }}<label for=\"{{ form.title.id_for_label }}\">{{ form.title.label }}</label>"
+            "{{ form.title }}{{ form.content }}"
+        )
+        self.assertEqual(
+            template.render(Context({"form": empty_form(NoteForm)})),
+            template.render(Context({"form": NoteForm()})),
+        )
+        for form_class in [CourseForm, FileForm, LinkForm, InstructorForm, ReminderForm, RegistrationForm, LoginForm]:
+            form = form_class()
+            for name in form.fields:
+                self.assertEqual(str(empty_form(form_class)[name]), str(form[name]))
+                self.assertEqual(getattr(empty_form(form_class), name).help_text, form[name].help_text)
+
+    def test_rendered_once(self):
+        """Check the form is rendered once per class"""
+        self.assertIs(empty_form(NoteForm), empty_form(NoteForm))
+        self.assertIsNot(empty_form(NoteForm), empty_form(LinkForm))
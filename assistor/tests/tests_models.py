@@ -1,8 +1,16 @@
 from datetime import date, datetime
 from turtle import title
-from django.test import TestCase
+import os
+import shutil
+import tempfile
+import time
+from unittest import skipUnless
+from django.core.files.base import ContentFile
+from django.db import connection
+from django.test import TestCase, override_settings
 
 from assistor.models import Course, User, Note, File, Link, Instructor, Reminder
+from assistor.serializers import serialize_many
 
 class CourseTestCase(TestCase):
     """Test the course model"""
@@ -52,4 +60,165 @@ class NoteTestCase(TestCase):
         self.assertEqual(Note.objects.count(), 1)
 
 class FileModelTestCase(TestCase):
-    pass
\ No newline at end of file
+    pass
+
+@skipUnless(connection.vendor == "sqlite", "Query plans are checked on SQLite")
+class ListingIndexTestCase(TestCase):
+    """Test the listing queries use the composite indexes"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(first_name="admin", last_name="admin", username = "admin",
+        email="admin@...", password="admin")
+        self.course = Course.objects.create(user=self.user, title="Information Security")
+
+    def query_plan(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+            return " ".join(str(row[-1]) for row in cursor.fetchall())
+
+    def assertUsesIndex(self, queryset, index):
+        plan = self.query_plan(queryset)
+        self.assertIn(index, plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_courses_use_index(self):
+        """Check the courses of a user are read through the index"""
+        self.assertUsesIndex(self.user.courses.all()[:4], "course_user_created_idx")
+
+    def test_notes_use_index(self):
+        """Check the notes of a course are read through the index"""
+        self.assertUsesIndex(self.course.notes.all()[:4], "note_course_created_idx")
+
+    def test_files_use_index(self):
+        """Check the files of a course are read through the index"""
+        self.assertUsesIndex(self.course.files.all()[:4], "file_course_created_idx")
+
+    def test_links_use_index(self):
+        """Check the links of a course are read through the index"""
+        self.assertUsesIndex(self.course.links.all(), "link_course_created_idx")
+
+    def test_reminders_use_index(self):
+        """Check the reminders of a user are read through the index"""
+        self.assertUsesIndex(self.user.reminders.all()[:4], "reminder_user_time_idx")
+
+class SerializeQueryCountTestCase(TestCase):
+    """Test serializing lists costs a fixed number of queries"""
+
+    def setUp(self):
+        user = User.objects.create_user(first_name="admin", last_name="admin", username = "admin",
+        email="admin@...", password="admin")
+        self.course = Course.objects.create(user=user, title="Information Security")
+
+    def create_notes(self, count):
+        Note.objects.all().delete()
+        Note.objects.bulk_create(
+            Note(course=self.course, title=f"Test{i}", content="Lorem Ipsum....") for i in range(count)
+        )
+
+    def test_serialize_reads_foreign_key_column(self):
+        """Check serialize() does not load the related course"""
+        for count in (1, 100, 10000):
+            self.create_notes(count)
+            with self.assertNumQueries(1):
+                data = [note.serialize() for note in Note.objects.all()]
+            self.assertEqual(len(data), count)
+            self.assertEqual(data[0]["course"], self.course.id)
+
+    def test_serialize_many(self):
+        """Check serialize_many() serializes a list in one query"""
+        for count in (1, 100, 10000):
+            self.create_notes(count)
+            with self.assertNumQueries(1):
+                data = serialize_many(Note.objects.all())
+            self.assertEqual(len(data), count)
+            self.assertEqual(data[0], Note.objects.first().serialize())
+
+    def test_serialize_many_matches_serialize(self):
+        """Check both serializations of every model have the same fields"""
+        note = Note.objects.create(course=self.course, title="Ciphers", content="Caesar")
+        instances = [
+            Course.objects.get(id=self.course.id),
+            note,
+            Instructor.objects.create(course=self.course, first_name="Alan"),
+            File.objects.create(course=self.course, name="Slides", file="slides.pdf"),
+            Link.objects.create(course=self.course, name="Crypto", url="https://example.com"),
+            Reminder.objects.create(user=self.course.user, name="Exam", time="2030-01-01T09:00:00Z"),
+        ]
+        for instance in instances:
+            model = type(instance)
+            self.assertEqual(
+                serialize_many(model.objects.filter(id=instance.id))[0],
+                model.objects.get(id=instance.id).serialize(),
+                model.__name__,
+            )
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), ASSISTOR_BLOB_GRACE=0)
+class ContentAddressedStorageTestCase(TestCase):
+    """Test uploaded files are stored once per content"""
+
+    def setUp(self):
+        user = User.objects.create_user(first_name="admin", last_name="admin", username = "admin",
+        email="admin@...", password="admin")
+        self.course = Course.objects.create(user=user, title="Information Security")
+
+    @classmethod
+    def tearDownClass(cls):
+        from django.conf import settings
+        shutil.rmtree(settings.MEDIA_ROOT)
+        super().tearDownClass()
+
+    def create_file(self, name, content):
+        file = File(course=self.course, name=name)
+        file.file.save(name, ContentFile(content), save=True)
+        return file
+
+    def test_same_content_is_stored_once(self):
+        """Check two uploads of the same content share a blob"""
+        first = self.create_file("syllabus.pdf", b"Syllabus")
+        second = self.create_file("Syllabus.PDF", b"Syllabus")
+        other = self.create_file("slides.pdf", b"Slides")
+
+        self.assertEqual(first.file.name, second.file.name)
+        self.assertNotEqual(first.file.name, other.file.name)
+        self.assertTrue(first.file.name.startswith("blobs/"))
+        with second.file.open("rb") as f:
+            self.assertEqual(f.read(), b"Syllabus")
+
+    def test_blob_is_freed_with_last_file(self):
+        """Check a blob is deleted once no file refers to it"""
+        first = self.create_file("syllabus.pdf", b"Syllabus")
+        second = self.create_file("syllabus.pdf", b"Syllabus")
+        path = first.file.path
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertTrue(os.path.exists(path))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertFalse(os.path.exists(path))
+
+    @override_settings(ASSISTOR_BLOB_GRACE=60)
+    def test_saved_again_keeps_validators(self):
+        """Check saving a blob again keeps its modification time but restarts the grace"""
+        first = self.create_file("syllabus.pdf", b"Syllabus")
+        path = first.file.path
+        os.utime(path, (time.time() - 3600, time.time() - 3600))
+        mtime = os.path.getmtime(path)
+
+        second = self.create_file("syllabus.pdf", b"Syllabus")
+        self.assertEqual(os.path.getmtime(path), mtime)
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+            second.delete()
+        self.assertTrue(os.path.exists(path))
+
+    @override_settings(ASSISTOR_BLOB_GRACE=60)
+    def test_recent_blob_is_kept(self):
+        """Check a blob saved again a moment ago is not deleted"""
+        file = self.create_file("syllabus.pdf", b"Syllabus")
+        path = file.file.path
+        with self.captureOnCommitCallbacks(execute=True):
+            file.delete()
+        self.assertTrue(os.path.exists(path))
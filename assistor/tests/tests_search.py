@@ -0,0 +1,98 @@
+from io import StringIO
+from types import SimpleNamespace
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from assistor.models import Course, User, File, Link, Note
+from assistor.search import DatabaseSearchBackend, SQLiteSearchBackend, get_backend, search
+
+class SearchTestCase(TestCase):
+    """Test the search index and the search page"""
+    def setUp(self):
+        self.user = User.objects.create_user(first_name="admin", last_name="admin", username = "admin",
+        email="admin@admin.com", password="admin")
+        self.course = Course.objects.create(user=self.user, title="Information Security", provider="X University")
+        self.note = Note.objects.create(course=self.course, title="Cryptography", content="Block ciphers and hashing")
+        Note.objects.create(course=self.course, title="Networks", content="Firewalls and cryptography basics")
+        File.objects.create(course=self.course, name="Cryptography slides", file="slides.pdf")
+        Link.objects.create(course=self.course, name="Course page", url="https://example.com/security")
+        other = User.objects.create_user(first_name="Azain", last_name="Ayub", username = "azainayub",
+        email="azain.ayub2014@gmail.com", password="azain")
+        other_course = Course.objects.create(user=other, title="Cryptography")
+        Note.objects.create(course=other_course, title="Cryptography", content="Not yours")
+
+    def kinds(self, query):
+        return [(result["kind"], result["title"]) for result in search(self.user.id, query)]
+
+    def test_search_ranks_titles_first(self):
+        """Check matches of the user are found, titles before bodies"""
+        results = self.kinds("cryptography")
+        self.assertEqual(len(results), 3)
+        self.assertEqual(results[-1], ("note", "Networks"))
+        self.assertIn(("note", "Cryptography"), results)
+        self.assertIn(("file", "Cryptography slides"), results)
+
+    def test_search_prefix_and_all_terms(self):
+        """Check the last word is a prefix and every word must match"""
+        self.assertEqual(self.kinds("block ciph"), [("note", "Cryptography")])
+        self.assertEqual(self.kinds("block firewalls"), [])
+        self.assertEqual(self.kinds("univ"), [("course", "Information Security")])
+        self.assertEqual(self.kinds("example security"), [("link", "Course page")])
+        self.assertEqual(self.kinds("\"* OR :"), [])
+
+    def test_index_follows_saves_and_deletes(self):
+        """Check the index is updated when objects change"""
+        self.note.title = "Ciphers"
+        self.note.save()
+        self.assertIn(("note", "Ciphers"), self.kinds("ciphers"))
+        self.note.delete()
+        self.assertNotIn(("note", "Ciphers"), self.kinds("ciphers"))
+        self.course.delete()
+        self.assertEqual(self.kinds("cryptography"), [])
+
+    def test_index_reads_only_the_owner(self):
+        """Check indexing a note does not load its whole course"""
+        note = Note.objects.get(id=self.note.id)
+        with CaptureQueriesContext(connection) as queries:
+            get_backend().index(note)
+        self.assertEqual(len(queries), 2)
+        self.assertTrue(queries[0]["sql"].startswith('SELECT "assistor_course"."user_id" FROM'))
+        self.assertIn(("note", "Cryptography"), self.kinds("block"))
+
+    def test_rebuild_command(self):
+        """Check the rebuild command indexes every object again"""
+        with connection.cursor() as cursor:
+            cursor.execute("DELETE FROM assistor_search")
+        self.assertEqual(self.kinds("cryptography"), [])
+        out = StringIO()
+        call_command("rebuild_search_index", stdout=out)
+        self.assertIn("Indexed 7 documents", out.getvalue())
+        self.assertEqual(len(self.kinds("cryptography")), 3)
+
+    def test_search_view(self):
+        """Check the search page and its JSON variant"""
+        self.client.login(username="admin", password="admin")
+        response = self.client.get(reverse("search"), {"q": "cipher", "format": "json"})
+        results = response.json()["results"]
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0]["url"], reverse("note", args=[self.course.id, self.note.id]))
+
+        response = self.client.get(reverse("search"), {"q": "cipher"})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Cryptography")
+
+    @override_settings(ASSISTOR_SEARCH_BACKEND="assistor.search.DatabaseSearchBackend")
+    def test_database_backend(self):
+        """Check the backend without a full-text index finds the same objects"""
+        results = self.kinds("cryptography")
+        self.assertEqual(len(results), 3)
+        self.assertEqual(results[-1], ("note", "Networks"))
+
+    @override_settings(ASSISTOR_SEARCH_BACKEND="")
+    def test_default_backend(self):
+        """Check the FTS5 index is only used by default on SQLite"""
+        self.assertIsInstance(get_backend(SimpleNamespace(vendor="sqlite")), SQLiteSearchBackend)
+        self.assertIsInstance(get_backend(SimpleNamespace(vendor="postgresql")), DatabaseSearchBackend)
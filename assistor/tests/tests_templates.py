@@ -0,0 +1,44 @@
+from datetime import datetime, timezone
+from django.template import Context, Engine, Template
+from django.test import TestCase
+from django.urls import reverse
+
+from assistor.models import Course, Reminder
+from assistor.templatetags.cards import compile_snippet
+
+class CardTestCase(TestCase):
+    """Test the card tag"""
+
+    def render(self, source, **context):
+        return Template("{% load cards %}" + source).render(Context(context))
+
+    def test_same_as_include(self):
+        """Check the tag draws the card like the included snippet"""
+        reminder = Reminder(id=7, name="Exam <1> & \"2\"", time=datetime(2022, 3, 4, 10, tzinfo=timezone.utc))
+        url = reverse("reminder", args=[reminder.id])
+        included = self.render(
+            "{% include 'assistor/snippets/card.html' with background_color='bg-light-teal' "
+            "title=reminder.name text=reminder.time url=url %}",
+            reminder=reminder, url=url,
+        )
+        tag = self.render(
+            "{% card 'reminder' reminder.id background_color='bg-light-teal' title=reminder.name text=reminder.time %}",
+            reminder=reminder,
+        )
+        self.assertEqual(tag, included)
+        self.assertIn("Exam &lt;1&gt; &amp; &quot;2&quot;", tag)
+        self.assertIn(f'href="{url}"', tag)
+
+    def test_urls_with_ids(self):
+        """Check the URL gets every id"""
+        courses = [Course(id=i, title=f"Course {i}") for i in [3, 45]]
+        output = self.render("{% for course in courses %}{% card 'note' course.id 12 title=course.title %}{% endfor %}", courses=courses)
+        self.assertIn(reverse("note", args=[3, 12]), output)
+        self.assertIn(reverse("note", args=[45, 12]), output)
+
+    def test_compile_snippet(self):
+        """Check only snippets made of variables are compiled"""
+        engine = Engine()
+        self.assertEqual(compile_snippet(engine.from_string("<a class=\"{x}\" href=\"{{ url }}\">")), ("<a class=\"{{x}}\" href=\"{url}\">", {"url"}))
+        self.assertIsNone(compile_snippet(engine.from_string("{{ title|upper }}")))
+        self.assertIsNone(compile_snippet(engine.from_string("{% if title %}{{ title }}{% endif %}")))
@@ -0,0 +1,92 @@
+import json
+import logging
+import os
+import tempfile
+from io import StringIO
+from django.conf import settings
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from assistor import timing
+from assistor.models import Course, User
+
+class TimingTestCase(TestCase):
+    """Test the request timings"""
+    def setUp(self):
+        self.user = User.objects.create_user(first_name="admin", last_name="admin", username = "admin",
+        email="admin@admin.com", password="admin")
+        Course.objects.create(user=self.user, title="Information Security")
+        self.client.login(username="admin", password="admin")
+        timing.registry.histograms.clear()
+
+    def test_server_timing(self):
+        """Check the timings are sent, logged and recorded"""
+        with self.assertLogs("assistor.timing", "INFO") as logs:
+            response = self.client.get(reverse("courses"))
+        header = response["Server-Timing"]
+        for name in ["db", "template", "view", "total"]:
+            self.assertIn(f"{name};dur=", header)
+
+        measures = json.loads(logs.records[0].getMessage())
+        self.assertEqual(measures["name"], "courses")
+        self.assertEqual(measures["status"], 200)
+        self.assertGreater(measures["queries"], 0)
+        self.assertIn(f'desc="{measures["queries"]} queries"', header)
+        self.assertGreater(measures["template"], 0)
+        self.assertGreaterEqual(measures["total"], measures["view"])
+
+        self.assertEqual(timing.registry.summary()["courses"]["count"], 1)
+
+    def test_logged_to_file(self):
+        """Check the timings reach the timing log, not only the tests' capture"""
+        logger = logging.getLogger("assistor.timing")
+        self.assertTrue(logger.isEnabledFor(logging.INFO))
+        files = [h.baseFilename for h in logger.handlers if isinstance(h, logging.FileHandler)]
+        self.assertEqual(files, [os.path.abspath(settings.ASSISTOR_TIMING_LOG)])
+
+    @override_settings(ASSISTOR_TIMING_SAMPLE_RATE=0)
+    def test_sampling(self):
+        """Check requests left out of the sample are not measured"""
+        response = self.client.get(reverse("courses"))
+        self.assertNotIn("Server-Timing", response)
+        self.assertEqual(timing.registry.summary(), {})
+
+    def test_perfstats_view(self):
+        """Check only staff can read the timings"""
+        self.client.get(reverse("courses"))
+        self.assertEqual(self.client.get(reverse("perfstats")).status_code, 302)
+
+        User.objects.filter(id=self.user.id).update(is_staff=True)
+        response = self.client.get(reverse("perfstats"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["views"]["courses"]["count"], 1)
+
+    def test_rolling_histogram(self):
+        """Check percentiles and requests leaving the window"""
+        now = [0]
+        histogram = timing.RollingHistogram(window=60, clock=lambda: now[0])
+        for total in [3, 3, 3, 40, 700]:
+            histogram.add({"total": total, "view": total, "db": 1, "queries": 2, "template": 0, "status": 200})
+        summary = histogram.histogram().summary()
+        self.assertEqual((summary["count"], summary["p50"], summary["p95"], summary["max"]), (5, 5, 700, 700))
+        self.assertEqual(summary["mean_queries"], 2)
+
+        now[0] = 61
+        self.assertEqual(histogram.histogram().count, 0)
+
+    def test_perfstats_command(self):
+        """Check the command summarizes logged timings"""
+        with tempfile.NamedTemporaryFile("w", suffix=".log") as log:
+            for name, total in [("courses", 12), ("courses", 30), ("index", 4)]:
+                measures = {"name": name, "status": 200, "total": total, "view": total,
+                    "db": 1, "queries": 3, "template": 2}
+                log.write("INFO assistor.timing " + json.dumps(measures) + "\n")
+            log.write("not a timing\n")
+            log.flush()
+            out = StringIO()
+            call_command("perfstats", log.name, stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(lines[1].startswith("courses"))
+        self.assertEqual(lines[1].split()[1:3], ["2", "0"])
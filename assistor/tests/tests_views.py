@@ -1,12 +1,19 @@
+import hashlib
+import os
+import shutil
+import tempfile
 from datetime import date, datetime
 from turtle import title
 from unicodedata import category, name
-from django.test import TestCase, Client
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, Client, override_settings
 from django.urls import reverse
 from django.db.models import Max
 
 from assistor.views import index
 from assistor.models import Course, User, File, Link, Instructor, Reminder, Note
+from assistor.pagination import encode_cursor
 from assistor.forms import CourseForm, LinkForm, InstructorForm, ReminderForm, NoteForm, FileForm, LoginForm, RegistrationForm
 
 class RegistrationTestCase(TestCase):
@@ -103,6 +110,64 @@ class HomeTestCase(TestCase):
         self.assertEqual(response.context.get("reminders").count(), 4)
         self.assertTemplateUsed(response, "assistor/index.html")
 
+class PageCacheTestCase(TestCase):
+    """Test the home, courses and reminders lists are cached per user"""
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(first_name="admin", last_name="admin", username = "admin",
+        email="admin@admin.com", password="admin")
+        Course.objects.create(user=self.user, title="Information Security")
+        Reminder.objects.create(user=self.user, name="Assignment", time=datetime.now())
+        self.client.login(username="admin", password="admin")
+
+    def test_home_is_cached(self):
+        """Check the lists are not queried again once cached"""
+        with self.assertNumQueries(4):
+            self.client.get(reverse("index"))
+        # Only the session and the user are loaded
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse("index"))
+        self.assertContains(response, "Information Security")
+        self.assertContains(response, "Assignment")
+
+    def test_home_is_invalidated(self):
+        """Check saving and deleting courses and reminders invalidates the home"""
+        self.client.get(reverse("index"))
+        course = Course.objects.create(user=self.user, title="Data Science")
+        self.assertContains(self.client.get(reverse("index")), "Data Science")
+
+        course.title = "Machine Learning"
+        course.save()
+        response = self.client.get(reverse("index"))
+        self.assertContains(response, "Machine Learning")
+        self.assertNotContains(response, "Data Science")
+
+        Reminder.objects.get(name="Assignment").delete()
+        self.assertNotContains(self.client.get(reverse("index")), "Assignment")
+
+    def test_courses_are_invalidated(self):
+        """Check the courses page shows a new course"""
+        self.client.get(reverse("courses"))
+        self.client.post(reverse("course_new"), {"title": "Data Science"})
+        self.assertContains(self.client.get(reverse("courses")), "Data Science")
+
+    def test_reminders_are_invalidated(self):
+        """Check the reminders page shows an edited reminder"""
+        self.client.get(reverse("reminders"))
+        reminder = Reminder.objects.get(name="Assignment")
+        self.client.post(reverse("reminder_edit", args=[reminder.id]), {"name": "Quiz", "time": "2022-03-04T10:00"})
+        response = self.client.get(reverse("reminders"))
+        self.assertContains(response, "Quiz")
+        self.assertNotContains(response, "Assignment")
+
+    def test_cache_is_per_user(self):
+        """Check a user never sees the cached lists of another user"""
+        self.client.get(reverse("index"))
+        User.objects.create_user(first_name="Azain", last_name="Ayub", username = "azainayub",
+        email="azain.ayub2014@gmail.com", password="azain")
+        self.client.login(username="azainayub", password="azain")
+        self.assertNotContains(self.client.get(reverse("index")), "Information Security")
+
 class CoursesTestCase(TestCase):
     """Test the courses view"""
     def setUp(self):
@@ -119,7 +184,7 @@ class CoursesTestCase(TestCase):
         response = self.client.get(reverse("courses"))
 
         self.assertEqual(response.status_code, 200)
-        self.assertEqual(response.context.get("courses").count(), 12)
+        self.assertEqual(len(response.context.get("courses")), 12)
         self.assertTemplateUsed(response, "assistor/courses.html")
 
 class CourseTestCase(TestCase):
@@ -204,6 +269,46 @@ class CourseTestCase(TestCase):
         response = c.get("/courses/" + str(Course.objects.get(title ="Human Computer Interaction").id))
         self.assertEquals(response.status_code, 404)
 
+class CourseDashboardTestCase(TestCase):
+    """Test the course view loads its dashboard in a fixed number of queries"""
+    def setUp(self):
+        self.user = User.objects.create_user(first_name="admin", last_name="admin", username = "admin",
+        email="admin@admin.com", password="admin")
+
+    def create_course(self, children):
+        course = Course.objects.create(user=self.user, title=f"Test{children}")
+        for i in range(children):
+            Note.objects.create(course=course, title=f"Test{i}", content="Lorem Ipsum....")
+            File.objects.create(course=course, name=f"TestFile{i}", category="AS", file="assistor/templates/assistor/index.html")
+            Instructor.objects.create(course=course, first_name=f"Test{i}", email=f"test{children}-{i}@test.com")
+            Link.objects.create(course=course, name=f"TestLink{i}", url="https://hello.com")
+        return course
+
+    def test_course_dashboard(self):
+        """Check the course shows the newest notes and files with their totals"""
+        course = self.create_course(6)
+        self.client.login(username="admin", password="admin")
+        response = self.client.get(reverse("course", args=[course.id]))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context.get("notes")), 4)
+        self.assertEqual(len(response.context.get("files")), 4)
+        self.assertEqual(len(response.context.get("instructors")), 6)
+        self.assertEqual(len(response.context.get("links")), 6)
+        self.assertEqual(response.context.get("course").note_count, 6)
+        self.assertEqual(response.context.get("course").file_count, 6)
+        self.assertContains(response, reverse("notes", args=[course.id]))
+
+    def test_course_query_count(self):
+        """Check the course renders with the same queries however many children it has"""
+        self.client.login(username="admin", password="admin")
+        for children in (1, 20):
+            course = self.create_course(children)
+            # Session, user, course with counts and one per prefetched relation
+            with self.assertNumQueries(7):
+                response = self.client.get(reverse("course", args=[course.id]))
+            self.assertEqual(response.status_code, 200)
+
 class EditCourseTestCase(TestCase):
     """Test the edit course view"""
     def setUp(self):
@@ -256,9 +361,61 @@ class NotesTestCase(TestCase):
         response = self.client.get(reverse("notes", args=[course.id]))
 
         self.assertEqual(response.status_code, 200)
-        self.assertEqual(response.context.get("notes").count(), 15)
+        self.assertEqual(len(response.context.get("notes")), 15)
         self.assertTemplateUsed(response, "assistor/notes.html")
 
+class NotesPaginationTestCase(TestCase):
+    """Test the notes view is paginated with a cursor"""
+    def setUp(self):
+        user = User.objects.create_user(first_name="admin", last_name="admin", username = "admin",
+        email="admin@admin.com", password="admin")
+        course = Course.objects.create(user=user, title="Information Security")
+        for i in range(50):
+            Note.objects.create(course=course, title=f"Test{i}", content=f"Lorem Ipsum{i}")
+
+    def test_notes_pages(self):
+        """Check following the cursor walks every note exactly once"""
+        self.client.login(username="admin", password="admin")
+        course = Course.objects.get(title="Information Security")
+
+        seen = []
+        cursor = None
+        while True:
+            params = {"cursor": cursor} if cursor else {}
+            response = self.client.get(reverse("notes", args=[course.id]), params)
+            self.assertEqual(response.status_code, 200)
+            seen += [note.id for note in response.context.get("notes")]
+            page = response.context.get("page")
+            if not page.has_next:
+                break
+            cursor = page.next_token
+
+        self.assertEqual(len(seen), 50)
+        self.assertEqual(seen, list(Note.objects.filter(course=course).values_list("id", flat=True)))
+
+    def test_notes_json_page(self):
+        """Check the JSON variant returns a page with a next cursor"""
+        self.client.login(username="admin", password="admin")
+        course = Course.objects.get(title="Information Security")
+        response = self.client.get(reverse("notes", args=[course.id]), {"format": "json"})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(len(data["results"]), 24)
+        self.assertIsNotNone(data["next"])
+
+        response = self.client.get(reverse("notes", args=[course.id]), {"format": "json", "cursor": data["next"]})
+        self.assertEqual(len(response.json()["results"]), 24)
+        self.assertNotEqual(response.json()["results"][0]["id"], data["results"][0]["id"])
+
+    def test_invalid_cursor(self):
+        """Check an invalid cursor is not found"""
+        self.client.login(username="admin", password="admin")
+        course = Course.objects.get(title="Information Security")
+        cursors = [encode_cursor(values) for values in [[{}, 1], [None, 1], [1], {}]]
+        for cursor in ["not-a-cursor", *cursors]:
+            response = self.client.get(reverse("notes", args=[course.id]), {"cursor": cursor})
+            self.assertEqual(response.status_code, 404, cursor)
+
 class NoteTestCase(TestCase):
     """Test the note view"""
     def setUp(self):
@@ -369,7 +526,7 @@ class FilesTestCase(TestCase):
         response = self.client.get(reverse("files", args=[course.id]))
 
         self.assertEqual(response.status_code, 200)
-        self.assertEqual(response.context.get("files").count(), 15)
+        self.assertEqual(len(response.context.get("files")), 15)
         self.assertTemplateUsed(response, "assistor/files.html")
 
 class FileTestCase(TestCase):
@@ -394,8 +551,199 @@ class FileTestCase(TestCase):
         self.assertEqual(response.context.get("file"), file)
         self.assertTemplateUsed(response, "assistor/file.html")
 
+class FileDownloadTestCase(TestCase):
+    """Test the file download view"""
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        user = User.objects.create_user(first_name="admin", last_name="admin", username = "admin",
+        email="admin@admin.com", password="admin")
+        self.course = Course.objects.create(user=user, title="Information Security")
+        self.content = bytes(range(256)) * 4
+        self.file = File.objects.create(course=self.course, name="Slides", category="SL",
+        file=SimpleUploadedFile("slides.pdf", self.content))
+        self.url = reverse("file_download", args=[self.course.id, self.file.id])
+        self.client.login(username="admin", password="admin")
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root)
+
+    def test_download(self):
+        """Check the whole file is streamed"""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(b"".join(response.streaming_content), self.content)
+        self.assertEqual(response["Content-Length"], str(len(self.content)))
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+
+    def test_download_range(self):
+        """Check a byte range is answered with partial content"""
+        response = self.client.get(self.url, HTTP_RANGE="bytes=10-19")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b"".join(response.streaming_content), self.content[10:20])
+        self.assertEqual(response["Content-Range"], f"bytes 10-19/{len(self.content)}")
+
+        response = self.client.get(self.url, HTTP_RANGE="bytes=-5")
+        self.assertEqual(b"".join(response.streaming_content), self.content[-5:])
+
+        response = self.client.get(self.url, HTTP_RANGE="bytes=1000-")
+        self.assertEqual(b"".join(response.streaming_content), self.content[1000:])
+
+    def test_download_range_not_satisfiable(self):
+        """Check a range past the end of the file is rejected"""
+        response = self.client.get(self.url, HTTP_RANGE="bytes=5000-")
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], f"bytes */{len(self.content)}")
+
+        empty = File.objects.create(course=self.course, name="Empty", category="SL",
+        file=SimpleUploadedFile("empty.pdf", b""))
+        for header in ["bytes=-5", "bytes=0-"]:
+            response = self.client.get(reverse("file_download", args=[self.course.id, empty.id]), HTTP_RANGE=header)
+            self.assertEqual(response.status_code, 416)
+            self.assertEqual(response["Content-Range"], "bytes */0")
+
+    def test_download_stale_if_range(self):
+        """Check the whole file is sent when If-Range does not match"""
+        response = self.client.get(self.url, HTTP_RANGE="bytes=10-19", HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
+
+    def test_download_conditional(self):
+        """Check an unchanged file is answered with not modified"""
+        response = self.client.get(self.url)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+
+        response = self.client.get(self.url)
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"])
+        self.assertEqual(response.status_code, 304)
+
+    @override_settings(ASSISTOR_SENDFILE="X-Accel-Redirect")
+    def test_download_accel_redirect(self):
+        """Check the download can be handed to nginx"""
+        response = self.client.get(self.url)
+        self.assertEqual(response["X-Accel-Redirect"], "/protected-media/" + self.file.file.name)
+        self.assertEqual(response.content, b"")
+
+        os.makedirs(os.path.join(self.media_root, "legacy"))
+        with open(os.path.join(self.media_root, "legacy", "my slides#1.pdf"), "wb") as f:
+            f.write(self.content)
+        File.objects.filter(id=self.file.id).update(file="legacy/my slides#1.pdf")
+        response = self.client.get(self.url)
+        self.assertEqual(response["X-Accel-Redirect"], "/protected-media/legacy/my%20slides%231.pdf")
+
+    @override_settings(ASSISTOR_SENDFILE="X-Sendfile")
+    def test_download_sendfile(self):
+        """Check the download can be handed to the web server"""
+        response = self.client.get(self.url)
+        self.assertEqual(response["X-Sendfile"], self.file.file.path)
+
+    def test_download_of_other_user(self):
+        """Check a file of another user is not found"""
+        User.objects.create_user(first_name="Azain", last_name="Ayub", username = "azainayub",
+        email="azain.ayub2014@gmail.com", password="azain")
+        self.client.login(username="azainayub", password="azain")
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class ChunkedUploadTestCase(TestCase):
+    """Test the chunked file upload"""
+    chunk_size = 256 * 1024
+
+    def setUp(self):
+        user = User.objects.create_user(first_name="admin", last_name="admin", username = "admin",
+        email="admin@admin.com", password="admin")
+        self.course = Course.objects.create(user=user, title="Information Security")
+        self.content = bytes(range(256)) * 2500
+        self.client.login(username="admin", password="admin")
+
+    @classmethod
+    def tearDownClass(cls):
+        from django.conf import settings
+        shutil.rmtree(settings.MEDIA_ROOT)
+        super().tearDownClass()
+
+    def start(self):
+        response = self.client.post(reverse("upload_new", args=[self.course.id]), {
+            "name": "Lecture", "category": "SL", "filename": "lecture.mp4",
+            "size": len(self.content), "chunk_size": self.chunk_size,
+        })
+        self.assertEqual(response.status_code, 201)
+        return response.json()
+
+    def send(self, upload, index, data=None):
+        data = data if data is not None else self.content[index * self.chunk_size:(index + 1) * self.chunk_size]
+        return self.client.put(
+            reverse("upload_chunk", args=[self.course.id, upload["id"], index]),
+            data, content_type="application/octet-stream",
+            HTTP_X_CHUNK_SHA256=hashlib.sha256(data).hexdigest(),
+        )
+
+    def test_upload_resumes(self):
+        """Check an upload can be resumed and finalized into a file"""
+        upload = self.start()
+        self.assertEqual(upload["chunk_count"], 3)
+
+        # Chunks may arrive in any order
+        self.assertEqual(self.send(upload, 2).status_code, 200)
+        self.assertEqual(self.send(upload, 0).status_code, 200)
+
+        response = self.client.get(reverse("upload", args=[self.course.id, upload["id"]]))
+        self.assertEqual(response.json()["received"], [0, 2])
+
+        response = self.client.post(reverse("upload_finalize", args=[self.course.id, upload["id"]]))
+        self.assertEqual(response.status_code, 400)
+
+        self.send(upload, 1)
+        response = self.client.post(reverse("upload_finalize", args=[self.course.id, upload["id"]]))
+        self.assertEqual(response.status_code, 201)
+
+        file = File.objects.get(name="Lecture")
+        self.assertEqual(file.category, "SL")
+        with file.file.open("rb") as f:
+            self.assertEqual(f.read(), self.content)
+
+        # The parts are gone once the file is built
+        response = self.client.get(reverse("upload", args=[self.course.id, upload["id"]]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_chunk_checksum(self):
+        """Check a chunk not matching its checksum is rejected"""
+        upload = self.start()
+        response = self.client.put(
+            reverse("upload_chunk", args=[self.course.id, upload["id"], 0]),
+            self.content[:self.chunk_size], content_type="application/octet-stream",
+            HTTP_X_CHUNK_SHA256=hashlib.sha256(b"other").hexdigest(),
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.get(reverse("upload", args=[self.course.id, upload["id"]])).json()["received"], [])
+
+    def test_chunk_length(self):
+        """Check a chunk of the wrong length or index is rejected"""
+        upload = self.start()
+        self.assertEqual(self.send(upload, 0, b"short").status_code, 400)
+        self.assertEqual(self.send(upload, 3, b"").status_code, 400)
+
+    def test_upload_of_other_user(self):
+        """Check another user can not send chunks to an upload"""
+        upload = self.start()
+        User.objects.create_user(first_name="Azain", last_name="Ayub", username = "azainayub",
+        email="azain.ayub2014@gmail.com", password="azain")
+        self.client.login(username="azainayub", password="azain")
+        self.assertEqual(self.send(upload, 0).status_code, 404)
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
 class NewFileTestCase(TestCase):
     """Test the new file view"""
+
+    @classmethod
+    def tearDownClass(cls):
+        from django.conf import settings
+        shutil.rmtree(settings.MEDIA_ROOT)
+        super().tearDownClass()
+
     def setUp(self):
         user = User.objects.create_user(first_name="admin", last_name="admin", username = "admin",
         email="admin@admin.com", password="admin")
@@ -428,8 +776,16 @@ class NewFileTestCase(TestCase):
         file = File.objects.get(name="TestFile")
         self.assertRedirects(response, reverse("file", args=[course.id, file.id]))
 
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
 class EditFileTestCase(TestCase):
     """Test the edit file view"""
+
+    @classmethod
+    def tearDownClass(cls):
+        from django.conf import settings
+        shutil.rmtree(settings.MEDIA_ROOT)
+        super().tearDownClass()
+
     def setUp(self):
         user = User.objects.create_user(first_name="admin", last_name="admin", username = "admin",
         email="admin@admin.com", password="admin")
@@ -548,7 +904,7 @@ class RemindersTestCase(TestCase):
         response = self.client.get(reverse("reminders"))
 
         self.assertEqual(response.status_code, 200)
-        self.assertEqual(response.context.get("reminders").count(), 12)
+        self.assertEqual(len(response.context.get("reminders")), 12)
         self.assertTemplateUsed("assistor/reminders.html")
 
 class NewReminderTestCase(TestCase):
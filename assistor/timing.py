@@ -0,0 +1,272 @@
+import asyncio
+import bisect
+import contextvars
+import json
+import logging
+import random
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.template.backends.django import DjangoTemplates, Template
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the histogram buckets in milliseconds, slower requests
+# fall in a last, unbounded bucket
+BUCKETS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000]
+
+# Seconds of requests the live histograms cover
+WINDOW = 600
+
+# Timings of the request being handled
+current = contextvars.ContextVar("timings", default=None)
+
+
+class Timings:
+    """What a request spent, in milliseconds"""
+
+    def __init__(self):
+        self.queries = 0
+        self.db = 0.0
+        self.template = 0.0
+        # Templates rendered inside a template are already counted
+        self.rendering = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        # Database execute wrapper
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db += (time.perf_counter() - started) * 1000
+            self.queries += 1
+
+
+def record_query(execute, sql, params, many, context):
+    """
+    Execute wrapper of every connection, adding the query to the timings
+    of the request. The timings follow the request into the threads the
+    async views and sync_to_async() query from.
+    """
+    timings = current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    return timings(execute, sql, params, many, context)
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        timings = current.get()
+        if timings is None or timings.rendering:
+            return super().render(context, request)
+        timings.rendering += 1
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            timings.rendering -= 1
+            timings.template += (time.perf_counter() - started) * 1000
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """Django template engine adding the render time to the request timings"""
+
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code).template, self)
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name).template, self)
+
+
+class Histogram:
+    """Counts of the request times by bucket, with totals of the other timings"""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.errors = 0
+        self.maximum = 0.0
+        self.totals = dict.fromkeys(["total", "view", "db", "queries", "template"], 0.0)
+
+    def add(self, measures):
+        self.counts[bisect.bisect_left(BUCKETS, measures["total"])] += 1
+        self.count += 1
+        self.errors += measures["status"] >= 500
+        self.maximum = max(self.maximum, measures["total"])
+        for key in self.totals:
+            self.totals[key] += measures[key]
+
+    def merge(self, other):
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.errors += other.errors
+        self.maximum = max(self.maximum, other.maximum)
+        for key in self.totals:
+            self.totals[key] += other.totals[key]
+
+    def percentile(self, fraction):
+        """Return the upper bound of the bucket holding the percentile"""
+        rank = fraction * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS + [self.maximum], self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.maximum)
+        return self.maximum
+
+    def summary(self):
+        if not self.count:
+            return {"count": 0}
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "p50": self.percentile(0.5),
+            "p95": self.percentile(0.95),
+            "p99": self.percentile(0.99),
+            "max": round(self.maximum, 1),
+            **{
+                f"mean_{key}": round(total / self.count, 1)
+                for key, total in self.totals.items()
+            },
+        }
+
+
+class RollingHistogram:
+    """
+    Histogram of the last ``window`` seconds, kept as ten slices so old
+    requests drop out a slice at a time.
+    """
+
+    def __init__(self, window=WINDOW, slices=10, clock=time.monotonic):
+        self.width = window / slices
+        self.slices = deque(maxlen=slices)
+        self.clock = clock
+
+    def add(self, measures):
+        start = self.clock() // self.width
+        if not self.slices or self.slices[-1][0] != start:
+            self.slices.append((start, Histogram()))
+        self.slices[-1][1].add(measures)
+
+    def histogram(self):
+        oldest = self.clock() // self.width - self.slices.maxlen
+        merged = Histogram()
+        for start, histogram in self.slices:
+            if start > oldest:
+                merged.merge(histogram)
+        return merged
+
+
+class Registry:
+    """Rolling histograms of this process, by URL name"""
+
+    def __init__(self, window=WINDOW):
+        self.window = window
+        self.histograms = {}
+        self.lock = threading.Lock()
+
+    def record(self, name, measures):
+        with self.lock:
+            if name not in self.histograms:
+                self.histograms[name] = RollingHistogram(self.window)
+            self.histograms[name].add(measures)
+
+    def summary(self):
+        with self.lock:
+            histograms = {name: h.histogram() for name, h in self.histograms.items()}
+        return {
+            name: histogram.summary()
+            for name, histogram in sorted(histograms.items())
+            if histogram.count
+        }
+
+
+registry = Registry()
+
+
+def server_timing(measures):
+    return ", ".join([
+        f'db;dur={measures["db"]:.1f};desc="{measures["queries"]} queries"',
+        f'template;dur={measures["template"]:.1f}',
+        f'view;dur={measures["view"]:.1f}',
+        f'total;dur={measures["total"]:.1f}',
+    ])
+
+
+class TimingMiddleware:
+    """
+    Measure a sample of the requests: the queries and the time spent in
+    the database, in templates, in the view and in total. They are sent
+    in a Server-Timing header, logged as a JSON line to ``assistor.timing``
+    and added to the rolling histogram of the URL name.
+
+    ``ASSISTOR_TIMING_SAMPLE_RATE`` is the fraction of requests measured,
+    the others only cost a random number.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        # Stay in the event loop in front of async views, like MiddlewareMixin
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def sampled(self):
+        rate = getattr(settings, "ASSISTOR_TIMING_SAMPLE_RATE", 1.0)
+        return rate >= 1 or random.random() < rate
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        if not self.sampled():
+            return self.get_response(request)
+
+        token = current.set(Timings())
+        request.view_started = None
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+            return self.record(request, response, current.get(), started)
+        finally:
+            current.reset(token)
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+
+        token = current.set(Timings())
+        request.view_started = None
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+            return self.record(request, response, current.get(), started)
+        finally:
+            current.reset(token)
+
+    def record(self, request, response, timings, started):
+        finished = time.perf_counter()
+        match = getattr(request, "resolver_match", None)
+        measures = {
+            "name": match.view_name if match else None,
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "total": round((finished - started) * 1000, 2),
+            "view": round((finished - (request.view_started or started)) * 1000, 2),
+            "db": round(timings.db, 2),
+            "queries": timings.queries,
+            "template": round(timings.template, 2),
+        }
+        if getattr(settings, "ASSISTOR_SERVER_TIMING", True):
+            response["Server-Timing"] = server_timing(measures)
+        logger.info(json.dumps(measures))
+        if measures["name"]:
+            registry.record(measures["name"], measures)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.view_started = time.perf_counter()
@@ -0,0 +1,175 @@
+import hashlib
+import json
+import os
+import shutil
+import uuid
+
+from django.conf import settings
+from django.core.files import File as DjangoFile
+from django.http import Http404
+
+# Directory of MEDIA_ROOT holding the uploads in progress
+UPLOAD_DIR = "uploads"
+
+# Size of the chunks unless the client asks for another one
+CHUNK_SIZE = 8 * 1024 * 1024
+MIN_CHUNK_SIZE = 256 * 1024
+MAX_CHUNK_SIZE = 64 * 1024 * 1024
+
+# Bytes copied at a time, the only part of an upload held in memory
+COPY_SIZE = 64 * 1024
+
+
+class UploadError(Exception):
+    pass
+
+
+class PartsReader:
+    """Read the parts of an upload one after the other as a single file"""
+
+    def __init__(self, paths):
+        self.paths = list(paths)
+        self.handle = None
+
+    def read(self, size=COPY_SIZE):
+        while True:
+            if self.handle is None:
+                if not self.paths:
+                    return b""
+                self.handle = open(self.paths.pop(0), "rb")
+            data = self.handle.read(size)
+            if data:
+                return data
+            self.handle.close()
+            self.handle = None
+
+    def close(self):
+        if self.handle is not None:
+            self.handle.close()
+
+
+class ChunkedUpload:
+    """
+    An upload sent in numbered chunks. Chunks are stored as part files
+    next to a manifest describing the upload, so a client can resume
+    after a disconnect by asking which chunks were received.
+    """
+
+    def __init__(self, user_id, upload_id):
+        self.user_id = user_id
+        self.id = upload_id
+        self.path = os.path.join(
+            settings.MEDIA_ROOT, UPLOAD_DIR, str(user_id), upload_id.hex
+        )
+        self.manifest_path = os.path.join(self.path, "manifest.json")
+
+    @classmethod
+    def create(
+        cls, user_id, course_id, name, category, filename, size, chunk_size=None
+    ):
+        upload = cls(user_id, uuid.uuid4())
+        os.makedirs(upload.path)
+        manifest = {
+            "course": course_id,
+            "name": name,
+            "category": category,
+            "filename": os.path.basename(filename),
+            "size": size,
+            "chunk_size": chunk_size or CHUNK_SIZE,
+        }
+        with open(upload.manifest_path, "w") as f:
+            json.dump(manifest, f)
+        upload.manifest = manifest
+        return upload
+
+    @classmethod
+    def get(cls, user_id, course_id, upload_id):
+        """Return an upload of the user to the course, or raise Http404"""
+        upload = cls(user_id, upload_id)
+        try:
+            with open(upload.manifest_path) as f:
+                upload.manifest = json.load(f)
+        except FileNotFoundError:
+            raise Http404("Upload not found")
+        if upload.manifest["course"] != course_id:
+            raise Http404("Upload not found")
+        return upload
+
+    @property
+    def chunk_count(self):
+        return -(-self.manifest["size"] // self.manifest["chunk_size"])
+
+    def chunk_length(self, index):
+        """Return the number of bytes expected in the chunk ``index``"""
+        if index == self.chunk_count - 1:
+            return self.manifest["size"] - index * self.manifest["chunk_size"]
+        return self.manifest["chunk_size"]
+
+    def part_path(self, index):
+        return os.path.join(self.path, f"{index}.part")
+
+    def received(self):
+        """Return the indexes of the chunks already stored"""
+        return [
+            i for i in range(self.chunk_count) if os.path.exists(self.part_path(i))
+        ]
+
+    def serialize(self):
+        return {
+            "id": str(self.id),
+            "size": self.manifest["size"],
+            "chunk_size": self.manifest["chunk_size"],
+            "chunk_count": self.chunk_count,
+            "received": self.received(),
+        }
+
+    def write_chunk(self, index, stream, checksum):
+        """
+        Store the chunk ``index`` read from ``stream``, checking its length
+        and its SHA-256 ``checksum``. A chunk sent again replaces the old one.
+        """
+        if not 0 <= index < self.chunk_count:
+            raise UploadError(f"Chunk {index} is out of range.")
+        if not checksum:
+            raise UploadError("The chunk checksum is missing.")
+
+        expected = self.chunk_length(index)
+        digest = hashlib.sha256()
+        length = 0
+        temporary = self.part_path(index) + ".tmp"
+        with open(temporary, "wb") as f:
+            while True:
+                data = stream.read(COPY_SIZE)
+                if not data:
+                    break
+                length += len(data)
+                if length > expected:
+                    break
+                digest.update(data)
+                f.write(data)
+
+        if length != expected:
+            os.remove(temporary)
+            raise UploadError(f"Chunk {index} must be {expected} bytes.")
+        if digest.hexdigest() != checksum.lower():
+            os.remove(temporary)
+            raise UploadError(f"Chunk {index} does not match its checksum.")
+
+        # Only complete and verified chunks get their final name
+        os.replace(temporary, self.part_path(index))
+
+    def assemble(self):
+        """Return the uploaded file built from its chunks"""
+        received = set(self.received())
+        missing = [i for i in range(self.chunk_count) if i not in received]
+        if missing:
+            raise UploadError(f"Chunks {missing} have not been received.")
+        content = DjangoFile(
+            PartsReader(self.part_path(i) for i in range(self.chunk_count)),
+            name=self.manifest["filename"],
+        )
+        content.size = self.manifest["size"]
+        return content
+
+    def delete(self):
+        shutil.rmtree(self.path, ignore_errors=True)
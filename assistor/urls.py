@@ -1,32 +1,53 @@
+from django.conf import settings
 from django.urls import path
 
-from . import views
+from . import api, asyncviews, views
+
+# The read-heavy pages have async versions for ASGI servers
+pages = asyncviews if getattr(settings, "ASSISTOR_ASYNC_VIEWS", False) else views
 
 urlpatterns = [
-    path("", views.index, name="index"),
+    path("", pages.index, name="index"),
     path("login", views.login_view, name="login"),
     path("logout", views.logout_view, name="logout"),
     path("register", views.register, name="register"),
-    path("courses", views.courses, name="courses"),
-    path("courses/<int:course_id>", views.course, name="course"),
+    path("courses", pages.courses, name="courses"),
+    path("courses/<int:course_id>", pages.course, name="course"),
     path("courses/<int:course_id>/edit", views.course_edit, name="course_edit"),
     path("courses/new", views.course_new, name="course_new"),
     path("courses/<int:course_id>/delete", views.course_delete, name="course_delete"),
-    path("courses/<int:course_id>/notes", views.notes, name="notes"),
+    path("courses/<int:course_id>/notes", pages.notes, name="notes"),
     path("courses/<int:course_id>/notes/<int:note_id>", views.note, name="note"),
     path("courses/<int:course_id>/notes/new", views.note_new, name="note_new"),
+    path("courses/<int:course_id>/notes/batch", views.notes_batch, name="notes_batch"),
     path("courses/<int:course_id>/notes/<int:note_id>/edit", views.note_edit, name="note_edit"),
     path("courses/<int:course_id>/notes/<int:note_id>/delete", views.note_delete, name="note_delete"),
-    path("courses/<int:course_id>/files", views.files, name="files"),
+    path("courses/<int:course_id>/files", pages.files, name="files"),
     path("courses/<int:course_id>/files/new", views.file_new, name="file_new"),
     path("courses/<int:course_id>/files/<int:file_id>", views.file, name="file"),
+    path("courses/<int:course_id>/files/uploads", views.upload_new, name="upload_new"),
+    path("courses/<int:course_id>/files/uploads/<uuid:upload_id>", views.upload, name="upload"),
+    path("courses/<int:course_id>/files/uploads/<uuid:upload_id>/chunks/<int:index>", views.upload_chunk, name="upload_chunk"),
+    path("courses/<int:course_id>/files/uploads/<uuid:upload_id>/finalize", views.upload_finalize, name="upload_finalize"),
+    path("courses/<int:course_id>/files/<int:file_id>/download", views.file_download, name="file_download"),
     path("courses/<int:course_id>/files/<int:file_id>/edit", views.file_edit, name="file_edit"),
     path("courses/<int:course_id>/files/<int:file_id>/delete", views.file_delete, name="file_delete"),
     path("courses/<int:course_id>/links/new", views.link_new, name="link_new"),
     path("courses/<int:course_id>/instructors/new", views.instructor_new, name="instructor_new"),
-    path("reminders", views.reminders, name="reminders"),
+    path("reminders", pages.reminders, name="reminders"),
     path("reminders/new", views.reminder_new, name="reminder_new"),
+    path("reminders/batch", views.reminders_batch, name="reminders_batch"),
     path("reminders/<int:reminder_id>", views.reminder, name="reminder"),
     path("reminders/<int:reminder_id>/edit", views.reminder_edit, name="reminder_edit"),
-    path("reminders/<int:reminder_id>/delete", views.reminder_delete, name="reminder_delete")
+    path("reminders/<int:reminder_id>/delete", views.reminder_delete, name="reminder_delete"),
+    path("search", views.search_view, name="search"),
+    path("perfstats", views.perfstats, name="perfstats"),
+    path("import", views.data_import, name="data_import"),
+    path("export", views.data_export, name="data_export"),
+    path("api/courses", api.courses, name="api_courses"),
+    path("api/courses/<int:course_id>/notes", api.notes, name="api_notes"),
+    path("api/courses/<int:course_id>/files", api.files, name="api_files"),
+    path("api/courses/<int:course_id>/instructors", api.instructors, name="api_instructors"),
+    path("api/courses/<int:course_id>/links", api.links, name="api_links"),
+    path("api/reminders", api.reminders, name="api_reminders"),
 ]
\ No newline at end of file
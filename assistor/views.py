@@ -1,12 +1,23 @@
+import codecs
+import csv
+import json
+import os
+
 from django.http.response import HttpResponseNotAllowed, HttpResponseRedirect
-from django.http import JsonResponse
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, render
 from django.contrib.auth import authenticate, login, logout
 from django.db import IntegrityError
-from django.contrib.auth.decorators import login_required
+from django.contrib.auth.decorators import login_required, user_passes_test
 from django.urls import reverse
+from django.views.decorators.http import require_safe
 
+from . import batch, caching, dataset, search, timing
+from .conditional import conditional
+from .downloads import serve_file
+from .uploads import ChunkedUpload, UploadError
 from .models import Course, Note, Reminder, User, File, Instructor, Link
+from .pagination import paginate
 from .forms import (
     RegistrationForm,
     LoginForm,
@@ -16,11 +27,14 @@ from .forms import (
     LinkForm,
     InstructorForm,
     ReminderForm,
+    UploadForm,
+    empty_form,
 )
 
 
 # Create your views here.
 @login_required(login_url="login")
+@conditional("courses", "reminders")
 def index(request):
     """
     Display the Home Page :model:`assistor.Course`.
@@ -33,6 +47,9 @@ def index(request):
     ``reminders``
         An instance of :models:`assistor.Reminders`.
 
+    The course and reminder lists are cached per user until one of the
+    user's courses or reminders changes.
+
     **Template:**
 
     :template:`assistor/index.html`
@@ -43,8 +60,11 @@ def index(request):
         {
             "courses": request.user.courses.all()[:4],
             "reminders": request.user.reminders.all()[:4],
-            "course_form": CourseForm(),
-            "reminder_form": ReminderForm(),
+            "course_form": empty_form(CourseForm),
+            "reminder_form": empty_form(ReminderForm),
+            "cache_timeout": caching.TIMEOUT,
+            "courses_version": caching.courses_version(request.user.id),
+            "reminders_version": caching.reminders_version(request.user.id),
         },
     )
 
@@ -95,7 +115,7 @@ def login_view(request):
 
     # Show the login form
     elif request.method == "GET":
-        return render(request, "assistor/login.html", {"form": LoginForm()})
+        return render(request, "assistor/login.html", {"form": empty_form(LoginForm)})
 
     # Only POST and GET allowed
     else:
@@ -163,7 +183,7 @@ def register(request):
 
     # Request method is get
     elif request.method == "GET":
-        form = RegistrationForm()
+        form = empty_form(RegistrationForm)
         return render(request, "assistor/register.html", {"form": form})
 
     # Only post and get methods are allowed
@@ -172,21 +192,32 @@ def register(request):
 
 
 @login_required(login_url="login")
+@conditional("courses")
 def courses(request):
     """
-    Display all courses of user
+    Display all courses of user, a page at a time
     """
+    page = paginate(request.user.courses.all(), request.GET.get("cursor"))
+
+    # JSON variant of the page
+    if request.GET.get("format") == "json":
+        return JsonResponse(page.serialize())
+
     return render(
         request,
         "assistor/courses.html",
         {
-            "courses": request.user.courses.all(),
-            "course_form": CourseForm(),
+            "courses": page,
+            "page": page,
+            "course_form": empty_form(CourseForm),
+            "cache_timeout": caching.TIMEOUT,
+            "courses_version": caching.courses_version(request.user.id),
         },
     )
 
 
 @login_required(login_url="login")
+@conditional("course")
 def course(request, course_id):
     """
     Display the course :model:`assistor.Course`.
@@ -212,7 +243,9 @@ def course(request, course_id):
 
     :template:`assistor/course.html`
     """
-    course = get_object_or_404(Course, id=course_id, user=request.user)
+    course = get_object_or_404(
+        Course.objects.with_dashboard(), id=course_id, user=request.user
+    )
 
     # Show the course
     return render(
@@ -220,20 +253,21 @@ def course(request, course_id):
         "assistor/course.html",
         {
             "course": course,
-            "notes": Note.objects.filter(course=course)[:4],
-            "files": File.objects.filter(course=course)[:4],
-            "instructors": Instructor.objects.filter(course=course),
-            "links": Link.objects.filter(course=course),
+            "notes": course.latest_notes,
+            "files": course.latest_files,
+            "instructors": course.instructors.all(),
+            "links": course.links.all(),
             "course_form": CourseForm(instance=course),
-            "note_form": NoteForm(),
-            "file_form": FileForm(),
-            "instructor_form": InstructorForm(),
-            "link_form": LinkForm(),
+            "note_form": empty_form(NoteForm),
+            "file_form": empty_form(FileForm),
+            "instructor_form": empty_form(InstructorForm),
+            "link_form": empty_form(LinkForm),
         },
     )
 
 
 @login_required(login_url="login")
+@conditional("course")
 def notes(request, course_id):
     """
     Display the notes :model:`assistor.Note`.
@@ -251,19 +285,27 @@ def notes(request, course_id):
     :template:`assistor/notes.html`
     """
     course = get_object_or_404(Course, id=course_id, user=request.user)
+    page = paginate(course.notes.all(), request.GET.get("cursor"))
+
+    # JSON variant of the page
+    if request.GET.get("format") == "json":
+        return JsonResponse(page.serialize())
+
     return render(
         request,
         "assistor/notes.html",
         {
             "course": course,
-            "notes": course.notes.all(),
+            "notes": page,
+            "page": page,
             "course_form": CourseForm(instance=course),
-            "note_form": NoteForm(),
+            "note_form": empty_form(NoteForm),
         },
     )
 
 
 @login_required(login_url="login")
+@conditional("course")
 def note(request, course_id, note_id):
     """
     Display a note :model:`assistor.Note`.
@@ -291,13 +333,14 @@ def note(request, course_id, note_id):
             "course": course,
             "note": note,
             "course_form": CourseForm(instance=course),
-            "note_form": NoteForm(),
+            "note_form": empty_form(NoteForm),
             "note_edit_form": NoteForm(instance=note),
         },
     )
 
 
 @login_required(login_url="login")
+@conditional("course")
 def files(request, course_id):
     """
     Display the files :model:`assistor.File`.
@@ -315,19 +358,27 @@ def files(request, course_id):
     :template:`assistor/files.html`
     """
     course = get_object_or_404(Course, id=course_id, user=request.user)
+    page = paginate(course.files.all(), request.GET.get("cursor"))
+
+    # JSON variant of the page
+    if request.GET.get("format") == "json":
+        return JsonResponse(page.serialize())
+
     return render(
         request,
         "assistor/files.html",
         {
             "course": course,
-            "files": File.objects.filter(course=course),
+            "files": page,
+            "page": page,
             "course_form": CourseForm(instance=course),
-            "file_form": FileForm(),
+            "file_form": empty_form(FileForm),
         },
     )
 
 
 @login_required(login_url="login")
+@conditional("course")
 def file(request, course_id, file_id):
     """
     Display a file :model:`assistor.File`.
@@ -350,13 +401,34 @@ def file(request, course_id, file_id):
     return render(request, "assistor/file.html", {
         "course": course, 
         "file": file, 
-        "file_form": FileForm(),
+        "file_form": empty_form(FileForm),
         "file_edit_form": FileForm(instance=file),
         "course_form": CourseForm(instance=course),
     })
 
 
+@require_safe
+@login_required(login_url="login")
+def file_download(request, course_id, file_id):
+    """
+    Download the content of a file :model:`assistor.File`.
+
+    The file is streamed in chunks and supports byte ranges and
+    conditional requests, so large lectures can resume.
+    """
+    course = get_object_or_404(Course.objects.only("id"), id=course_id, user=request.user)
+    file = get_object_or_404(File, id=file_id, course=course)
+
+    # Stored names are content hashes, name the download after the file
+    filename = file.name
+    extension = os.path.splitext(file.file.name)[1]
+    if not filename.lower().endswith(extension):
+        filename += extension
+    return serve_file(request, file.file, filename)
+
+
 @login_required(login_url="login")
+@conditional("reminders")
 def reminder(request, reminder_id):
     """
     Display the reminder :model:`assistor.Reminder`.
@@ -373,12 +445,13 @@ def reminder(request, reminder_id):
     reminder = get_object_or_404(Reminder, id=reminder_id, user=request.user)
     return render(request, "assistor/reminder.html", {
         "reminder": reminder, 
-        "reminder_form": ReminderForm(),
+        "reminder_form": empty_form(ReminderForm),
         "reminder_edit_form": ReminderForm(instance=reminder),
     })
 
 
 @login_required(login_url="login")
+@conditional("reminders")
 def reminders(request):
     """
     Display the reminders :model:`assistor.Reminder`.
@@ -392,11 +465,119 @@ def reminders(request):
 
     :template:`assistor/reminders.html`
     """
+    page = paginate(request.user.reminders.all(), request.GET.get("cursor"))
+
+    # JSON variant of the page
+    if request.GET.get("format") == "json":
+        return JsonResponse(page.serialize())
+
     return render(
-        request, "assistor/reminders.html", {"reminders": request.user.reminders.all(), "reminder_form": ReminderForm(),}
+        request,
+        "assistor/reminders.html",
+        {
+            "reminders": page,
+            "page": page,
+            "reminder_form": empty_form(ReminderForm),
+            "cache_timeout": caching.TIMEOUT,
+            "reminders_version": caching.reminders_version(request.user.id),
+        },
     )
 
 
+@require_safe
+@login_required(login_url="login")
+def search_view(request):
+    """
+    Display the courses, notes, files and links of the user matching a
+    query, best matches first.
+
+    **Context**
+
+    ``query``
+        The words searched for.
+
+    ``results``
+        The matches, each with its kind, title, snippet and url.
+
+    **Template:**
+
+    :template:`assistor/search.html`
+    """
+    query = request.GET.get("q", "")
+    results = search.search(request.user.id, query)
+
+    # JSON variant of the results
+    if request.GET.get("format") == "json":
+        return JsonResponse({"results": results})
+
+    return render(
+        request, "assistor/search.html", {"query": query, "results": results}
+    )
+
+
+@require_safe
+@user_passes_test(lambda user: user.is_staff, login_url="login")
+def perfstats(request):
+    """
+    Return the timings of the requests this process handled in the last
+    minutes, by view: how many, the percentiles of their time and the
+    mean time spent in the database and in templates. Staff only.
+    """
+    return JsonResponse(
+        {
+            "pid": os.getpid(),
+            "window": timing.registry.window,
+            "views": timing.registry.summary(),
+        }
+    )
+
+
+@login_required(login_url="login")
+def data_import(request):
+    """
+    Import courses with their instructors, links and notes, and reminders
+    from the CSV or JSON lines request body. The body is read a line at a
+    time, so its size is not limited by the memory of the server.
+    """
+
+    # Only POST allowed
+    if request.method != "POST":
+        return HttpResponseNotAllowed(["POST"])
+
+    format = request.GET.get("format", "csv")
+    if format not in dataset.FORMATS:
+        return JsonResponse({"format": [f"Unknown format {format!r}."]}, status=400)
+
+    importer = dataset.Importer(request.user)
+    try:
+        lines = codecs.iterdecode(request, "utf-8-sig")
+        summary = importer.run(dataset.read_records(lines, format))
+    except (dataset.DatasetError, csv.Error, UnicodeDecodeError) as error:
+        return JsonResponse({"__all__": [str(error)]}, status=400)
+
+    status = 400 if importer.error_count and not any(summary["created"].values()) else 201
+    return JsonResponse(summary, status=status)
+
+
+@require_safe
+@login_required(login_url="login")
+def data_export(request):
+    """
+    Download every course, instructor, link, note, file name and reminder
+    of the user as CSV or JSON lines, streamed as it is read.
+    """
+    format = request.GET.get("format", "csv")
+    if format not in dataset.FORMATS:
+        return JsonResponse({"format": [f"Unknown format {format!r}."]}, status=400)
+
+    records = dataset.export_records(request.user)
+    response = StreamingHttpResponse(
+        dataset.write_records(records, format), content_type=dataset.FORMATS[format]
+    )
+    response["Content-Disposition"] = f'attachment; filename="coursemanager.{format}"'
+    return response
+
+
 @login_required(login_url="login")
 def course_new(request):
     """
@@ -471,11 +652,17 @@ def course_edit(request, course_id):
 def course_delete(request, course_id):
     """
     Delete the course :model:`assistor.Course`.
+
+    The course is only marked deleted, which hides it at once however
+    many rows it has. The purge_courses command deletes its rows and
+    files in the background.
     """
-    course = get_object_or_404(Course, id=course_id, user=request.user)
+    if not Course.objects.filter(id=course_id, user=request.user).mark_deleted():
+        raise Http404("No Course matches the given query.")
 
-    # Delete the course
-    course.delete()
+    # update() sends no signals to drop the cached lists
+    caching.invalidate_courses(request.user.id)
+    caching.invalidate_course(course_id)
 
     return HttpResponseRedirect(reverse("index"))
 
@@ -528,7 +715,7 @@ def note_edit(request, course_id, note_id):
     :template:`assistor/note_edit.html`
     """
     course = get_object_or_404(Course, id=course_id, user=request.user)
-    note = get_object_or_404(Note, id=note_id, course=course)
+    note = get_object_or_404(course.notes, id=note_id)
 
     # Edit the note
     if request.method == "POST":
@@ -552,7 +739,7 @@ def note_delete(request, course_id, note_id):
     Delete the note :model:`assistor.Note`.
     """
     course = get_object_or_404(Course, id=course_id, user=request.user)
-    note = get_object_or_404(Note, id=note_id, course=course)
+    note = get_object_or_404(course.notes, id=note_id)
 
     # Delete the note
     note.delete()
@@ -560,6 +747,40 @@ def note_delete(request, course_id, note_id):
     return HttpResponseRedirect(reverse("course", args=[course_id]))
 
 
+def run_batch(request, operations):
+    """
+    Apply the JSON list of operations of the request body, return the
+    result of each one.
+    """
+
+    # Only POST allowed
+    if request.method != "POST":
+        return HttpResponseNotAllowed(["POST"])
+
+    try:
+        results = operations.run(json.loads(request.body))
+    except ValueError:
+        return JsonResponse({"__all__": ["The body is not valid JSON."]}, status=400)
+    except batch.BatchError as error:
+        return JsonResponse({"__all__": [str(error)]}, status=400)
+
+    return JsonResponse({"results": results})
+
+
+@login_required(login_url="login")
+def notes_batch(request, course_id):
+    """
+    Create, update and delete many notes of the course :model:`assistor.Course`
+    in one request, for example the edits made offline.
+
+    The body is a list of operations like
+    ``{"op": "update", "id": 12, "data": {"title": "..."}}``, applied in
+    one transaction once each of them is validated.
+    """
+    course = get_object_or_404(Course, id=course_id, user=request.user)
+    return run_batch(request, batch.NoteBatch(course))
+
+
 @login_required(login_url="login")
 def reminder_new(request):
     """
@@ -609,6 +830,10 @@ def reminder_edit(request, reminder_id):
         if form.is_valid():
             reminder.name = form.cleaned_data["name"]
             reminder.time = form.cleaned_data["time"]
+
+            # A reminder moved to another time is sent again
+            if "time" in form.changed_data:
+                reminder.notified_time = None
             reminder.save()
             return JsonResponse(reminder.serialize(), status=201, safe=False)
         else:
@@ -632,6 +857,15 @@ def reminder_delete(request, reminder_id):
     return HttpResponseRedirect(reverse("index"))
 
 
+@login_required(login_url="login")
+def reminders_batch(request):
+    """
+    Create, update and delete many reminders :model:`assistor.Reminder` in
+    one request. The body is a list of operations as for the notes.
+    """
+    return run_batch(request, batch.ReminderBatch(request.user))
+
+
 @login_required(login_url="login")
 def file_new(request, course_id):
     """
@@ -667,7 +901,7 @@ def file_edit(request, course_id, file_id):
 
     # Retrieve objects
     course = get_object_or_404(Course, id=course_id, user=request.user)
-    file = get_object_or_404(File, id=file_id, course=course)
+    file = get_object_or_404(course.files, id=file_id)
 
     # Edit the file
     if request.method == "POST":
@@ -687,13 +921,124 @@ def file_edit(request, course_id, file_id):
         return HttpResponseNotAllowed()
 
 
+@login_required(login_url="login")
+def upload_new(request, course_id):
+    """
+    Start a chunked upload of a new file :model:`assistor.File`.
+
+    The client then sends the chunks to ``upload_chunk`` in any order and
+    calls ``upload_finalize`` once they are all received.
+    """
+    course = get_object_or_404(Course, id=course_id, user=request.user)
+
+    # Start the upload
+    if request.method == "POST":
+        form = UploadForm(request.POST)
+
+        # Validate the form data
+        if form.is_valid():
+            upload = ChunkedUpload.create(
+                request.user.id,
+                course.id,
+                form.cleaned_data["name"],
+                form.cleaned_data["category"],
+                form.cleaned_data["filename"],
+                form.cleaned_data["size"],
+                form.cleaned_data["chunk_size"],
+            )
+            return JsonResponse(upload.serialize(), status=201, safe=False)
+        else:
+            return JsonResponse(form.errors, status=400, safe=False)
+
+    # Only POST allowed
+    else:
+        return HttpResponseNotAllowed(["POST"])
+
+
+@login_required(login_url="login")
+def upload(request, course_id, upload_id):
+    """
+    Show which chunks of an upload were received, or cancel it.
+    """
+    course = get_object_or_404(Course, id=course_id, user=request.user)
+    upload = ChunkedUpload.get(request.user.id, course.id, upload_id)
+
+    # Show the upload so the client can resume it
+    if request.method == "GET":
+        return JsonResponse(upload.serialize(), safe=False)
+
+    # Cancel the upload
+    elif request.method == "DELETE":
+        upload.delete()
+        return HttpResponse(status=204)
+
+    # Only GET and DELETE allowed
+    else:
+        return HttpResponseNotAllowed(["GET", "DELETE"])
+
+
+@login_required(login_url="login")
+def upload_chunk(request, course_id, upload_id, index):
+    """
+    Store a chunk of an upload, sent as the raw request body with its
+    SHA-256 in the ``X-Chunk-SHA256`` header.
+    """
+    course = get_object_or_404(Course, id=course_id, user=request.user)
+    upload = ChunkedUpload.get(request.user.id, course.id, upload_id)
+
+    # Store the chunk
+    if request.method == "PUT":
+        try:
+            upload.write_chunk(index, request, request.headers.get("X-Chunk-SHA256"))
+        except UploadError as error:
+            return JsonResponse({"chunk": [str(error)]}, status=400, safe=False)
+        return JsonResponse(upload.serialize(), safe=False)
+
+    # Only PUT allowed
+    else:
+        return HttpResponseNotAllowed(["PUT"])
+
+
+@login_required(login_url="login")
+def upload_finalize(request, course_id, upload_id):
+    """
+    Build the file :model:`assistor.File` from the chunks of an upload.
+    """
+    course = get_object_or_404(Course, id=course_id, user=request.user)
+    upload = ChunkedUpload.get(request.user.id, course.id, upload_id)
+
+    # Add the new file
+    if request.method == "POST":
+        try:
+            content = upload.assemble()
+        except UploadError as error:
+            return JsonResponse({"upload": [str(error)]}, status=400, safe=False)
+
+        file = File(
+            course=course,
+            name=upload.manifest["name"],
+            category=upload.manifest["category"],
+        )
+        try:
+            file.file.save(content.name, content, save=False)
+        finally:
+            content.close()
+        file.save()
+        upload.delete()
+        return JsonResponse(file.serialize(), status=201, safe=False)
+
+    # Only POST allowed
+    else:
+        return HttpResponseNotAllowed(["POST"])
+
+
 @login_required(login_url="login")
 def file_delete(request, course_id, file_id):
     """
     Delete the file :model:`assistor.File`.
     """
     course = get_object_or_404(Course, id=course_id, user=request.user)
-    file = get_object_or_404(File, id=file_id, course=course)
+    file = get_object_or_404(course.files, id=file_id)
 
     # Delete the file
     file.delete()
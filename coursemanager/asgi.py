@@ -2,6 +2,7 @@
 ASGI config for coursemanager project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+The reminder events stream is served in front of Django.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
@@ -13,4 +14,9 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'coursemanager.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Imported once Django is set up
+from assistor.events import EventsRouter  # noqa: E402
+
+application = EventsRouter(django_application)
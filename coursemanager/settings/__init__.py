@@ -0,0 +1,12 @@
+"""
+Settings of coursemanager. DJANGO_ENV picks the profile: 'dev', the
+default, or 'prod'. Both build on base.py. A profile can also be named
+directly, as in DJANGO_SETTINGS_MODULE=coursemanager.settings.prod.
+"""
+
+import os
+
+if os.environ.get('DJANGO_ENV', 'dev') == 'prod':
+    from .prod import *  # noqa: F401,F403
+else:
+    from .dev import *  # noqa: F401,F403
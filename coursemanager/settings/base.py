@@ -0,0 +1,270 @@
+"""
+Django settings for coursemanager project, shared by the dev and prod
+profiles. Values that differ between deployments are read from the
+environment.
+
+Generated by 'django-admin startproject' using Django 3.2.9.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/3.2/topics/settings/
+
+For the full list of settings and their values, see
+https://docs.djangoproject.com/en/3.2/ref/settings/
+"""
+
+import os
+from pathlib import Path
+
+# Build paths inside the project like this: BASE_DIR / 'subdir'.
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+
+
+def env(name, default=None):
+    return os.environ.get(name, default)
+
+
+def env_bool(name, default=False):
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.lower() in ('1', 'true', 'yes', 'on')
+
+
+def env_list(name, default=()):
+    value = os.environ.get(name)
+    if value is None:
+        return list(default)
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
+# See https://docs.djangoproject.com/en/3.2/howto/deployment/checklist/
+
+DEBUG = False
+
+ALLOWED_HOSTS = env_list('DJANGO_ALLOWED_HOSTS')
+
+
+# Application definition
+
+INSTALLED_APPS = [
+    'assistor',
+    'django.contrib.admin',
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+]
+
+MIDDLEWARE = [
+    'assistor.timing.TimingMiddleware',
+    'django.middleware.security.SecurityMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+
+ROOT_URLCONF = 'coursemanager.urls'
+
+TEMPLATES = [
+    {
+        # Django templates adding their render time to the request timings
+        'BACKEND': 'assistor.timing.TimedDjangoTemplates',
+        'DIRS': [],
+        'APP_DIRS': True,
+        'OPTIONS': {
+            'context_processors': [
+                'django.template.context_processors.debug',
+                'django.template.context_processors.request',
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+            ],
+        },
+    },
+]
+
+WSGI_APPLICATION = 'coursemanager.wsgi.application'
+
+
+# Database
+# https://docs.djangoproject.com/en/3.2/ref/settings/#databases
+
+# DJANGO_DB_ENGINE selects another database, configured by the other
+# DJANGO_DB_* variables. DJANGO_CONN_MAX_AGE keeps connections open for
+# that many seconds across requests, and with DJANGO_CONN_HEALTH_CHECKS a
+# kept connection is checked before a request uses it.
+
+DATABASES = {
+    'default': {
+        'ENGINE': env('DJANGO_DB_ENGINE', 'django.db.backends.sqlite3'),
+        'NAME': env('DJANGO_DB_NAME', BASE_DIR / 'db.sqlite3'),
+        'USER': env('DJANGO_DB_USER', ''),
+        'PASSWORD': env('DJANGO_DB_PASSWORD', ''),
+        'HOST': env('DJANGO_DB_HOST', ''),
+        'PORT': env('DJANGO_DB_PORT', ''),
+        'CONN_MAX_AGE': int(env('DJANGO_CONN_MAX_AGE', 0)),
+        'CONN_HEALTH_CHECKS': env_bool('DJANGO_CONN_HEALTH_CHECKS'),
+    }
+}
+
+# Pragmas set on every new SQLite connection, see the stress_sqlite
+# command. WAL lets readers run while a write is in progress and
+# synchronous=NORMAL is safe with it, syncing less often. busy_timeout is
+# how many milliseconds a connection waits for a lock before failing
+# with "database is locked". A negative cache_size is in KiB. mmap_size
+# maps that many bytes of the file in memory.
+ASSISTOR_SQLITE_PRAGMAS = {
+    'journal_mode': env('DJANGO_SQLITE_JOURNAL_MODE', 'WAL'),
+    'synchronous': env('DJANGO_SQLITE_SYNCHRONOUS', 'NORMAL'),
+    'busy_timeout': int(env('DJANGO_SQLITE_BUSY_TIMEOUT', 5000)),
+    'cache_size': int(env('DJANGO_SQLITE_CACHE_SIZE', -20000)),
+    'temp_store': env('DJANGO_SQLITE_TEMP_STORE', 'MEMORY'),
+    'mmap_size': int(env('DJANGO_SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+# The per-user page fragments are invalidated through version keys kept in
+# this cache, so every process must share it. Use a file or memcached
+# backend, set with DJANGO_CACHE_BACKEND and DJANGO_CACHE_LOCATION, when
+# running more than one worker process.
+
+CACHES = {
+    'default': {
+        'BACKEND': env('DJANGO_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': env('DJANGO_CACHE_LOCATION', 'coursemanager'),
+    }
+}
+
+# Seconds the cached page fragments are kept
+ASSISTOR_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Part of the ETags of the pages, with the versions of their data. Set it
+# to a new value on each deploy which changes the templates, so browsers
+# do not keep pages rendered by the old ones.
+ASSISTOR_RELEASE = env('ASSISTOR_RELEASE', '')
+
+
+# Password validation
+# https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
+
+AUTH_PASSWORD_VALIDATORS = [
+    {
+        'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
+    },
+]
+
+
+# Internationalization
+# https://docs.djangoproject.com/en/3.2/topics/i18n/
+
+LANGUAGE_CODE = 'en-us'
+
+TIME_ZONE = 'UTC'
+
+USE_I18N = True
+
+USE_L10N = True
+
+USE_TZ = True
+
+
+# Static files (CSS, JavaScript, Images)
+# https://docs.djangoproject.com/en/3.2/howto/static-files/
+
+STATIC_URL = '/static/'
+
+# Default primary key field type
+# https://docs.djangoproject.com/en/3.2/ref/settings/#default-auto-field
+
+DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+AUTH_USER_MODEL = 'assistor.User'
+
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+MEDIA_URL = '/media/'
+
+# Uploaded files are stored once per distinct content
+DEFAULT_FILE_STORAGE = 'assistor.storage.ContentAddressedStorage'
+
+# Seconds a blob saved again is kept even when no File refers to it
+ASSISTOR_BLOB_GRACE = 60
+
+# Let the web server send file downloads: None, 'X-Sendfile' or
+# 'X-Accel-Redirect'. X-Accel-Redirect points nginx at the internal
+# location serving MEDIA_ROOT.
+ASSISTOR_SENDFILE = None
+ASSISTOR_SENDFILE_URL = '/protected-media/'
+
+# Search backend: 'assistor.search.SQLiteSearchBackend' uses an FTS5 index,
+# 'assistor.search.DatabaseSearchBackend' works on any database without one.
+# Empty picks the first on SQLite and the second on other databases. Run
+# the rebuild_search_index command after changing it.
+ASSISTOR_SEARCH_BACKEND = env('ASSISTOR_SEARCH_BACKEND', '')
+
+# Notifiers the run_reminder_scheduler command sends due reminders with:
+# 'assistor.notifiers.ConsoleNotifier', 'assistor.notifiers.FileNotifier'
+# (JSON lines appended to ASSISTOR_REMINDER_FILE) and
+# 'assistor.notifiers.EmailNotifier' (through EMAIL_BACKEND).
+ASSISTOR_REMINDER_NOTIFIERS = ['assistor.notifiers.ConsoleNotifier']
+ASSISTOR_REMINDER_FILE = os.path.join(BASE_DIR, 'reminders.log')
+
+# Emails are kept in memory until a mail server is configured
+EMAIL_BACKEND = env('DJANGO_EMAIL_BACKEND', 'django.core.mail.backends.locmem.EmailBackend')
+
+# Fraction of the requests whose queries, database, template and view
+# times are measured. They are sent in a Server-Timing header when
+# ASSISTOR_SERVER_TIMING is set, logged at INFO as JSON lines to the
+# 'assistor.timing' logger, which the perfstats command summarizes, and
+# kept in histograms per view that staff can read at /perfstats.
+ASSISTOR_TIMING_SAMPLE_RATE = float(env('ASSISTOR_TIMING_SAMPLE_RATE', 1.0))
+ASSISTOR_SERVER_TIMING = env_bool('ASSISTOR_SERVER_TIMING', True)
+
+# File the timings are logged to, one JSON object per line, for
+# `manage.py perfstats timings.log`. Rotating tools may move it, it is
+# reopened when they do.
+ASSISTOR_TIMING_LOG = env('ASSISTOR_TIMING_LOG', os.path.join(BASE_DIR, 'timings.log'))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'message': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'timing': {
+            'class': 'logging.handlers.WatchedFileHandler',
+            'filename': ASSISTOR_TIMING_LOG,
+            'formatter': 'message',
+            'delay': True,
+        },
+    },
+    'loggers': {
+        'assistor.timing': {
+            'handlers': ['timing'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
+# Serve the home, course, notes, files and reminders pages from the async
+# views of assistor.asyncviews, for ASGI servers. Their independent
+# queries run concurrently, each in a thread with its own connection,
+# unless ASSISTOR_CONCURRENT_QUERIES is off. Compare with the loadtest
+# command.
+ASSISTOR_ASYNC_VIEWS = env_bool('ASSISTOR_ASYNC_VIEWS')
+ASSISTOR_CONCURRENT_QUERIES = env_bool('ASSISTOR_CONCURRENT_QUERIES', True)
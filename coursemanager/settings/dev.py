@@ -0,0 +1,14 @@
+"""
+Development settings: debug on, a throwaway secret key, SQLite and the
+in-memory cache unless the environment says otherwise.
+"""
+
+from .base import *  # noqa: F401,F403
+from .base import env
+
+# SECURITY WARNING: don't run with debug turned on in production!
+DEBUG = True
+
+SECRET_KEY = env(
+    'DJANGO_SECRET_KEY', 'django-insecure-p7a!s-ve3yx4@_&o081qt9(^qz1^vc^yk-h%u8%7&4!@m25cki'
+)
@@ -0,0 +1,52 @@
+"""
+Production settings. DJANGO_SECRET_KEY and DJANGO_ALLOWED_HOSTS (comma
+separated) must be set. Connections are kept open and checked, the
+cache is shared by the worker processes and templates are compiled once
+per process.
+"""
+
+from .base import *  # noqa: F401,F403
+from .base import BASE_DIR, DATABASES, TEMPLATES, env, env_bool
+
+DEBUG = False
+
+SECRET_KEY = env('DJANGO_SECRET_KEY')
+
+DATABASES = {
+    'default': {
+        **DATABASES['default'],
+        'CONN_MAX_AGE': int(env('DJANGO_CONN_MAX_AGE', 600)),
+        'CONN_HEALTH_CHECKS': env_bool('DJANGO_CONN_HEALTH_CHECKS', True),
+    }
+}
+
+# The per-user fragment versions must be seen by every worker process
+CACHES = {
+    'default': {
+        'BACKEND': env('DJANGO_CACHE_BACKEND', 'django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': env('DJANGO_CACHE_LOCATION', str(BASE_DIR / 'cache')),
+    }
+}
+
+# Loaders replace APP_DIRS, which cannot be set with them
+TEMPLATES = [
+    {
+        **TEMPLATES[0],
+        'APP_DIRS': False,
+        'OPTIONS': {
+            **TEMPLATES[0]['OPTIONS'],
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
+        },
+    },
+]
+
+SESSION_COOKIE_SECURE = env_bool('DJANGO_SECURE_COOKIES', True)
+CSRF_COOKIE_SECURE = env_bool('DJANGO_SECURE_COOKIES', True)
+
+# Measure a sample of the requests and keep the timings to the logs
+ASSISTOR_TIMING_SAMPLE_RATE = float(env('ASSISTOR_TIMING_SAMPLE_RATE', 0.01))
+ASSISTOR_SERVER_TIMING = env_bool('ASSISTOR_SERVER_TIMING', False)
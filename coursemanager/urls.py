@@ -16,10 +16,9 @@ Including another URLconf
 from django.conf.urls import include
 from django.contrib import admin
 from django.urls import path
-from django.conf.urls.static import static
-from django.conf import settings
 
+# Uploaded files are only served through the authenticated download view
 urlpatterns = [
     path('admin/', admin.site.urls),
     path("", include("assistor.urls"))
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+]